@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Компактное представление статьи для длинных сессий
+Параграфы хранятся одним буфером UTF-8 с таблицей смещений и декодируются по запросу,
+ссылки — записями со __slots__, адреса которых берутся из общей таблицы
+"""
+
+from array import array
+from collections.abc import Sequence
+
+
+class URLTable:
+    """Общая таблица адресов: одинаковые адреса разных статей хранятся одной строкой"""
+
+    def __init__(self):
+        self._urls = {}
+
+    def intern(self, url):
+        """Адрес из таблицы (добавляется при первом обращении)"""
+        return self._urls.setdefault(url, url)
+
+    def __len__(self):
+        return len(self._urls)
+
+
+# Таблица адресов, общая для всех статей процесса
+SHARED_URLS = URLTable()
+
+
+class Link:
+    """Ссылка на статью; поддерживает обращение link['text'] и dict(link), как прежний словарь"""
+
+    __slots__ = ('text', 'url')
+
+    def __init__(self, text, url, urls=SHARED_URLS):
+        self.text = text
+        self.url = urls.intern(url)
+
+    def keys(self):
+        return self.__slots__
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __eq__(self, other):
+        if isinstance(other, Link):
+            return self.text == other.text and self.url == other.url
+        return dict(self) == other
+
+    def __hash__(self):
+        # Согласован с __eq__: равные ссылки попадают в одну ячейку множества или словаря
+        return hash((self.text, self.url))
+
+    def __repr__(self):
+        return f"Link({self.text!r}, {self.url!r})"
+
+
+class ParagraphBuffer(Sequence):
+    """Параграфы статьи в одном буфере UTF-8; текст параграфа декодируется при обращении"""
+
+    __slots__ = ('_data', '_offsets')
+
+    def __init__(self, texts=()):
+        self._data = bytearray()
+        self._offsets = array('I', [0])
+        for text in texts:
+            self.append(text)
+
+    def append(self, text):
+        """Добавление параграфа в конец буфера"""
+        self._data += text.encode("utf-8")
+        self._offsets.append(len(self._data))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("номер параграфа вне диапазона")
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return self._data[start:end].decode("utf-8")
+
+    def __eq__(self, other):
+        if isinstance(other, ParagraphBuffer):
+            return self._offsets == other._offsets and self._data == other._data
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def nbytes(self):
+        """Размер текста и таблицы смещений в байтах"""
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+    def __repr__(self):
+        return f"ParagraphBuffer({len(self)} параграфов, {len(self._data)} байт)"
+
+
+def compact_paragraphs(texts):
+    """Параграфы в компактном виде (готовый буфер используется как есть)"""
+    if isinstance(texts, ParagraphBuffer):
+        return texts
+    return ParagraphBuffer(texts)
+
+
+def compact_links(links):
+    """Ссылки из словарей {'text', 'url'} в виде записей Link"""
+    return [link if isinstance(link, Link) else Link(link['text'], link['url']) for link in links]
+
+
+def to_plain(value):
+    """Компактные структуры как обычные списки и словари (для JSON)"""
+    if isinstance(value, Link):
+        return dict(value)
+    if isinstance(value, ParagraphBuffer):
+        return list(value)
+    raise TypeError(f"Объект {type(value).__name__} не сериализуется в JSON")
@@ -0,0 +1,822 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Бенчмарки WikipediaNavigator на локальном стенде Википедии
+Запуск: python benchmark.py <сценарий> [--page-dir DIR --title ЗАГОЛОВОК] [--output report.json]
+Отчёт в JSON с версией кода и параметрами запуска, для сравнения между версиями
+"""
+
+import argparse
+import gc
+import glob
+import itertools
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource  # Unix
+except ImportError:
+    resource = None
+
+from dom_zadanie import WikipediaNavigator
+from driver_pool import DriverPool
+from driver_supervisor import driver_processes
+from article_model import to_plain
+from wiki_backends import (
+    LEAN_READY_STATES, SeleniumBackend, WaitPolicy, article_url, create_firefox_driver,
+    parse_wiki_page,
+)
+from wiki_bulk import BulkExtractor
+from wiki_cache import ArticleCache, canonical_url
+from wiki_crawler import HatnoteCrawler
+from wiki_export import ExportPipeline, open_writer, pyarrow
+from wiki_standin import StandinServer, SyntheticGraph
+from rate_limiter import RateLimiter
+from title_index import TitleIndex, build_index
+from search_index import SearchIndex
+from extraction_rules import rules_for
+
+
+# Стенд локальный, ограничивать частоту запросов к нему не нужно
+UNLIMITED = RateLimiter(rate=None)
+
+# Требуемая скорость отбора параграфов правилами извлечения (сценарий rules)
+RULES_TARGET_PARAGRAPHS_PER_SECOND = 1000000
+
+
+def count_driver_commands(driver):
+    """Подсчёт запросов к драйверу: оборачивает driver.execute и возвращает счётчик"""
+    counter = {'commands': 0}
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        counter['commands'] += 1
+        return original_execute(driver_command, params)
+
+    driver.execute = execute
+    return counter
+
+
+def percentile(values, q):
+    """Перцентиль q (0–100) с линейной интерполяцией"""
+    values = sorted(values)
+    if not values:
+        return None
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def peak_rss_bytes():
+    """Пиковый размер резидентной памяти процесса бенчмарка (без браузера)"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run_metadata(args):
+    """Версия кода, окружение и параметры запуска для сравнения отчётов"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        revision = None
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'args': vars(args),
+    }
+
+
+def standin_for(args, **kwargs):
+    """Стенд со страницами из --page-dir и задержкой ответов из аргументов"""
+    kwargs.setdefault('pages_dir', args.page_dir)
+    return StandinServer(latency=args.latency, jitter=args.jitter, seed=args.seed, **kwargs)
+
+
+def measure(navigator, counter, action, repeats):
+    """Среднее время и число запросов к драйверу на один вызов action"""
+    counter['commands'] = 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        action()
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': elapsed / repeats,
+        'commands': counter['commands'] / repeats,
+    }
+
+
+def bench_related_links(args):
+    """Сравнение поэлементного и пакетного сбора hatnote"""
+    with standin_for(args) as standin:
+        navigator = WikipediaNavigator(base_url=standin.base_url)
+        navigator.backend.driver.get(standin.article_url(args.title))
+        counter = count_driver_commands(navigator.backend.driver)
+
+        results = {}
+        for name, batched in (('legacy', False), ('batched', True)):
+            results[name] = measure(
+                navigator, counter,
+                lambda: navigator.get_related_links(batched=batched),
+                args.repeats,
+            )
+            results[name]['links'] = len(navigator.related_links)
+            results[name]['found'] = list(navigator.related_links)
+
+        same = results['legacy'].pop('found') == results['batched'].pop('found')
+        del navigator
+    return {'scenario': 'related-links', 'title': args.title,
+            'same_result': same, 'results': results}
+
+
+def bench_paragraphs(args):
+    """Сравнение поэлементного, пакетного и потокового чтения параграфов"""
+    with standin_for(args) as standin:
+        navigator = WikipediaNavigator(base_url=standin.base_url)
+        navigator.backend.driver.get(standin.article_url(args.title))
+        counter = count_driver_commands(navigator.backend.driver)
+
+        results = {}
+        for name, batched in (('legacy', False), ('batched', True)):
+            results[name] = measure(
+                navigator, counter,
+                lambda: navigator.get_article_paragraphs(batched=batched),
+                args.repeats,
+            )
+            results[name]['paragraphs'] = len(navigator.paragraphs)
+
+        # Время до первого параграфа при потоковом чтении
+        counter['commands'] = 0
+        started = time.perf_counter()
+        stream = navigator.iter_article_paragraphs()
+        next(stream, None)
+        results['stream_first'] = {
+            'seconds': time.perf_counter() - started,
+            'commands': counter['commands'],
+        }
+        del navigator
+    return {'scenario': 'paragraphs', 'title': args.title, 'results': results}
+
+
+def bench_backends(args):
+    """Сравнение Selenium и HTTP источников: одинаковый результат и время операций"""
+    with standin_for(args) as standin:
+        results = {}
+        extracted = {}
+        for backend in ('selenium', 'http'):
+            navigator = WikipediaNavigator(base_url=standin.base_url, backend=backend, fallback=False,
+                                           rate_limiter=UNLIMITED)
+            started = time.perf_counter()
+            navigator.search_article(args.title)
+            searched = time.perf_counter()
+            navigator.get_article_paragraphs()
+            read = time.perf_counter()
+            navigator.get_related_links()
+            finished = time.perf_counter()
+            results[backend] = {
+                'search_seconds': searched - started,
+                'paragraphs_seconds': read - searched,
+                'related_links_seconds': finished - read,
+                'paragraphs': len(navigator.paragraphs),
+                'links': len(navigator.related_links),
+                'waits': navigator.wait_report(),
+            }
+            extracted[backend] = (navigator.paragraphs, navigator.related_links)
+            del navigator
+    return {'scenario': 'backends', 'title': args.title,
+            'same_result': extracted['selenium'] == extracted['http'],
+            'results': results}
+
+
+def bench_pool(args):
+    """Запуск нового Firefox против аренды прогретого драйвера из пула"""
+    started = time.perf_counter()
+    driver = create_firefox_driver()
+    cold_start = time.perf_counter() - started
+    driver.quit()
+
+    pool = DriverPool(size=args.pool_size)
+    try:
+        # Первая аренда ждёт прогрева пула, остальные берут готовые драйверы
+        leases = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            with pool.leased():
+                pass
+            leases.append(time.perf_counter() - started)
+        metrics = pool.metrics()
+    finally:
+        pool.close()
+    return {'scenario': 'pool', 'cold_start_seconds': cold_start,
+            'lease_seconds': leases, 'pool': metrics}
+
+
+def _kill_driver(driver, target):
+    """Аварийное завершение процессов драйвера: только Firefox или geckodriver вместе с ним"""
+    geckodriver_pid, browser_pid = driver_processes(driver)
+    pids = [browser_pid] if target == "browser" else [geckodriver_pid, browser_pid]
+    for pid in pids:
+        if pid:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+def bench_driver_recovery(args):
+    """Гибель драйвера посреди чтения статьи: время восстановления с запуском нового
+    браузера и с запасным, возврат на ту же статью и позицию чтения"""
+    results = {}
+    with standin_for(args) as standin:
+        for name, standby in (('restart', False), ('standby', True)):
+            navigator = WikipediaNavigator(base_url=standin.base_url, backend='selenium',
+                                           rate_limiter=UNLIMITED, verbose=False,
+                                           standby_browser=standby)
+            try:
+                navigator.open_article(standin.article_url(args.title))
+                navigator.get_article_paragraphs()
+                expected = list(navigator.paragraphs)
+                supervisor = navigator.backend.supervisor
+                operations, restored = [], 0
+                for attempt in range(args.repeats):
+                    if standby:
+                        supervisor.wait_spare()
+                    # Читатель где-то посреди статьи: позиция и статья запоминаются до сбоя
+                    navigator.current_paragraph = (attempt * 7 + 1) % len(expected)
+                    position, url = navigator.current_paragraph, navigator.current_url
+                    _kill_driver(supervisor.driver, args.kill)
+                    # Чтение параграфов после гибели драйвера: обнаружение сбоя, замена
+                    # браузера, повторное открытие статьи и повтор чтения
+                    started = time.perf_counter()
+                    _, texts = navigator._read_paragraph_texts()
+                    operations.append(time.perf_counter() - started)
+                    # Браузер должен снова стоять на той же статье, а позиция — не сбиться
+                    restored += (navigator.rules.filter_paragraphs(texts) == expected and
+                                 canonical_url(navigator.backend.current_url()) == url and
+                                 navigator.current_paragraph == position)
+                stats = supervisor.stats()
+            finally:
+                navigator.close()
+            results[name] = {
+                'recoveries': stats['restarts'], 'from_standby': stats['from_standby'],
+                'recovery_p50_seconds': stats['recovery_p50'],
+                'recovery_max_seconds': stats['recovery_max'],
+                'operation_p50_seconds': percentile(operations, 50),
+                'restored': restored, 'repeats': args.repeats,
+            }
+    return {'scenario': 'driver-recovery', 'kill': args.kill, 'title': args.title,
+            'results': results}
+
+
+def bench_crawl(args):
+    """Обход синтетического графа статей в ширину"""
+    graph = SyntheticGraph(pages=args.graph_pages, fanout=args.fanout)
+    with standin_for(args, graph=graph) as standin:
+        def navigator_factory():
+            return WikipediaNavigator(base_url=standin.base_url, backend='http',
+                                      rate_limiter=UNLIMITED, verbose=False)
+
+        crawler = HatnoteCrawler(navigator_factory, depth=args.depth, workers=args.workers)
+        started = time.perf_counter()
+        crawler.crawl([graph.title(0)], lambda record: None)
+        elapsed = time.perf_counter() - started
+    return {'scenario': 'crawl', 'graph_pages': graph.pages, 'fanout': graph.fanout,
+            'depth': args.depth, 'workers': args.workers, 'pages': crawler.pages,
+            'failures': crawler.failures, 'seconds': elapsed,
+            'pages_per_second': crawler.pages / elapsed if elapsed else None}
+
+
+def bench_prefetch(args):
+    """Время перехода по основной статье без предзагрузки и с ней"""
+    graph = SyntheticGraph(pages=args.graph_pages, fanout=args.fanout)
+    with standin_for(args, graph=graph) as standin:
+        results = {}
+        for name, workers in (('sync', 0), ('prefetch', 2)):
+            navigator = WikipediaNavigator(base_url=standin.base_url, backend='http',
+                                           rate_limiter=UNLIMITED, verbose=False,
+                                           prefetch_workers=workers)
+            transitions = []
+            navigator.search_article(graph.title(0))
+            for _ in range(args.repeats):
+                navigator.get_article_paragraphs()
+                navigator.get_related_links()
+                # Пользователь читает статью
+                time.sleep(args.read_time)
+                started = time.perf_counter()
+                navigator.open_article(navigator.related_links[-1]['url'])
+                navigator.get_article_paragraphs()
+                transitions.append(time.perf_counter() - started)
+            results[name] = {'transition_seconds': transitions}
+            if navigator.prefetcher is not None:
+                results[name]['prefetcher'] = dict(navigator.prefetcher.stats)
+            navigator.close()
+    return {'scenario': 'prefetch', 'read_time': args.read_time, 'results': results}
+
+
+def bench_title_index(args):
+    """Построение индекса заголовков, время открытия и скорость поиска"""
+    with tempfile.TemporaryDirectory() as tmp:
+        titles_path = os.path.join(tmp, "titles.txt")
+        index_path = os.path.join(tmp, "titles.idx")
+        with open(titles_path, "w", encoding="utf-8") as f:
+            for n in range(args.titles):
+                f.write(f"Статья_номер_{n}\n")
+
+        started = time.perf_counter()
+        build_index(titles_path, index_path)
+        build_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = TitleIndex(index_path)
+        open_seconds = time.perf_counter() - started
+
+        queries = [f"статья номер {n * 7919 % args.titles}" for n in range(10000)]
+        started = time.perf_counter()
+        found = sum(index.lookup(query) is not None for query in queries)
+        lookup_seconds = (time.perf_counter() - started) / len(queries)
+
+        started = time.perf_counter()
+        for query in queries[:1000]:
+            index.prefix(query[:-1])
+        prefix_seconds = (time.perf_counter() - started) / 1000
+
+        size = os.path.getsize(index_path)
+        index.close()
+    return {'scenario': 'title-index', 'titles': args.titles, 'index_bytes': size,
+            'build_seconds': build_seconds, 'open_seconds': open_seconds,
+            'lookup_seconds': lookup_seconds, 'prefix_seconds': prefix_seconds,
+            'found': found, 'queries': len(queries)}
+
+
+def _corpus(args, base_url):
+    """HTML статей для замера памяти: сохранённые страницы или синтетический граф"""
+    if args.page_dir:
+        for path in sorted(glob.glob(os.path.join(args.page_dir, "*.html"))):
+            title = os.path.splitext(os.path.basename(path))[0]
+            with open(path, encoding="utf-8") as f:
+                yield article_url(base_url, title), f.read()
+    else:
+        graph = SyntheticGraph(pages=args.graph_pages, fanout=args.fanout, paragraphs=20)
+        for n in range(graph.pages):
+            title = graph.title(n)
+            yield article_url(base_url, title), graph.render(title)
+
+
+def _traced_bytes(build, pages):
+    """Память, занятая записями статей после построения (tracemalloc)"""
+    gc.collect()
+    tracemalloc.start()
+    records = [build(parse_wiki_page(html, url)) for url, html in pages]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, len(records)
+
+
+def bench_memory(args):
+    """Память на статью: списки строк и словари против компактной модели статьи"""
+    base_url = "http://127.0.0.1"
+    navigator = WikipediaNavigator(base_url=base_url, backend='http', rate_limiter=UNLIMITED,
+                                   verbose=False)
+    pages = list(_corpus(args, base_url))
+    # Прежний вид записи — обычные списки и словари со своими строками (как после json)
+    plain = lambda page: json.loads(json.dumps(navigator._record_from_page(page), default=to_plain))
+    compact_bytes, articles = _traced_bytes(navigator._record_from_page, pages)
+    plain_bytes, _ = _traced_bytes(plain, pages)
+    navigator.close()
+    return {'scenario': 'memory', 'articles': articles,
+            'plain_bytes_per_article': plain_bytes / articles if articles else None,
+            'compact_bytes_per_article': compact_bytes / articles if articles else None,
+            'ratio': compact_bytes / plain_bytes if plain_bytes else None}
+
+
+def _suite_queries(args):
+    """Запросы сценария: заданные явно, иначе сохранённые статьи и поиски из --page-dir"""
+    if args.query:
+        return args.query
+    if args.page_dir:
+        titles = sorted(os.path.splitext(os.path.basename(path))[0]
+                        for path in glob.glob(os.path.join(args.page_dir, "*.html")))
+        searches = sorted(os.path.splitext(os.path.basename(path))[0]
+                          for path in glob.glob(os.path.join(args.page_dir, "search", "*.html")))
+        if titles or searches:
+            return titles[:args.max_queries] + searches[:args.max_queries]
+    return [args.title]
+
+
+def bench_suite(args):
+    """Сценарий пользователя через настоящие методы навигатора: p50/p95, запросы к драйверу, память"""
+    queries = _suite_queries(args)
+    samples = {}
+    found = 0
+    # Со своим каталогом страниц стенд не придумывает статьи для неизвестных заголовков
+    with standin_for(args, synthetic=not args.page_dir) as standin:
+        navigator = WikipediaNavigator(base_url=standin.base_url, backend=args.backend,
+                                       fallback=False, rate_limiter=UNLIMITED, verbose=False)
+        driver = getattr(navigator.backend, 'driver', None)
+        counter = count_driver_commands(driver) if driver is not None else None
+
+        def timed(operation, action):
+            commands = counter['commands'] if counter else 0
+            started = time.perf_counter()
+            result = action()
+            elapsed = time.perf_counter() - started
+            samples.setdefault(operation, []).append(
+                (elapsed, counter['commands'] - commands if counter else 0))
+            return result
+
+        for _ in range(args.repeats):
+            for query in queries:
+                if not timed('search_article', lambda: navigator.search_article(query)):
+                    continue
+                found += 1
+                timed('get_article_paragraphs', navigator.get_article_paragraphs)
+                timed('get_related_links', navigator.get_related_links)
+                if navigator.related_links:
+                    link = navigator.related_links[0]
+                    timed('hatnote_navigation', lambda: navigator.open_article(link['url'])
+                          and navigator.get_article_paragraphs())
+        spans = navigator.tracer.stats()
+        requests_served = standin.requests_served
+        navigator.close()
+
+    operations = {}
+    for operation, values in samples.items():
+        seconds = [elapsed for elapsed, _ in values]
+        operations[operation] = {
+            'count': len(values),
+            'p50_seconds': percentile(seconds, 50),
+            'p95_seconds': percentile(seconds, 95),
+            'max_seconds': max(seconds),
+            'commands_per_call': sum(commands for _, commands in values) / len(values),
+        }
+    return {'scenario': 'suite', 'backend': args.backend, 'queries': queries,
+            'found': found, 'requests_served': requests_served,
+            'webdriver_commands': counter['commands'] if counter else 0,
+            'peak_rss_bytes': peak_rss_bytes(), 'operations': operations, 'spans': spans}
+
+
+def bench_browser_profile(args):
+    """Запуск Firefox и объём данных на статью: обычный профиль, экономный, экономный с постоянным"""
+    titles = args.query or [args.title]
+    results = {}
+    with standin_for(args) as standin, tempfile.TemporaryDirectory() as profile_dir:
+        base_url = args.base_url or standin.base_url
+        for name, lean, profile in (('default', False, None), ('lean', True, None),
+                                    ('lean_profile', True, profile_dir)):
+            # Первый запуск с постоянным профилем создаёт его и в замер не входит
+            if profile:
+                create_firefox_driver(lean, profile).quit()
+            startups = []
+            for attempt in range(args.repeats):
+                started = time.perf_counter()
+                driver = create_firefox_driver(lean, profile)
+                startups.append(time.perf_counter() - started)
+                if attempt < args.repeats - 1:
+                    driver.quit()
+
+            ready_states = LEAN_READY_STATES if lean else ("complete",)
+            backend = SeleniumBackend(driver=driver, wait_policy=WaitPolicy(ready_states=ready_states),
+                                      verbose=False)
+            loads, weights, resources = [], [], []
+            for title in titles:
+                started = time.perf_counter()
+                backend.open(article_url(base_url, title))
+                loads.append(time.perf_counter() - started)
+                transferred, count = backend.page_weight()
+                weights.append(transferred)
+                resources.append(count)
+            backend.close()
+            results[name] = {
+                'startup_p50_seconds': percentile(startups, 50),
+                'startup_seconds': startups,
+                'load_p50_seconds': percentile(loads, 50),
+                'bytes_per_article': sum(weights) / len(weights),
+                'resources_per_article': sum(resources) / len(resources),
+            }
+    return {'scenario': 'browser-profile', 'titles': titles, 'results': results}
+
+
+def bench_bulk(args):
+    """Массовое извлечение пулом процессов: рост скорости с числом процессов"""
+    graph = SyntheticGraph(pages=args.graph_pages, fanout=args.fanout)
+    titles = [graph.title(n) for n in range(graph.pages)]
+    results = {}
+    with standin_for(args, graph=graph) as standin, tempfile.TemporaryDirectory() as tmp:
+        workers = 1
+        while workers <= args.workers:
+            options = {'base_url': standin.base_url, 'backend': 'http', 'rate': None,
+                       'burst': 0, 'rate_state': None, 'title_index': None}
+            extractor = BulkExtractor(options, workers=workers)
+            started = time.perf_counter()
+            extractor.run(titles, os.path.join(tmp, f"bulk-{workers}.jsonl"))
+            elapsed = time.perf_counter() - started
+            results[workers] = {'seconds': elapsed, 'extracted': extractor.extracted,
+                                'failed': extractor.failed,
+                                'pages_per_second': extractor.extracted / elapsed}
+            workers *= 2
+    base = results[1]['pages_per_second']
+    for result in results.values():
+        result['speedup'] = result['pages_per_second'] / base
+    return {'scenario': 'bulk', 'titles': len(titles), 'latency': args.latency, 'results': results}
+
+
+def bench_recrawl(args):
+    """Повторный обход: полная загрузка против условных запросов и разбора изменившихся разделов"""
+    graph = SyntheticGraph(pages=args.graph_pages, fanout=args.fanout, paragraphs=40)
+    results = {}
+    extracted = {}
+    with standin_for(args, graph=graph) as standin, tempfile.TemporaryDirectory() as tmp:
+        urls = [standin.article_url(graph.title(n)) for n in range(graph.pages)]
+        cache = ArticleCache(os.path.join(tmp, "cache.sqlite3"))
+
+        def visit_all(name, cache):
+            navigator = WikipediaNavigator(base_url=standin.base_url, backend='http', cache=cache,
+                                           rate_limiter=UNLIMITED, verbose=False)
+            requests = standin.requests_served
+            started = time.perf_counter()
+            records = []
+            for url in urls:
+                navigator.open_article(url)
+                records.append(navigator.article_record())
+            elapsed = time.perf_counter() - started
+            spans = navigator.tracer.stats()
+            navigator.close()
+            extracted[name] = records
+            results[name] = {
+                'seconds': elapsed,
+                'requests': standin.requests_served - requests,
+                'parse_seconds': spans.get('http.parse', {}).get('total', 0.0),
+            }
+
+        visit_all('initial', cache)
+        # Часть статей правится, все записи кэша устаревают
+        step = max(1, round(1 / args.changed_fraction))
+        for n in range(0, graph.pages, step):
+            graph.edit(n)
+        cache.ttl = 0
+        visit_all('revalidate', cache)
+        visit_all('full', None)
+        results['revalidate']['unchanged'] = cache.stats()['revalidated']
+        cache.close()
+    return {'scenario': 'recrawl', 'pages': graph.pages, 'changed': len(graph.revisions),
+            'same_result': extracted['revalidate'] == extracted['full'], 'results': results}
+
+
+# Основы и окончания слов синтетического корпуса для полнотекстового индекса
+CORPUS_STEMS = ("город", "стран", "истори", "войн", "рек", "гор", "культур", "наук", "язык",
+                "народ", "столиц", "импери", "государств", "револю", "литератур", "музык",
+                "церкв", "границ", "торговл", "флот", "остров", "мор", "лес", "зем", "власт")
+CORPUS_ENDINGS = ("", "а", "ы", "е", "у", "ой", "ами", "ах", "ов", "ского", "ская", "ские")
+
+
+def _text_corpus(articles, paragraphs=20, words=60, seed=0):
+    """Синтетические статьи из слов с распределением частот, близким к закону Ципфа"""
+    rng = random.Random(seed)
+    vocabulary = [f"{stem}{ending}{'' if n == 0 else 'ов' * (n % 3) + str(n)}"
+                  for n in range(40) for stem in CORPUS_STEMS for ending in CORPUS_ENDINGS]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for n in range(articles):
+        title = f"Статья {n} о {rng.choice(CORPUS_STEMS)}е"
+        body = [" ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words)) for _ in range(paragraphs)]
+        yield f"http://127.0.0.1/wiki/Статья_{n}", title, body
+
+
+def bench_search_index(args):
+    """Полнотекстовый индекс: скорость наполнения, размер, время поиска и обновления на месте"""
+    corpus = list(_text_corpus(args.articles, seed=args.seed))
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search.sqlite3")
+        index = SearchIndex(path)
+        started = time.perf_counter()
+        for url, title, paragraphs in corpus:
+            index.add_article(url, title, paragraphs, commit=False)
+        index.commit()
+        build_seconds = time.perf_counter() - started
+
+        queries = [" ".join(rng.choice(paragraphs).split()[:rng.randint(1, 3)])
+                   for _, _, paragraphs in rng.sample(corpus, min(200, len(corpus)))]
+        timings = []
+        found = 0
+        for query in queries:
+            started = time.perf_counter()
+            found += bool(index.search(query))
+            timings.append(time.perf_counter() - started)
+
+        # Повторное добавление без изменений пропускается, изменённая статья обновляется на месте
+        sample = rng.sample(corpus, min(100, len(corpus)))
+        started = time.perf_counter()
+        for url, title, paragraphs in sample:
+            index.add_article(url, title, paragraphs)
+        unchanged_seconds = (time.perf_counter() - started) / len(sample)
+        started = time.perf_counter()
+        for url, title, paragraphs in sample:
+            index.add_article(url, title, paragraphs[1:] + ["Новый параграф после правки статьи"])
+        update_seconds = (time.perf_counter() - started) / len(sample)
+
+        stats = index.stats()
+        index.close()
+    text_bytes = sum(len(text.encode("utf-8")) for _, _, paragraphs in corpus for text in paragraphs)
+    return {'scenario': 'search-index', 'articles': stats['docs'], 'terms': stats['terms'],
+            'index_bytes': stats['bytes'], 'text_bytes': text_bytes, 'articles_per_second': len(corpus) / build_seconds,
+            'query_p50_seconds': percentile(timings, 50), 'query_p95_seconds': percentile(timings, 95),
+            'queries': len(queries), 'found': found,
+            'unchanged_add_seconds': unchanged_seconds, 'update_seconds': update_seconds}
+
+
+def _legacy_paragraph_filter(texts):
+    """Прежний встроенный фильтр параграфов навигатора (для сравнения с правилами)"""
+    return [text for text in texts
+            if text and len(text) > 20 and not text.startswith("↑") and
+            "edit" not in text.lower() and "source" not in text.lower()]
+
+
+def bench_rules(args):
+    """Правила извлечения: скорость пакетного отбора параграфов против прежнего фильтра
+    и поиск hatnote по набору классов в любом порядке"""
+    rng = random.Random(args.seed)
+    rules = rules_for("https://ru.wikipedia.org")
+    texts = []
+    for _, _, paragraphs in _text_corpus(args.articles, words=30, seed=args.seed):
+        texts.extend(paragraphs)
+        # Служебные параграфы: сноски, ссылки правки, слишком короткие
+        texts.append(rng.choice(("↑ Примечание к разделу статьи о городе",
+                                 "Раздел истории [edit source] страны и народа", "См. также")))
+    text_bytes = sum(len(text.encode("utf-8")) for text in texts)
+
+    results = {}
+    for name, check in (('legacy', _legacy_paragraph_filter), ('rules', rules.filter_paragraphs)):
+        timings = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            kept = check(texts)
+            timings.append(time.perf_counter() - started)
+        seconds = min(timings)
+        results[name] = {'seconds': seconds, 'kept': len(kept),
+                         'paragraphs_per_second': len(texts) / seconds,
+                         'mb_per_second': text_bytes / seconds / 1e6}
+    identical = rules.filter_paragraphs(texts) == _legacy_paragraph_filter(texts)
+
+    # Прежняя проверка сравнивала атрибут class целиком и пропускала блоки с другим порядком классов
+    classes = ["hatnote", "navigation-not-searchable", "ts-main"]
+    attributes = [" ".join(rng.sample(classes, len(classes))) for _ in range(1000)]
+    attributes += ["mw-parser-output", "thumb tright", "hatnote navigation-not-searchable"] * 1000
+    hatnotes = {
+        'legacy': sum(attr == "hatnote navigation-not-searchable ts-main" for attr in attributes),
+        'rules': sum(rules.is_hatnote(attr) for attr in attributes),
+        'expected': 1000,
+    }
+    rate = results['rules']['paragraphs_per_second']
+    return {'scenario': 'rules', 'paragraphs': len(texts), 'text_bytes': text_bytes,
+            'mean_paragraph_chars': sum(map(len, texts)) / len(texts),
+            'identical': identical, 'speedup': results['legacy']['seconds'] / results['rules']['seconds'],
+            'target_paragraphs_per_second': RULES_TARGET_PARAGRAPHS_PER_SECOND,
+            'meets_target': rate >= RULES_TARGET_PARAGRAPHS_PER_SECOND,
+            # Доля требуемой скорости, которой не хватает (0 — цель достигнута)
+            'shortfall': max(0.0, 1 - rate / RULES_TARGET_PARAGRAPHS_PER_SECOND),
+            'results': results, 'hatnotes': hatnotes}
+
+
+class SlowWriter:
+    """Запись с задержкой на порцию: медленный потребитель для проверки ожидания обхода"""
+
+    def __init__(self, writer, delay):
+        self.writer = writer
+        self.delay = delay
+
+    def write(self, records):
+        time.sleep(self.delay)
+        return self.writer.write(records)
+
+    def close(self):
+        return self.writer.close()
+
+
+def bench_export(args):
+    """Выгрузка обхода синтетического графа в JSON Lines и Parquet с пределом памяти очереди"""
+    graph = SyntheticGraph(pages=args.graph_pages, fanout=args.fanout, paragraphs=40)
+    max_bytes = int(args.export_memory * 1024 * 1024)
+    formats = ["jsonl"] + (["parquet"] if pyarrow is not None else [])
+    results = {}
+    with standin_for(args, graph=graph) as standin, tempfile.TemporaryDirectory() as tmp:
+        def navigator_factory():
+            return WikipediaNavigator(base_url=standin.base_url, backend='http',
+                                      rate_limiter=UNLIMITED, verbose=False)
+
+        for fmt in formats:
+            path = os.path.join(tmp, f"export.{fmt}")
+            writer = open_writer(path, fmt)
+            if args.write_delay:
+                writer = SlowWriter(writer, args.write_delay)
+            export = ExportPipeline(writer, max_bytes=max_bytes, batch_size=100)
+            crawler = HatnoteCrawler(navigator_factory, depth=args.depth, workers=args.workers)
+            started = time.perf_counter()
+            crawler.crawl([graph.title(0)], export.submit)
+            export.close()
+            elapsed = time.perf_counter() - started
+            stats = export.stats()
+            if fmt == "jsonl":
+                with open(path, encoding="utf-8") as f:
+                    stored = sum(1 for _ in f)
+            else:
+                stored = sum(pyarrow.parquet.ParquetFile(os.path.join(path, name)).metadata.num_rows
+                             for name in os.listdir(path) if name.endswith(".parquet"))
+            results[fmt] = {
+                'pages': crawler.pages, 'stored': stored, 'seconds': elapsed,
+                'articles_per_second': stats['articles'] / elapsed if elapsed else None,
+                'mb_per_second': stats['bytes'] / elapsed / 1e6 if elapsed else None,
+                'bytes': stats['bytes'], 'peak_queued_bytes': stats['peak_queued_bytes'],
+                'blocked_seconds': stats['blocked_seconds'],
+            }
+    return {'scenario': 'export', 'graph_pages': graph.pages, 'max_queued_bytes': max_bytes,
+            'write_delay': args.write_delay, 'peak_rss_bytes': peak_rss_bytes(),
+            'results': results}
+
+
+SCENARIOS = {
+    'related-links': bench_related_links,
+    'paragraphs': bench_paragraphs,
+    'backends': bench_backends,
+    'pool': bench_pool,
+    'driver-recovery': bench_driver_recovery,
+    'crawl': bench_crawl,
+    'prefetch': bench_prefetch,
+    'title-index': bench_title_index,
+    'memory': bench_memory,
+    'suite': bench_suite,
+    'browser-profile': bench_browser_profile,
+    'bulk': bench_bulk,
+    'recrawl': bench_recrawl,
+    'search-index': bench_search_index,
+    'export': bench_export,
+    'rules': bench_rules,
+}
+
+
+def main():
+    """Разбор аргументов и запуск сценария"""
+    parser = argparse.ArgumentParser(description="Бенчмарки Wikipedia Navigator")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--page-dir", help="каталог с сохранёнными статьями (<Заголовок>.html)")
+    parser.add_argument("--title", default="Большая статья", help="заголовок статьи на стенде")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--graph-pages", type=int, default=5000, help="статей в синтетическом графе")
+    parser.add_argument("--fanout", type=int, default=4, help="основных статей на странице графа")
+    parser.add_argument("--depth", type=int, default=4, help="глубина обхода")
+    parser.add_argument("--workers", type=int, default=8, help="параллельных навигаторов")
+    parser.add_argument("--read-time", type=float, default=0.5, help="время чтения статьи, секунд")
+    parser.add_argument("--titles", type=int, default=1000000, help="заголовков в индексе")
+    parser.add_argument("--articles", type=int, default=2000,
+                        help="статей в корпусе полнотекстового индекса")
+    parser.add_argument("--backend", choices=("selenium", "http"), default="selenium",
+                        help="источник страниц для сценария suite")
+    parser.add_argument("--query", action="append", help="поисковый запрос сценария suite (можно несколько)")
+    parser.add_argument("--max-queries", type=int, default=20,
+                        help="сколько сохранённых статей и поисков брать из --page-dir")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа стенда, секунд")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, секунд")
+    parser.add_argument("--seed", type=int, default=0, help="seed случайных задержек стенда")
+    parser.add_argument("--base-url", help="адрес Википедии для сценария browser-profile "
+                        "(по умолчанию — стенд)")
+    parser.add_argument("--changed-fraction", type=float, default=0.1,
+                        help="доля статей, изменённых перед повторным обходом")
+    parser.add_argument("--export-memory", type=float, default=4,
+                        help="предел памяти очереди выгрузки, МБ")
+    parser.add_argument("--write-delay", type=float, default=0.0,
+                        help="задержка записи порции выгрузки, секунд (медленный потребитель)")
+    parser.add_argument("--kill", choices=("driver", "browser"), default="driver",
+                        help="что завершать в сценарии driver-recovery: geckodriver с Firefox "
+                        "или только Firefox")
+    parser.add_argument("--output", help="файл отчёта JSON (по умолчанию — стандартный вывод)")
+    args = parser.parse_args()
+
+    report = SCENARIOS[args.scenario](args)
+    report['meta'] = run_metadata(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,52 +7,208 @@
 """
 
 import os
+import sys
 import time
-import random
+import shutil
+import argparse
 import textwrap
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.firefox.options import Options
+from urllib.parse import urlsplit
 from selenium.common.exceptions import (
     TimeoutException, 
     NoSuchElementException, 
     WebDriverException
 )
 
+from wiki_backends import (
+    BACKENDS, LEAN_READY_STATES, ArticleBackend, BackendError, HttpBackend, SeleniumBackend,
+    WaitPolicy, article_url
+)
+from wiki_cache import CACHE_FIELDS, ArticleCache, canonical_url
+from wiki_prefetch import AsyncPrefetcher
+from rate_limiter import RateLimiter, shared_rate_limiter
+from title_index import TitleIndex
+from search_index import SearchIndex
+from extraction_rules import load_rules, rules_for
+from article_model import Link, ParagraphBuffer, compact_links, compact_paragraphs
+from tracing import Tracer, traced
+
+
+# Адрес Википедии (можно подменить локальным стендом для бенчмарков)
+WIKI_BASE_URL = "https://ru.wikipedia.org"
+
+# Сколько параграфов читать первой порцией при потоковом показе
+PARAGRAPH_STREAM_FIRST = 3
+
+# Символы, которые не могут встречаться в заголовке статьи
+TITLE_FORBIDDEN_CHARS = "#<>[]|{}"
+
+# Очистка экрана и перевод курсора в начало escape-последовательностями ANSI
+ANSI_CLEAR = "\033[2J\033[H"
+
+# Поддерживает ли консоль ANSI (определяется при первой очистке экрана)
+_ansi_supported = None
+
+
+def ansi_supported():
+    """Поддержка ANSI в консоли; в Windows 10+ включается режим виртуального терминала"""
+    global _ansi_supported
+    if _ansi_supported is None:
+        if not sys.stdout.isatty():
+            _ansi_supported = False
+        elif os.name != 'nt':
+            _ansi_supported = True
+        else:
+            try:
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+                mode = ctypes.c_uint32()
+                kernel32.GetConsoleMode(handle, ctypes.byref(mode))
+                # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+                _ansi_supported = bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+            except Exception:
+                _ansi_supported = False
+    return _ansi_supported
+
+
+class ParagraphPager:
+    """Кадры листания параграфов: заголовок и переносы строк считаются один раз на ширину терминала"""
+    
+    def __init__(self, title, wrap):
+        """wrap(text, width) — функция переноса строк (WikipediaNavigator.format_text)"""
+        self.title = title
+        self.wrap = wrap
+        self._headers = {}
+        self._wrapped = {}
+    
+    def width(self):
+        """Ширина кадра по текущей ширине терминала (не больше 80 символов)"""
+        columns = shutil.get_terminal_size((80, 24)).columns
+        return max(40, min(80, columns))
+    
+    def header(self, width):
+        """Рамка с заголовком статьи"""
+        if width not in self._headers:
+            inner = width - 2
+            self._headers[width] = (
+                f"╔{'═' * inner}╗\n"
+                f"║ {self.title[:inner - 2]:^{inner - 2}} ║\n"
+                f"╚{'═' * inner}╝\n"
+            )
+        return self._headers[width]
+    
+    def paragraph(self, index, text, width):
+        """Параграф с переносами строк; переносится только при первом показе"""
+        key = (index, width)
+        if key not in self._wrapped:
+            self._wrapped[key] = self.wrap(text, width - 2)
+        return self._wrapped[key]
+    
+    def render(self, index, text, total):
+        """Кадр с параграфом index целиком одной строкой"""
+        width = self.width()
+        return (
+            f"{self.header(width)}\n"
+            f"📄 Параграф {index + 1}/{total}:\n"
+            f"{'─' * width}\n"
+            f"{self.paragraph(index, text, width)}\n"
+            f"{'─' * width}\n\n"
+            "Навигация: [Enter] - следующий, [2] - назад, [3] - меню, [4] - выход\n"
+        )
+
 
 class WikipediaNavigator:
     """Основной класс для навигации по Википедии с возможностью перехода по основным статьям"""
     
-    def __init__(self):
-        """Инициализация драйвера Firefox в headless режиме"""
+    def __init__(self, base_url=WIKI_BASE_URL, backend="selenium", fallback=True, cache=None,
+                 wait_policy=None, driver_pool=None, rate_limiter=None, verbose=True,
+                 prefetch_workers=0, title_index=None, tracer=None, lean_browser=False,
+                 profile_dir=None, search_index=None, rules=None, standby_browser=False):
+        """Инициализация источника страниц: headless Firefox или HTTP без браузера"""
+        self.base_url = base_url.rstrip("/")
+        # При сбое HTTP-режима переключаемся на Firefox
+        self.fallback = fallback
+        # Дисковый кэш статей (ArticleCache) или None
+        self.cache = cache
+        # Экономный профиль Firefox и постоянный каталог профиля
+        self.lean_browser = lean_browser
+        self.profile_dir = profile_dir
+        # Запасной браузер, запущенный заранее, для быстрой замены упавшего
+        self.standby_browser = standby_browser
+        # Параметры ожидания готовности страниц в браузере
+        # (с eager-загрузкой экономного профиля достаточно разобранного HTML)
+        self.wait_policy = wait_policy or WaitPolicy(
+            ready_states=LEAN_READY_STATES if lean_browser else ("complete",))
+        # Пул драйверов (DriverPool): браузер берётся в аренду вместо запуска нового
+        self.driver_pool = driver_pool
+        # Ограничитель частоты запросов, по умолчанию общий для всех навигаторов процесса
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        # Вывод сообщений о ходе поиска и разбора (отключается в пакетном режиме)
+        self.verbose = verbose
+        # Интервалы операций и запросов к драйверу (Tracer), общий для источников страниц
+        self.tracer = tracer or Tracer()
+        # Индекс заголовков (TitleIndex): поиск статьи без формы поиска
+        self.title_index = title_index
+        # Полнотекстовый индекс прочитанных статей (SearchIndex) для поиска без сети
+        self.search_index = search_index
+        # Правила отбора параграфов и ссылок «Основная статья» (extraction_rules.RuleSet),
+        # по умолчанию — для языкового раздела base_url
+        self.rules = rules or rules_for(self.base_url)
+        # Фоновая предзагрузка основных статей и результатов поиска (0 — выключена)
+        self.prefetcher = None
+        if prefetch_workers:
+            self.prefetcher = AsyncPrefetcher(self.base_url, self._record_from_page,
+                                              workers=prefetch_workers,
+                                              rate_limiter=self.rate_limiter,
+                                              tracer=self.tracer, rules=self.rules)
         try:
-            # Настройка Firefox в headless режиме
-            firefox_options = Options()
-            firefox_options.add_argument("--headless")
-            firefox_options.add_argument("--width=1920")
-            firefox_options.add_argument("--height=1080")
-            
-            # Инициализация драйвера Firefox
-            self.driver = webdriver.Firefox(options=firefox_options)
+            if isinstance(backend, ArticleBackend):
+                self.backend = backend
+            else:
+                self.backend = self._create_backend(backend)
             
             # Инициализация переменных
             self.current_paragraph = 0
             self.paragraphs = []
+            self._paragraph_stream = None
             self.related_links = []
-            self.wait = WebDriverWait(self.driver, 15)
-            self.last_request_time = 0
+            self._flash_messages = []
             
-            print("✓ Драйвер Firefox успешно инициализирован")
+            # Текущая статья; _backend_on_page — открыта ли она в источнике страниц
+            # (статья из кэша показывается без загрузки страницы)
+            self.current_url = None
+            self.current_title = None
+            self._backend_on_page = False
+            # Запись текущей статьи, полученная предзагрузкой
+            self._current_record = None
+            # HTTP-источник для проверки устаревших записей кэша условными запросами
+            self._revalidator = None
             
         except Exception as e:
             print(f"❌ Ошибка инициализации драйвера: {e}")
             raise
     
     def clear_screen(self):
-        """Очистка экрана консоли"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        """Очистка экрана консоли и вывод отложенных сообщений"""
+        if ansi_supported():
+            # Без запуска внешней команды cls/clear
+            sys.stdout.write(ANSI_CLEAR)
+            sys.stdout.flush()
+        else:
+            os.system('cls' if os.name == 'nt' else 'clear')
+        for message in self._flash_messages:
+            print(message)
+        self._flash_messages = []
+    
+    def flash(self, message):
+        """Сообщение, которое будет показано после следующей очистки экрана (вместо паузы)"""
+        print(message)
+        self._flash_messages.append(message)
+    
+    def log(self, message):
+        """Сообщение о ходе работы (только в подробном режиме)"""
+        if self.verbose:
+            print(message)
     
     def wait_any_key(self, prompt="Нажмите любую клавишу для продолжения..."):
         """Ожидание нажатия любой клавиши (Windows), либо Enter на других ОС"""
@@ -64,31 +220,231 @@ class WikipediaNavigator:
         except ImportError:
             input(f"{prompt} (Enter)")
     
-    def rate_limit(self, min_delay=2, max_delay=4):
-        """Ограничение скорости запросов с случайными вариациями"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < min_delay:
-            delay = random.uniform(min_delay, max_delay)
-            print(f"⏳ Ожидание {delay:.1f} секунд...")
-            time.sleep(delay)
-        
-        self.last_request_time = time.time()
+    def rate_limit(self, url=None):
+        """Ограничение скорости запросов: общий token bucket с бюджетом по хостам"""
+        host = urlsplit(url or self.base_url).netloc
+        delay = self.rate_limiter.reserve(host)
+        if delay > 0:
+            if delay >= 0.5:
+                self.log(f"⏳ Ожидание {delay:.1f} секунд...")
+            with self.tracer.span("rate_limit.sleep", host=host, delay=delay):
+                time.sleep(delay)
+        return delay
+    
+    def _create_backend(self, name):
+        """Создание источника страниц по имени"""
+        if name == SeleniumBackend.name:
+            return SeleniumBackend(wait_policy=self.wait_policy, pool=self.driver_pool,
+                                   verbose=self.verbose, tracer=self.tracer,
+                                   lean=self.lean_browser, profile_dir=self.profile_dir,
+                                   rules=self.rules, standby=self.standby_browser)
+        return BACKENDS[name](verbose=self.verbose, tracer=self.tracer, rules=self.rules)
+    
+    def _backend_call(self, method, *args, **kwargs):
+        """Вызов метода источника страниц с переходом на Firefox при сбое HTTP-режима
+        и перезапуском браузера при потере сессии"""
+        try:
+            return getattr(self.backend, method)(*args, **kwargs)
+        except BackendError as e:
+            if not self.fallback or isinstance(self.backend, SeleniumBackend):
+                raise
+            self.log(f"⚠️ HTTP-режим недоступен ({e}), переключаемся на Firefox")
+            url = self.backend.current_url()
+            self.backend.close()
+            self.backend = self._create_backend(SeleniumBackend.name)
+            # Для чтения текущей страницы сначала открываем её в браузере
+            if url and method not in ("open", "search"):
+                self.backend.open(url)
+            return getattr(self.backend, method)(*args, **kwargs)
+        except Exception as e:
+            if not self._recover_browser(e, method):
+                raise
+            return getattr(self.backend, method)(*args, **kwargs)
+    
+    def _recover_browser(self, error, method):
+        """Перезапуск упавшего браузера: открытая статья загружается заново, позиция
+        чтения (current_paragraph) и прочитанные параграфы сохраняются; True — можно
+        повторить операцию"""
+        session_lost = getattr(self.backend, "session_lost", None)
+        if session_lost is None or not session_lost(error):
+            return False
+        self.log(f"⚠️ Сессия браузера потеряна ({type(error).__name__}), перезапуск...")
+        # Переход и поиск повторяются целиком, остальное читается с той же страницы
+        seconds = self.backend.recover(reopen=method not in ("open", "search"))
+        self.log(f"✅ Браузер перезапущен за {seconds:.1f} с, "
+                 f"позиция: параграф {self.current_paragraph + 1}")
+        return True
     
     def wait_for_page_load(self):
         """Ожидание загрузки страницы"""
+        return self._backend_call("wait_for_page_load")
+    
+    def wait_report(self):
+        """Фактическое время ожиданий источника страниц по видам"""
+        return {kind: dict(stats) for kind, stats in self.backend.wait_stats.items()}
+    
+    def _set_current_article(self, url, title, loaded, record=None):
+        """Запоминание текущей статьи и запуск предзагрузки её основных статей"""
+        self.current_url = canonical_url(url)
+        self.current_title = title
+        self._backend_on_page = loaded
+        self._current_record = record
+        if self.prefetcher is not None:
+            self.prefetcher.prefetch_related(self.current_url, record)
+    
+    def _store_record(self, record):
+        """Сохранение полной записи статьи в кэш"""
+        if self.cache is not None:
+            self.cache.update(record['url'], **{field: record[field] for field in CACHE_FIELDS
+                                                if field in record})
+    
+    def _use_record(self, record, alias):
+        """Текущая статья из готовой записи (предзагрузка) с сохранением в кэш"""
+        self._set_current_article(record['url'], record['title'], False, record)
+        if self.cache is not None:
+            self.cache.add_alias(alias, record['url'])
+            self._store_record(record)
+    
+    def _after_backend_navigation(self, alias):
+        """Текущая статья по странице, открытой в источнике, с сохранением в кэш"""
+        url = self._backend_call("current_url")
+        title = self._backend_call("title")
+        page = self.backend.parsed_page()
+        # Разобранная HTTP-страница сразу даёт полную запись статьи с хешами разделов
+        record = self._record_from_page(page) if page is not None else None
+        self._set_current_article(url, title, True, record)
+        if self.cache is not None:
+            self.cache.add_alias(alias, url)
+            if record is not None:
+                self._store_record(record)
+            else:
+                self.cache.update(url, title=title, **self._outdated_fields(url))
+    
+    def _outdated_fields(self, url):
+        """Поля кэша, которые нужно сбросить: сохранённое содержимое статьи снято
+        с другой правки, чем открытая страница (например, статья открыта по новому
+        перенаправлению, пока запись ещё свежая)
+
+        Ревизию читаем только при сохранённом содержимом: лишний запрос к браузеру
+        после каждого перехода не нужен.
+        """
+        stored = self.cache.get_stale(url)
+        if not stored or all(stored.get(field) is None for field in ("paragraphs", "related_links")):
+            return {}
+        validators = self._backend_call("validators")
+        if all(stored.get(key) == value for key, value in validators.items()):
+            return {}
+        return dict(validators, paragraphs=None, related_links=None, sections=None)
+    
+    def _revalidate(self, url):
+        """Устаревшая запись кэша: условный запрос и повторный разбор только изменившихся разделов
+
+        Проверка всегда идёт по HTTP. С источником selenium изменившаяся статья разбирается
+        HttpBackend и показывается из этого разбора: браузер открывает страницу только
+        за данными, которых в записи нет (_ensure_backend_page).
+        Возвращает запись статьи (прежнюю, если статья не изменилась) или None.
+        """
+        entry = self.cache.get_stale(url) if self.cache is not None else None
+        if not entry or entry.get('paragraphs') is None or entry.get('related_links') is None:
+            return None
+        if sum(section[1] for section in entry.get('sections') or ()) != len(entry['paragraphs']):
+            # Параграфы сохранены другим источником — с разделами их не сопоставить
+            entry['sections'] = []
+        if isinstance(self.backend, HttpBackend):
+            checker = self.backend
+        else:
+            if self._revalidator is None:
+                self._revalidator = HttpBackend(verbose=False, tracer=self.tracer, rules=self.rules)
+            checker = self._revalidator
+        self.rate_limit(entry['url'])
+        with self.tracer.span("revalidate", url=entry['url']) as attrs:
+            try:
+                status, validators, page = checker.fetch_if_changed(entry['url'], entry)
+            except BackendError as e:
+                self.log(f"⚠️ Не удалось проверить статью ({e})")
+                return None
+            if page is None:
+                attrs['result'] = 'unchanged'
+                self.cache.mark_fresh(entry['url'], **validators)
+                return entry
+            if status != 200 or page['title'] is None or page['no_article']:
+                attrs['result'] = 'missing'
+                return None
+            record = self._record_from_page(page, previous=entry)
+            record.update(validators)
+            if checker is not self.backend:
+                self.log("ℹ️ Статья изменилась: содержимое разобрано по HTTP, без браузера")
+            attrs['result'] = 'changed'
+            attrs['sections_reused'] = sum(section['reused'] for section in page['sections'])
+            attrs['sections'] = len(page['sections'])
+            self._store_record(record)
+            return record
+    
+    def _ensure_backend_page(self):
+        """Загрузка текущей статьи в источник страниц, если она была показана из кэша"""
+        if self.current_url and not self._backend_on_page:
+            self.rate_limit(self.current_url)
+            if not self._backend_call("open", self.current_url):
+                raise NoSuchElementException(f"Не удалось открыть {self.current_url}")
+            self._backend_on_page = True
+    
+    def _cached(self, *fields):
+        """Свежая запись текущей статьи (предзагрузка или кэш) с полями fields или None"""
+        if not self.current_url:
+            return None
+        record = self._current_record
+        if record is None and self.prefetcher is not None:
+            record = self._current_record = self.prefetcher.get(self.current_url)
+        if record is not None and all(record.get(field) is not None for field in fields):
+            return record
+        if self.cache is None:
+            return None
+        return self.cache.get(self.current_url, fields)
+    
+    def _index_paragraphs(self, paragraphs):
+        """Добавление параграфов текущей статьи в полнотекстовый индекс (без изменений — пропуск)"""
+        if self.search_index is None or not self.current_url or not paragraphs:
+            return
         try:
-            # Ждем загрузки основного контента
-            self.wait.until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            # Дополнительная задержка для стабильности
-            time.sleep(1)
-            return True
-        except TimeoutException:
-            print("⚠️ Превышено время ожидания загрузки страницы")
+            with self.tracer.span("search_index.add"):
+                self.search_index.add_article(self.current_url, self.current_title, paragraphs)
+        except Exception as e:
+            self.log(f"⚠️ Не удалось обновить индекс поиска: {e}")
+    
+    def _remember(self, **fields):
+        """Сохранение извлечённых данных текущей статьи в кэш вместе с правкой страницы,
+        с которой они сняты"""
+        if self.cache is not None and self.current_url:
+            self.cache.update(self.current_url, **fields, **self._backend_call("validators"))
+    
+    @traced("open_article")
+    def open_article(self, url):
+        """Переход к статье по адресу (без загрузки, если в кэше есть свежая запись)"""
+        alias = f"url:{canonical_url(url)}"
+        if self.cache is not None:
+            cached_url = self.cache.resolve(alias) or url
+            entry = self.cache.get(cached_url)
+            if entry:
+                self._set_current_article(entry['url'], entry['title'], False, entry)
+                return True
+            # Устаревшая запись: проверяем, изменилась ли статья, вместо полной загрузки
+            record = self._revalidate(cached_url)
+            if record:
+                self._set_current_article(record['url'], record['title'], False, record)
+                self.cache.add_alias(alias, record['url'])
+                return True
+        if self.prefetcher is not None:
+            # Статья могла быть загружена в фоне, пока пользователь читал текущую
+            record = self.prefetcher.get(url, timeout=self.wait_policy.timeout)
+            if record:
+                self._use_record(record, alias)
+                return True
+        
+        self.rate_limit(url)
+        if not self._backend_call("open", url):
             return False
+        self._after_backend_navigation(alias)
+        return True
     
     def format_text(self, text, width=80):
         """Форматирование текста для консоли"""
@@ -102,171 +458,249 @@ class WikipediaNavigator:
         formatted = textwrap.fill(text, width=width)
         return formatted
     
+    def _resolve_title(self, query):
+        """Заголовок статьи для прямого перехода: по индексу заголовков или сам запрос"""
+        if self.title_index is not None:
+            title = self.title_index.resolve(query)
+            if title:
+                return title
+        title = " ".join(query.split())
+        # Символы, недопустимые в заголовках, — сразу к форме поиска
+        if not title or any(char in title for char in TITLE_FORBIDDEN_CHARS):
+            return None
+        return title
+    
+    @traced("search")
     def search_article(self, query):
-        """Поиск статьи по запросу"""
+        """Поиск статьи по запросу: индекс заголовков, прямой переход, затем форма поиска"""
         try:
-            self.rate_limit()
-            
-            print(f"🔍 Поиск статьи: {query}")
-            
-            # Переход на главную страницу Википедии
-            self.driver.get("https://ru.wikipedia.org/wiki/")
+            alias = f"search:{query.casefold()}"
+            if self.cache is not None:
+                url = self.cache.resolve(alias)
+                entry = (self.cache.get(url) or self._revalidate(url)) if url else None
+                if entry:
+                    self._set_current_article(entry['url'], entry['title'], False, entry)
+                    self.log(f"✅ Найдена статья (из кэша): {self.current_title}")
+                    return True
             
-            # Поиск по запросу
-            search_box = self.wait.until(
-                EC.presence_of_element_located((By.NAME, "search"))
-            )
-            search_box.clear()
-            search_box.send_keys(query)
-            search_box.submit()
+            # Прямой переход на /wiki/<Заголовок> — одна загрузка страницы вместо двух-трёх
+            title = self._resolve_title(query)
+            if title and self.open_article(article_url(self.base_url, title)):
+                if self.cache is not None:
+                    self.cache.add_alias(alias, self.current_url)
+                self.log(f"✅ Найдена статья: {self.current_title}")
+                return True
+            if self.prefetcher is not None:
+                # Асинхронный поиск сразу до страницы первого результата
+                record = self.prefetcher.search(query, timeout=self.wait_policy.timeout)
+                if record:
+                    self._use_record(record, alias)
+                    self.log(f"✅ Найдена статья: {self.current_title}")
+                    return True
             
-            # Ожидание загрузки результатов
-            if not self.wait_for_page_load():
-                return False
+            self.rate_limit()
             
-            # Проверка, что мы на странице статьи
-            try:
-                # Ищем заголовок статьи
-                title = self.driver.find_element(By.ID, "firstHeading")
-                if title:
-                    print(f"✅ Найдена статья: {title.text}")
-                    return True
-            except NoSuchElementException:
-                pass
+            self.log(f"🔍 Поиск статьи: {query}")
             
-            # Если не нашли заголовок, возможно это страница результатов поиска
-            try:
-                # Проверяем, есть ли результаты поиска
-                search_results = self.driver.find_elements(By.CSS_SELECTOR, ".mw-search-result-heading a")
-                if search_results:
-                    print(f"📋 Найдено результатов поиска: {len(search_results)}")
-                    # Берем первый результат
-                    first_result = search_results[0]
-                    print(f"🔗 Переходим к первому результату: {first_result.text}")
-                    first_result.click()
-                    
-                    if self.wait_for_page_load():
-                        title = self.driver.find_element(By.ID, "firstHeading")
-                        print(f"✅ Перешли к статье: {title.text}")
-                        return True
-            except Exception as e:
-                print(f"⚠️ Ошибка при переходе к результату поиска: {e}")
+            if self._backend_call("search", query, self.base_url):
+                self._after_backend_navigation(alias)
+                self.log(f"✅ Найдена статья: {self.current_title}")
+                return True
             
-            print("❌ Статья не найдена")
+            self.log("❌ Статья не найдена")
             return False
             
-        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
-            print(f"❌ Ошибка при поиске: {e}")
+        except (TimeoutException, NoSuchElementException, WebDriverException, BackendError) as e:
+            self.log(f"❌ Ошибка при поиске: {e}")
             return False
     
-    def get_article_paragraphs(self):
+    @traced("extract.paragraph_texts")
+    def _read_paragraph_texts(self, start=0, end=None, batched=True):
+        """Текст параграфов #mw-content-text из диапазона [start, end) одним запросом"""
+        total, texts = self._backend_call("paragraph_texts", start, end, batched=batched)
+        return total, [text.strip() for text in texts]
+    
+    def iter_article_paragraphs(self, first_n=PARAGRAPH_STREAM_FIRST):
+        """Потоковое получение параграфов: сначала первые first_n, затем остальные одним запросом"""
+        cached = self._cached("paragraphs")
+        if cached:
+            self._index_paragraphs(cached['paragraphs'])
+            yield from cached['paragraphs']
+            return
+        
+        # Готовности страницы ждём только тогда, когда параграфы читаются из неё
+        self._wait_backend_page()
+        paragraphs = ParagraphBuffer()
+        total, texts = self._read_paragraph_texts(0, first_n)
+        for text in self.rules.filter_paragraphs(texts):
+            paragraphs.append(text)
+            yield text
+        if total > first_n:
+            _, texts = self._read_paragraph_texts(first_n)
+            for text in self.rules.filter_paragraphs(texts):
+                paragraphs.append(text)
+                yield text
+        self._remember(paragraphs=paragraphs)
+        self._index_paragraphs(paragraphs)
+    
+    @traced("extract.paragraphs")
+    def get_article_paragraphs(self, batched=True):
         """Получение параграфов текущей статьи"""
+        # Параграфы прежней статьи не должны остаться при ошибке извлечения
+        self.paragraphs = ParagraphBuffer()
         try:
-            # Проверяем, что страница загружена
-            if not self.wait_for_page_load():
-                print("❌ Страница не загружена")
-                return False
-            
-            # Ищем основной контент статьи
-            content = self.driver.find_element(By.ID, "mw-content-text")
-            
-            # Получаем все параграфы
-            paragraphs = content.find_elements(By.TAG_NAME, "p")
-            
-            # Фильтруем пустые параграфы и параграфы с навигацией
-            filtered_paragraphs = []
-            for p in paragraphs:
-                text = p.text.strip()
-                if (text and 
-                    len(text) > 20 and 
-                    not text.startswith("↑") and
-                    not text.startswith("↑↑") and
-                    "edit" not in text.lower() and
-                    "source" not in text.lower()):
-                    filtered_paragraphs.append(text)
-            
-            self.paragraphs = filtered_paragraphs
-            return len(filtered_paragraphs) > 0
+            self._extract_paragraphs(batched)
+            return len(self.paragraphs) > 0
             
+        except TimeoutException:
+            self.log("❌ Страница не загружена")
+            return False
         except NoSuchElementException:
-            print("❌ Не удалось найти контент статьи")
+            self.log("❌ Не удалось найти контент статьи")
             return False
         except Exception as e:
-            print(f"❌ Ошибка при получении параграфов: {e}")
+            self.log(f"❌ Ошибка при получении параграфов: {e}")
             return False
     
-    def get_related_links(self):
+    def _wait_backend_page(self):
+        """Загрузка текущей статьи в источник страниц и ожидание её готовности"""
+        self._ensure_backend_page()
+        if not self.wait_for_page_load():
+            raise TimeoutException(f"Страница не загружена: {self.current_url}")
+    
+    def _extract_paragraphs(self, batched=True):
+        """Параграфы текущей статьи в self.paragraphs (ошибки извлечения не перехватываются)"""
+        cached = self._cached("paragraphs")
+        if cached:
+            self.paragraphs = compact_paragraphs(cached['paragraphs'])
+            self._index_paragraphs(self.paragraphs)
+            return
+        
+        self._wait_backend_page()
+        # Весь текст параграфов одним запросом (batched=False — по запросу
+        # к драйверу на каждый параграф), фильтрация на стороне Python
+        _, texts = self._read_paragraph_texts(batched=batched)
+        
+        self.paragraphs = ParagraphBuffer(self.rules.filter_paragraphs(texts))
+        self._remember(paragraphs=self.paragraphs)
+        self._index_paragraphs(self.paragraphs)
+    
+    def _record_from_page(self, page, previous=None):
+        """Запись статьи из разобранной HTTP-страницы с теми же фильтрами, что и у навигатора
+
+        previous — прежняя запись статьи: параграфы и hatnote неизменившихся разделов
+        (page['sections'] с reused=True) берутся из неё без повторного разбора.
+        """
+        known = {}
+        if previous is not None:
+            start = 0
+            for digest, count, hatnotes in previous.get('sections') or ():
+                known[digest] = (previous['paragraphs'][start:start + count], hatnotes)
+                start += count
+        
+        paragraphs = ParagraphBuffer()
+        raw_hatnotes = []
+        sections = []
+        for section in page['sections']:
+            if section['reused']:
+                texts, hatnotes = known[section['hash']]
+            else:
+                texts = self.rules.filter_paragraphs([text.strip() for text in section['paragraphs']])
+                hatnotes = [list(hatnote) for hatnote in section['hatnotes']]
+            for text in texts:
+                paragraphs.append(text)
+            raw_hatnotes.extend(hatnotes)
+            sections.append([section['hash'], len(texts), hatnotes])
+        return {
+            'title': page['title'],
+            'url': canonical_url(page['url']),
+            'paragraphs': paragraphs,
+            'related_links': self.rules.filter_links(raw_hatnotes, self.base_url),
+            'revision': page['revision'],
+            'etag': page.get('etag'),
+            'last_modified': page.get('last_modified'),
+            'sections': sections,
+        }
+    
+    @traced("extract.related_links")
+    def get_related_links(self, batched=True):
         """Получение основных статей из текущей страницы через hatnote элементы"""
+        # Ссылки прежней статьи не должны остаться при ошибке извлечения
+        self.related_links = []
         try:
-            # Проверяем, что страница загружена
-            if not self.wait_for_page_load():
-                print("❌ Страница не загружена")
-                return False
-            
-            # Ищем все div элементы на странице
-            elements = self.driver.find_elements(By.TAG_NAME, "div")
-            print(f"🔍 Найдено элементов на странице: {len(elements)}")
-            
-            # Фильтруем hatnote элементы (основные статьи)
-            hatnotes = []
-            for element in elements:
-                try:
-                    cl = element.get_attribute("class")
-                    if cl == "hatnote navigation-not-searchable ts-main":
-                        hatnotes.append(element)
-                except:
-                    continue
-            
-            print(f"📋 Найдено hatnote элементов (основных статей): {len(hatnotes)}")
-            
-            # Извлекаем ссылки из hatnote элементов
-            related_links = []
-            for hatnote in hatnotes:
-                try:
-                    # Ищем ссылку внутри hatnote
-                    link_element = hatnote.find_element(By.TAG_NAME, "a")
-                    href = link_element.get_attribute("href")
-                    text = hatnote.text.strip()
-                    
-                    # Проверяем, что это валидная ссылка на статью
-                    if (href and 
-                        href.startswith("https://ru.wikipedia.org/wiki/") and
-                        text and
-                        len(text) > 5 and
-                        not any(skip in href.lower() for skip in ["/edit", "/history", "/talk", "/special", "/user", "/file"])):
-                        
-                        # Очищаем текст от лишних символов
-                        clean_text = text.replace('\n', ' ').strip()
-                        if clean_text:
-                            related_links.append({
-                                'text': clean_text,
-                                'url': href
-                            })
-                            
-                except Exception as e:
-                    print(f"⚠️ Ошибка при обработке hatnote: {e}")
-                    continue
-            
-            # Убираем дубликаты
-            seen = set()
-            unique_links = []
-            for link in related_links:
-                if link['text'] not in seen:
-                    seen.add(link['text'])
-                    unique_links.append(link)
-            
-            self.related_links = unique_links  # Показываем все найденные без обрезки
-            print(f"✅ Обработано основных статей: {len(self.related_links)}")
-            
+            self._extract_related_links(batched)
             return len(self.related_links) > 0
             
+        except TimeoutException:
+            self.log("❌ Страница не загружена")
+            return False
         except Exception as e:
-            print(f"❌ Ошибка при поиске основных статей: {e}")
+            self.log(f"❌ Ошибка при поиске основных статей: {e}")
             return False
     
-    def display_paragraphs(self):
+    def _extract_related_links(self, batched=True):
+        """Основные статьи текущей страницы в self.related_links (ошибки не перехватываются)"""
+        cached = self._cached("related_links")
+        if cached:
+            self.related_links = compact_links(cached['related_links'])
+            self.log(f"✅ Основные статьи (кэш/предзагрузка): {len(self.related_links)}")
+            return
+        
+        self._wait_backend_page()
+        # Собираем hatnote элементы (основные статьи) одним запросом
+        # либо старым поэлементным обходом
+        count, raw = self._backend_call("hatnotes", batched=batched)
+        self.log(f"🔍 Найдено элементов на странице: {count}")
+        self.log(f"📋 Найдено hatnote элементов (основных статей): {len(raw)}")
+        
+        self.related_links = self.rules.filter_links(raw, self.base_url)  # Показываем все найденные без обрезки
+        self._remember(related_links=self.related_links)
+        self.log(f"✅ Обработано основных статей: {len(self.related_links)}")
+    
+    @traced("extract.paragraph_stream")
+    def _start_paragraph_stream(self):
+        """Запуск потокового чтения параграфов для display_paragraphs"""
+        self.paragraphs = ParagraphBuffer()
+        try:
+            # Статья из кэша или предзагрузки читается без ожидания страницы в браузере:
+            # там может быть ещё about:blank
+            self._paragraph_stream = self.iter_article_paragraphs()
+            try:
+                self.paragraphs.append(next(self._paragraph_stream))
+            except StopIteration:
+                self._paragraph_stream = None
+            return True
+        except TimeoutException:
+            print("❌ Страница не загружена")
+        except NoSuchElementException:
+            print("❌ Не удалось найти контент статьи")
+        except Exception as e:
+            print(f"❌ Ошибка при получении параграфов: {e}")
+        self._paragraph_stream = None
+        return False
+    
+    def _fill_paragraphs(self, index):
+        """Дочитывание параграфов из потока, пока не станет доступен параграф index"""
+        stream = self._paragraph_stream
+        while stream is not None and len(self.paragraphs) <= index:
+            try:
+                self.paragraphs.append(next(stream))
+            except StopIteration:
+                stream = self._paragraph_stream = None
+            except Exception as e:
+                print(f"❌ Ошибка при получении параграфов: {e}")
+                stream = self._paragraph_stream = None
+    
+    def display_paragraphs(self, stream=True):
         """Отображение параграфов с форматированием"""
-        if not self.get_article_paragraphs():
+        if stream:
+            # Первые параграфы показываем сразу, остальные дочитываем при листании
+            loaded = self._start_paragraph_stream()
+        else:
+            self._paragraph_stream = None
+            loaded = self.get_article_paragraphs()
+        
+        if not loaded:
             print("❌ Не удалось получить параграфы статьи")
             return
         
@@ -276,36 +710,27 @@ class WikipediaNavigator:
         
         self.current_paragraph = 0
         
+        # Заголовок статьи получаем один раз, а не на каждом кадре
+        try:
+            title = self.current_title or self._backend_call("title")
+        except:
+            title = "Заголовок не найден"
+        pager = ParagraphPager(title, self.format_text)
+        
         while True:
             self.clear_screen()
             
+            self._fill_paragraphs(self.current_paragraph)
             if self.current_paragraph >= len(self.paragraphs):
                 print("📖 Достигнут конец статьи")
                 break
             
-            # Получаем заголовок статьи
-            try:
-                title = self.driver.find_element(By.ID, "firstHeading").text
-            except:
-                title = "Заголовок не найден"
-            
-            # Отображаем текущий параграф
-            print("╔══════════════════════════════════════════════════════════════════════════════╗")
-            print(f"║ {title[:76]:^76} ║")
-            print("╚══════════════════════════════════════════════════════════════════════════════╝")
-            print()
-            
-            current_text = self.paragraphs[self.current_paragraph]
-            formatted_text = self.format_text(current_text, 78)
-            
-            print(f"📄 Параграф {self.current_paragraph + 1}/{len(self.paragraphs)}:")
-            print("─" * 80)
-            print(formatted_text)
-            print("─" * 80)
-            print()
+            # Пока поток не дочитан, общее число параграфов неизвестно
+            total = len(self.paragraphs) if self._paragraph_stream is None else f"{len(self.paragraphs)}+"
+            # Отображаем текущий параграф одним выводом
+            sys.stdout.write(pager.render(self.current_paragraph, self.paragraphs[self.current_paragraph], total))
+            sys.stdout.flush()
             
-            # Навигация
-            print("Навигация: [Enter] - следующий, [2] - назад, [3] - меню, [4] - выход")
             choice = input("Ваш выбор: ").strip()
             
             if choice == '4':
@@ -316,8 +741,7 @@ class WikipediaNavigator:
                 if self.current_paragraph > 0:
                     self.current_paragraph -= 1
                 else:
-                    print("⚠️ Вы уже в начале статьи")
-                    time.sleep(2)
+                    self.flash("⚠️ Вы уже в начале статьи")
             elif choice == '':  # Enter
                 self.current_paragraph += 1
             else:  # Любой другой ввод воспринимаем как следующий
@@ -340,7 +764,7 @@ class WikipediaNavigator:
             
             # Получаем заголовок текущей статьи
             try:
-                current_title = self.driver.find_element(By.ID, "firstHeading").text
+                current_title = self.current_title or self._backend_call("title")
             except:
                 current_title = "Текущая статья"
             
@@ -379,42 +803,84 @@ class WikipediaNavigator:
                 if current_page < total_pages - 1:
                     self._related_page_index = current_page + 1
                 else:
-                    print("⚠️ Это последняя страница")
-                    time.sleep(1)
+                    self.flash("⚠️ Это последняя страница")
             elif choice == 'н':
                 if current_page > 0:
                     self._related_page_index = current_page - 1
                 else:
-                    print("⚠️ Это первая страница")
-                    time.sleep(1)
+                    self.flash("⚠️ Это первая страница")
             elif choice.isdigit():
                 num = int(choice)
                 if 1 <= num <= (end - start):
                     selected_link = self.related_links[start + num - 1]
                     print(f"🔗 Переходим к статье: {selected_link['text']}")
                     try:
-                        self.rate_limit()
-                        self.driver.get(selected_link['url'])
-                        if self.wait_for_page_load():
-                            print(f"✅ Успешно перешли к статье: {selected_link['text']}")
+                        if self.open_article(selected_link['url']):
+                            self.flash(f"✅ Успешно перешли к статье: {selected_link['text']}")
                             # Сброс состояния для новой статьи
                             self.paragraphs = []
                             self.related_links = []
                             self.current_paragraph = 0
                             self._related_page_index = 0
-                            time.sleep(1.2)
                             return
                         else:
-                            print("❌ Не удалось загрузить страницу")
+                            self.flash("❌ Не удалось загрузить страницу")
                     except Exception as e:
-                        print(f"❌ Ошибка при переходе: {e}")
-                    time.sleep(1.2)
+                        self.flash(f"❌ Ошибка при переходе: {e}")
                 else:
-                    print("❌ Неверный номер на текущей странице")
-                    time.sleep(1)
+                    self.flash("❌ Неверный номер на текущей странице")
+            else:
+                self.flash("❌ Неверный ввод")
+    
+    def search_offline(self):
+        """Поиск по прочитанным статьям в локальном индексе (без сети и браузера)"""
+        if self.search_index is None:
+            self.flash("❌ Индекс поиска не подключён")
+            return
+        
+        while True:
+            query = input("\nСлова для поиска по прочитанным статьям (Enter - меню): ").strip()
+            if not query:
+                return
+            
+            started = time.perf_counter()
+            with self.tracer.span("search_index.query"):
+                results = self.search_index.search(query)
+            elapsed = time.perf_counter() - started
+            
+            self.clear_screen()
+            print(f"🗂 Поиск по прочитанным статьям: {query}")
+            print("─" * 80)
+            if not results:
+                print(f"❌ Ничего не найдено ({elapsed * 1000:.1f} мс)")
+                continue
+            for i, result in enumerate(results, start=1):
+                print(f"{i:2d}. {result['title']}")
+                print(textwrap.indent(self.format_text(result['snippet'], width=74), "    "))
+            print("─" * 80)
+            print(f"Найдено: {len(results)} за {elapsed * 1000:.1f} мс")
+            
+            choice = input("Введите номер статьи, Enter - новый поиск, 'м' - меню: ").strip().lower()
+            if choice == 'м':
+                return
+            if not choice:
+                continue
+            if choice.isdigit() and 1 <= int(choice) <= len(results):
+                selected = results[int(choice) - 1]
+                try:
+                    if self.open_article(selected['url']):
+                        self.flash(f"✅ Успешно перешли к статье: {selected['title']}")
+                        # Сброс состояния для новой статьи
+                        self.paragraphs = []
+                        self.related_links = []
+                        self.current_paragraph = 0
+                        self._related_page_index = 0
+                        return
+                    self.flash("❌ Не удалось загрузить страницу")
+                except Exception as e:
+                    self.flash(f"❌ Ошибка при переходе: {e}")
             else:
-                print("❌ Неверный ввод")
-                time.sleep(1)
+                self.flash("❌ Неверный номер")
     
     def navigate_menu(self):
         """Основная навигация по меню"""
@@ -454,7 +920,7 @@ class WikipediaNavigator:
             
             # Показываем текущую статью
             try:
-                title = self.driver.find_element(By.ID, "firstHeading").text
+                title = self.current_title or self._backend_call("title")
                 print(f"📖 Текущая статья: {title}")
             except:
                 print("📖 Текущая статья: Заголовок не найден")
@@ -464,7 +930,8 @@ class WikipediaNavigator:
             print("1. 📖 Листать параграфы текущей статьи")
             print("2. 🔗 Показать основные статьи и перейти к одной из них")
             print("3. 🔎 Поиск новой статьи")
-            print("4. 🚪 Выйти из программы")
+            print("4. 🗂 Поиск по прочитанным статьям (без сети)")
+            print("5. 🚪 Выйти из программы")
             
             choice = input("\nВыберите действие: ").strip()
             
@@ -492,28 +959,115 @@ class WikipediaNavigator:
                         print("❌ Статья не найдена. Попробуйте другой запрос.")
                         continue
             elif choice == '4':
+                self.search_offline()
+            elif choice == '5':
                 print("👋 До свидания!")
                 break
             else:
-                print("❌ Неверный выбор")
-                time.sleep(1)
+                self.flash("❌ Неверный выбор")
+    
+    def article_record(self):
+        """Текущая статья в виде словаря для пакетной выгрузки
+
+        None, если извлечь параграфы или основные статьи не удалось (или у статьи нет
+        параграфов): запись не должна содержать данные предыдущей статьи.
+        """
+        self.paragraphs = ParagraphBuffer()
+        self.related_links = []
+        try:
+            self._extract_paragraphs()
+            self._extract_related_links()
+        except Exception as e:
+            self.log(f"❌ Не удалось извлечь статью {self.current_url}: {e}")
+            self.paragraphs = ParagraphBuffer()
+            self.related_links = []
+            return None
+        if not self.paragraphs:
+            self.log(f"❌ В статье {self.current_url} нет параграфов")
+            return None
+        return {
+            'title': self.current_title,
+            'url': self.current_url,
+            'paragraphs': list(self.paragraphs),
+            'links': [dict(link) for link in self.related_links],
+        }
+    
+    def close(self):
+        """Закрытие браузера (соединений)"""
+        if getattr(self, 'prefetcher', None) is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+        if getattr(self, '_revalidator', None) is not None:
+            self._revalidator.close()
+            self._revalidator = None
+        if hasattr(self, 'backend'):
+            self.backend.close()
+            del self.backend
     
     def __del__(self):
-        """Закрытие браузера при завершении"""
+        """Закрытие браузера (соединений) при завершении"""
         try:
-            if hasattr(self, 'driver'):
-                self.driver.quit()
-                print("🔒 Браузер Firefox закрыт")
+            self.close()
         except:
             pass
 
 
 def main():
     """Главная функция"""
+    parser = argparse.ArgumentParser(description="Wikipedia Navigator")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="selenium",
+                        help="источник страниц: браузер Firefox или HTTP без браузера")
+    parser.add_argument("--wait-timeout", type=float, default=15,
+                        help="предельное время ожидания загрузки страницы, секунд")
+    parser.add_argument("--lean", action="store_true",
+                        help="экономный профиль Firefox: без картинок, шрифтов, медиа и аналитики")
+    parser.add_argument("--profile-dir", help="постоянный каталог профиля Firefox")
+    parser.add_argument("--standby-browser", action="store_true",
+                        help="держать запущенным запасной Firefox для быстрой замены упавшего")
+    parser.add_argument("--prefetch", type=int, default=2, metavar="N",
+                        help="потоков фоновой предзагрузки основных статей (0 — выключить)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="запросов в секунду к Википедии (0 — без ограничения)")
+    parser.add_argument("--burst", type=int, default=5, help="допустимый всплеск запросов")
+    parser.add_argument("--rate-state", help="файл состояния лимита, общий для нескольких процессов")
+    parser.add_argument("--cache", default="wiki_cache.sqlite3",
+                        help="файл дискового кэша статей")
+    parser.add_argument("--cache-ttl", type=float, default=24 * 3600,
+                        help="срок жизни записи кэша, секунд")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш")
+    parser.add_argument("--title-index", help="индекс заголовков (python title_index.py build ...)")
+    parser.add_argument("--search-index", default="wiki_search.sqlite3",
+                        help="файл полнотекстового индекса прочитанных статей")
+    parser.add_argument("--no-search-index", action="store_true",
+                        help="не индексировать прочитанные статьи")
+    parser.add_argument("--rules", help="файл правил извлечения (JSON, поля как в extraction_rules.RULE_SETS)")
+    parser.add_argument("--trace", help="файл трассы операций (JSON Lines)")
+    parser.add_argument("--metrics", help="файл метрик в текстовом формате Prometheus")
+    args = parser.parse_args()
+    try:
+        rules = load_rules(args.rules) if args.rules else None
+    except (OSError, ValueError) as e:
+        parser.error(f"правила извлечения {args.rules}: {e}")
+    
     print("🚀 Запуск Wikipedia Navigator...")
     
+    cache = None if args.no_cache else ArticleCache(args.cache, ttl=args.cache_ttl)
+    title_index = TitleIndex(args.title_index) if args.title_index else None
+    search_index = None if args.no_search_index else SearchIndex(args.search_index)
+    tracer = Tracer(args.trace, args.metrics)
     try:
-        navigator = WikipediaNavigator()
+        ready_states = LEAN_READY_STATES if args.lean else ("complete",)
+        navigator = WikipediaNavigator(backend=args.backend, cache=cache,
+                                       wait_policy=WaitPolicy(timeout=args.wait_timeout,
+                                                              ready_states=ready_states),
+                                       lean_browser=args.lean, profile_dir=args.profile_dir,
+                                       standby_browser=args.standby_browser,
+                                       prefetch_workers=args.prefetch,
+                                       title_index=title_index, tracer=tracer,
+                                       search_index=search_index,
+                                       rules=rules,
+                                       rate_limiter=RateLimiter(args.rate, args.burst,
+                                                                state_file=args.rate_state))
         navigator.navigate_menu()
         
     except KeyboardInterrupt:
@@ -525,9 +1079,26 @@ def main():
         print("\n🧹 Очистка ресурсов...")
         try:
             if 'navigator' in locals():
+                supervisor = getattr(getattr(navigator, 'backend', None), 'supervisor', None)
+                if supervisor is not None and supervisor.restarts:
+                    stats = supervisor.stats()
+                    print(f"🔁 Перезапусков браузера: {stats['restarts']}, восстановление: "
+                          f"p50 {stats['recovery_p50']:.1f} с, макс. {stats['recovery_max']:.1f} с")
                 del navigator
         except:
             pass
+        if cache is not None:
+            stats = cache.stats()
+            print(f"📦 Кэш: попаданий {stats['hits']}, промахов {stats['misses']}, "
+                  f"статей {stats['entries']}")
+            cache.close()
+        if title_index is not None:
+            title_index.close()
+        if search_index is not None:
+            stats = search_index.stats()
+            print(f"🗂 Индекс поиска: статей {stats['docs']}, слов {stats['terms']}")
+            search_index.close()
+        tracer.close()
         print("✅ Программа завершена")
 
 
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пул заранее запущенных драйверов Firefox для нескольких навигаторов в одном процессе
+Драйверы выдаются в аренду, между арендами очищаются, упавшие и старые заменяются
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from wiki_backends import create_firefox_driver
+
+
+class PoolTimeout(Exception):
+    """Свободный драйвер не освободился за отведённое время"""
+
+
+class DriverPool:
+    """Пул драйверов с прогревом, проверкой работоспособности и заменой"""
+
+    def __init__(self, size=2, max_lifetime=30 * 60, lease_timeout=60, factory=create_firefox_driver):
+        """size — число драйверов, max_lifetime — срок жизни драйвера, секунд"""
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.lease_timeout = lease_timeout
+        self.factory = factory
+        self._idle = []
+        self._created_at = {}
+        self._starting = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._counters = {
+            'created': 0,
+            'replaced': 0,
+            'expired': 0,
+            'failed_starts': 0,
+            'leases': 0,
+            'lease_wait_total': 0.0,
+            'lease_wait_max': 0.0,
+        }
+        # Прогрев: все драйверы запускаются параллельно в фоне
+        for _ in range(size):
+            self._start_driver()
+
+    def _start_driver(self):
+        """Запуск нового драйвера в фоновом потоке"""
+        with self._cond:
+            self._starting += 1
+        threading.Thread(target=self._run_start, daemon=True).start()
+
+    def _run_start(self):
+        try:
+            driver = self.factory()
+        except Exception as e:
+            print(f"❌ Не удалось запустить драйвер для пула: {e}")
+            with self._cond:
+                self._starting -= 1
+                self._counters['failed_starts'] += 1
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._starting -= 1
+            if self._closed:
+                self._quit(driver)
+                return
+            self._created_at[driver] = time.time()
+            self._counters['created'] += 1
+            self._idle.append(driver)
+            self._cond.notify_all()
+
+    def _quit(self, driver):
+        """Закрытие драйвера без исключений"""
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _discard(self, driver, reason):
+        """Удаление драйвера из пула и запуск замены"""
+        with self._cond:
+            self._created_at.pop(driver, None)
+            self._counters[reason] += 1
+        self._quit(driver)
+        if not self._closed:
+            self._start_driver()
+
+    def _healthy(self, driver):
+        """Проверка, что сессия драйвера жива"""
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Очистка состояния между арендами: cookies и пустая страница"""
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+
+    def lease(self, timeout=None):
+        """Получение работоспособного драйвера из пула"""
+        timeout = self.lease_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while not self._idle:
+                    if self._closed:
+                        raise PoolTimeout("Пул драйверов закрыт")
+                    if not self._starting and not self._created_at:
+                        raise PoolTimeout("В пуле нет драйверов и ни один не запускается")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"Нет свободного драйвера за {timeout} с")
+                    self._cond.wait(remaining)
+                driver = self._idle.pop()
+                age = time.time() - self._created_at.get(driver, time.time())
+
+            if age > self.max_lifetime:
+                self._discard(driver, 'expired')
+                continue
+            if not self._healthy(driver):
+                self._discard(driver, 'replaced')
+                continue
+
+            waited = time.perf_counter() - started
+            with self._cond:
+                self._counters['leases'] += 1
+                self._counters['lease_wait_total'] += waited
+                self._counters['lease_wait_max'] = max(self._counters['lease_wait_max'], waited)
+            return driver
+
+    def release(self, driver):
+        """Возврат драйвера в пул после очистки, упавший драйвер заменяется"""
+        if self._closed:
+            self._quit(driver)
+            return
+        try:
+            self._reset(driver)
+        except Exception:
+            self._discard(driver, 'replaced')
+            return
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify_all()
+
+    @contextmanager
+    def leased(self, timeout=None):
+        """Аренда драйвера на время блока with"""
+        driver = self.lease(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def metrics(self):
+        """Размер пула, занятость, возраст драйверов и время ожидания аренды"""
+        now = time.time()
+        with self._cond:
+            alive = len(self._created_at)
+            ages = [now - created for created in self._created_at.values()]
+            metrics = dict(self._counters)
+            metrics.update({
+                'size': self.size,
+                'alive': alive,
+                'idle': len(self._idle),
+                'leased': alive - len(self._idle),
+                'starting': self._starting,
+                'max_lifetime': self.max_lifetime,
+                'oldest_driver_age': max(ages) if ages else 0.0,
+            })
+        leases = metrics['leases']
+        metrics['lease_wait_avg'] = metrics['lease_wait_total'] / leases if leases else 0.0
+        return metrics
+
+    def close(self):
+        """Закрытие всех драйверов пула"""
+        with self._cond:
+            self._closed = True
+            drivers = list(self._created_at)
+            self._created_at.clear()
+            self._idle.clear()
+            self._cond.notify_all()
+        for driver in drivers:
+            self._quit(driver)
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Наблюдение за драйвером Firefox: упавшая сессия (geckodriver или браузер завершились)
+заменяется новым драйвером, по возможности заранее запущенным в фоне
+Время каждого восстановления запоминается для отчёта
+"""
+
+import os
+import threading
+import time
+
+from selenium.common.exceptions import (
+    InvalidSessionIdException, NoSuchElementException, StaleElementReferenceException,
+    TimeoutException, WebDriverException,
+)
+from urllib3.exceptions import HTTPError as TransportError
+
+
+# Ошибки, которые бывают и у живой сессии: проверять драйвер после них не нужно
+LIVE_SESSION_ERRORS = (TimeoutException, NoSuchElementException, StaleElementReferenceException)
+
+# Ошибки, после которых сессия может оказаться потерянной
+SESSION_ERRORS = (WebDriverException, TransportError, OSError)
+
+
+class DriverRestartError(WebDriverException):
+    """Упавший драйвер не удалось заменить: новый не запустился"""
+
+
+def _quit_quietly(driver):
+    """Закрытие драйвера без исключений"""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def driver_processes(driver):
+    """Идентификаторы процессов geckodriver и Firefox драйвера (None, если неизвестен)"""
+    service = getattr(driver, 'service', None)
+    process = getattr(service, 'process', None)
+    capabilities = getattr(driver, 'capabilities', None) or {}
+    return getattr(process, 'pid', None), capabilities.get('moz:processID')
+
+
+class DriverSupervisor:
+    """Текущий драйвер с заменой при потере сессии
+
+    standby — держать запущенным запасной драйвер: замена занимает время перехода
+    на него, а не запуска браузера. watch_interval — как часто (только при standby)
+    фоновый поток проверяет процессы драйверов без запросов к WebDriver: упавший
+    запасной драйвер заменяется, а если упал текущий и запасного нет — запасной
+    запускается, не дожидаясь следующей операции. 0 — без проверки. Без standby
+    лишние драйверы не запускаются (и не берутся из пула).
+    """
+
+    def __init__(self, factory, discard=_quit_quietly, driver=None, standby=False,
+                 watch_interval=1.0, verbose=True):
+        """factory() запускает драйвер, discard(driver) освобождает упавший или ненужный"""
+        self.factory = factory
+        self.discard = discard
+        self.standby = standby
+        self.verbose = verbose
+        self.driver = driver if driver is not None else factory()
+        self.restarts = 0
+        self.from_standby = 0
+        self.recovery_seconds = []
+        self._spare = None
+        self._spare_thread = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        if standby:
+            self._prepare_spare()
+        self._watcher = None
+        if standby and watch_interval:
+            self._watcher = threading.Thread(target=self._watch, args=(watch_interval,),
+                                             name="driver-watch", daemon=True)
+            self._watcher.start()
+
+    def log(self, message):
+        """Сообщение о ходе работы (только в подробном режиме)"""
+        if self.verbose:
+            print(message)
+
+    def _prepare_spare(self):
+        """Запуск запасного драйвера в фоновом потоке (если он ещё не запущен)"""
+        with self._lock:
+            if self._closed.is_set() or self._spare is not None or self._spare_thread is not None:
+                return
+            self._spare_thread = threading.Thread(target=self._start_spare, name="driver-spare",
+                                                  daemon=True)
+            self._spare_thread.start()
+
+    def _start_spare(self):
+        try:
+            driver = self.factory()
+        except Exception as e:
+            self.log(f"⚠️ Не удалось запустить запасной браузер: {e}")
+            driver = None
+        with self._lock:
+            self._spare_thread = None
+            if not self._closed.is_set():
+                self._spare = driver
+                return
+        if driver is not None:
+            self.discard(driver)
+
+    def _take_spare(self):
+        """Запасной драйвер (с ожиданием, если он ещё запускается) или None"""
+        with self._lock:
+            thread = self._spare_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            driver, self._spare = self._spare, None
+        if driver is not None and not self.alive(driver):
+            self.discard(driver)
+            return None
+        return driver
+
+    def wait_spare(self, timeout=None):
+        """Ожидание запуска запасного драйвера; True — он готов"""
+        with self._lock:
+            thread = self._spare_thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            return self._spare is not None
+
+    def processes_alive(self, driver=None):
+        """Живы ли процессы geckodriver и Firefox (проверка без запросов к WebDriver)"""
+        driver = driver or self.driver
+        service = getattr(driver, 'service', None)
+        process = getattr(service, 'process', None)
+        if process is not None and process.poll() is not None:
+            return False
+        _, browser_pid = driver_processes(driver)
+        if browser_pid:
+            try:
+                os.kill(browser_pid, 0)
+            except ProcessLookupError:
+                return False
+            except OSError:
+                pass
+        return True
+
+    def alive(self, driver=None):
+        """Отвечает ли сессия драйвера"""
+        driver = driver or self.driver
+        if not self.processes_alive(driver):
+            return False
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def session_lost(self, error):
+        """Вызвана ли ошибка потерей сессии драйвера (а не, например, отсутствием элемента)"""
+        if isinstance(error, LIVE_SESSION_ERRORS):
+            return False
+        if isinstance(error, InvalidSessionIdException):
+            return True
+        return isinstance(error, SESSION_ERRORS) and not self.alive()
+
+    def _watch(self, interval):
+        """Фоновая проверка процессов: замена готовится, пока пользователь читает статью"""
+        while not self._closed.wait(interval):
+            with self._lock:
+                spare = self._spare
+                if spare is not None and not self.processes_alive(spare):
+                    self._spare = None
+                else:
+                    spare = None
+            if spare is not None:
+                self.discard(spare)
+            # Запасной запускается заново, если его нет (упал или уже занял место текущего)
+            self._prepare_spare()
+
+    def restart(self, restore=None):
+        """Замена упавшего драйвера и восстановление состояния restore(driver)
+
+        Возвращает время восстановления в секундах: от обнаружения сбоя до готовности
+        нового драйвера с восстановленной страницей.
+        """
+        started = time.perf_counter()
+        driver = self._take_spare()
+        if driver is not None:
+            self.from_standby += 1
+        else:
+            try:
+                driver = self.factory()
+            except Exception as e:
+                # Упавший драйвер остаётся текущим: следующая операция снова обнаружит
+                # потерю сессии и повторит замену
+                raise DriverRestartError(f"Не удалось перезапустить браузер: {e}") from e
+        dead, self.driver = self.driver, driver
+        # Упавший драйвер закрывается в фоне: ожидание его процессов не задерживает работу
+        threading.Thread(target=self.discard, args=(dead,), daemon=True).start()
+        if restore is not None:
+            restore(driver)
+        if self.standby:
+            self._prepare_spare()
+        elapsed = time.perf_counter() - started
+        self.restarts += 1
+        self.recovery_seconds.append(elapsed)
+        return elapsed
+
+    def stats(self):
+        """Число замен драйвера (из них — на заранее запущенный) и время восстановления, секунд"""
+        recoveries = sorted(self.recovery_seconds)
+        return {
+            'restarts': self.restarts,
+            'from_standby': self.from_standby,
+            'recovery_p50': recoveries[len(recoveries) // 2] if recoveries else None,
+            'recovery_max': recoveries[-1] if recoveries else None,
+            'recovery_last': self.recovery_seconds[-1] if recoveries else None,
+        }
+
+    def close(self):
+        """Остановка проверки, освобождение текущего и запасного драйверов"""
+        self._closed.set()
+        with self._lock:
+            thread = self._spare_thread
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            spare, self._spare = self._spare, None
+        if spare is not None:
+            self.discard(spare)
+        if self.driver is not None:
+            self.discard(self.driver)
+            self.driver = None
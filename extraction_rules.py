@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Декларативные правила извлечения статей для языковых разделов Википедии
+Какие блоки считать ссылками «Основная статья», какие параграфы и ссылки отбрасывать —
+задаётся данными (RULE_SETS или JSON-файл), а проверки компилируются один раз
+и применяются сразу ко всем параграфам страницы
+"""
+
+import json
+import re
+from urllib.parse import urlsplit
+
+from article_model import Link
+
+
+# Разделитель параграфов при пакетной проверке (в тексте страницы не встречается)
+SEPARATOR = "\x00"
+
+# Символы, нижний регистр которых начинается с другой буквы, чем у их пары по upper()
+# (знак кельвина → k, İ → i̇ и т.п.): при поиске без учёта регистра они тоже ищутся.
+# Таблица построена по unicodedata этой версии Python: {буква: символы}
+CASE_FOLD_EXTRA = {
+    'i': 'İ', 'k': 'K', 'ß': 'ẞ', 'å': 'Å', 'ǆ': 'ǅ', 'ǉ': 'ǈ', 'ǌ': 'ǋ', 'ǳ': 'ǲ', 'θ': 'ϴ',
+    'ω': 'Ω', 'ᾀ': 'ᾈ', 'ᾁ': 'ᾉ', 'ᾂ': 'ᾊ', 'ᾃ': 'ᾋ', 'ᾄ': 'ᾌ', 'ᾅ': 'ᾍ', 'ᾆ': 'ᾎ', 'ᾇ': 'ᾏ',
+    'ᾐ': 'ᾘ', 'ᾑ': 'ᾙ', 'ᾒ': 'ᾚ', 'ᾓ': 'ᾛ', 'ᾔ': 'ᾜ', 'ᾕ': 'ᾝ', 'ᾖ': 'ᾞ', 'ᾗ': 'ᾟ', 'ᾠ': 'ᾨ',
+    'ᾡ': 'ᾩ', 'ᾢ': 'ᾪ', 'ᾣ': 'ᾫ', 'ᾤ': 'ᾬ', 'ᾥ': 'ᾭ', 'ᾦ': 'ᾮ', 'ᾧ': 'ᾯ', 'ᾳ': 'ᾼ', 'ῃ': 'ῌ',
+    'ῳ': 'ῼ',
+}
+
+# Правила по языковым разделам. hatnote_classes — наборы классов блока «Основная статья»
+# (блок подходит, если у него есть все классы одного из наборов, в любом порядке);
+# hatnote_text — регулярное выражение, которому должен соответствовать текст блока
+RULE_SETS = {
+    'ru': {
+        'hatnote_classes': [["hatnote", "navigation-not-searchable", "ts-main"]],
+        'hatnote_text': None,
+        'paragraph_min_length': 21,
+        'paragraph_skip_prefixes': ["↑"],
+        'paragraph_skip_words': ["edit", "source"],
+        'paragraph_skip_patterns': [],
+        'link_min_length': 6,
+        'link_skip_parts': ["/edit", "/history", "/talk", "/special", "/user", "/file"],
+    },
+    'en': {
+        'hatnote_classes': [["hatnote", "navigation-not-searchable"]],
+        'hatnote_text': r"^Main articles?:",
+        'paragraph_min_length': 21,
+        'paragraph_skip_prefixes': ["↑"],
+        'paragraph_skip_words': ["[edit]", "[source]"],
+        'paragraph_skip_patterns': [],
+        'link_min_length': 3,
+        'link_skip_parts': ["/edit", "/history", "/talk:", "/special:", "/user:", "/file:",
+                            "/help:", "/wikipedia:", "/template:"],
+    },
+}
+
+# Правила для адресов, язык которых не определяется (локальный стенд и т.п.)
+DEFAULT_LANGUAGE = 'ru'
+
+
+class RuleSet:
+    """Скомпилированные правила отбора параграфов и ссылок «Основная статья»"""
+
+    def __init__(self, language, hatnote_classes, paragraph_min_length=21,
+                 paragraph_skip_prefixes=(), paragraph_skip_words=(), paragraph_skip_patterns=(),
+                 link_min_length=6, link_skip_parts=(), hatnote_text=None):
+        self.language = language
+        # Пустая строка совпала бы с любым текстом и отбросила бы всё
+        for field, values in (('hatnote_classes', [name for classes in hatnote_classes for name in classes]),
+                              ('paragraph_skip_prefixes', paragraph_skip_prefixes),
+                              ('paragraph_skip_words', paragraph_skip_words),
+                              ('paragraph_skip_patterns', paragraph_skip_patterns),
+                              ('link_skip_parts', link_skip_parts)):
+            if any(not value for value in values):
+                raise ValueError(f"Правила {language}: пустая строка в {field}")
+        if not hatnote_classes or any(not classes for classes in hatnote_classes):
+            raise ValueError(f"Правила {language}: пустой набор классов в hatnote_classes")
+        self.hatnote_classes = [frozenset(classes) for classes in hatnote_classes]
+        # Самый длинный класс набора: быстрый отсев большинства div без разбора атрибута
+        self._hatnote_probes = tuple(max(classes, key=len) for classes in self.hatnote_classes)
+        self.paragraph_min_length = paragraph_min_length
+        self.link_min_length = link_min_length
+        # Подстроки ищутся без учёта регистра: в тексте, приведённом к нижнему регистру
+        self._prefixes = tuple(prefix.lower() for prefix in paragraph_skip_prefixes)
+        self._words = tuple(word.lower() for word in paragraph_skip_words)
+        self._patterns = [re.compile(pattern, re.IGNORECASE) for pattern in paragraph_skip_patterns]
+        self._link_skip = tuple(part.lower() for part in link_skip_parts)
+        # Что искать в склеенном тексте параграфов: первая буква каждой подстроки и
+        # каждого префикса в обоих регистрах (поиск одного символа самый быстрый;
+        # лишние совпадения, например префикс в середине параграфа, отсеет полная проверка)
+        anchors = set()
+        for text in self._words + self._prefixes:
+            first = text[0]
+            anchors.update((first, first.upper()), CASE_FOLD_EXTRA.get(first, ""))
+        self._anchors = tuple(sorted(anchors))
+        self._hatnote_text = re.compile(hatnote_text) if hatnote_text else None
+
+    @classmethod
+    def from_dict(cls, language, data):
+        """Правила из словаря (как в RULE_SETS); недостающие поля — из правил по умолчанию"""
+        unknown = set(data) - set(RULE_SETS[DEFAULT_LANGUAGE])
+        if unknown:
+            raise ValueError(f"Правила {language}: неизвестные поля {', '.join(sorted(unknown))}")
+        merged = dict(RULE_SETS[DEFAULT_LANGUAGE])
+        merged.update(data)
+        return cls(language, **merged)
+
+    def hatnote_selector(self):
+        """CSS-селектор блоков «Основная статья» для поиска в браузере"""
+        return ", ".join("div" + "".join(f".{name}" for name in sorted(classes))
+                         for classes in self.hatnote_classes)
+
+    def is_hatnote(self, class_attr):
+        """Подходит ли блок с атрибутом class под один из наборов классов"""
+        if not class_attr or not any(probe in class_attr for probe in self._hatnote_probes):
+            return False
+        classes = set(class_attr.split())
+        return any(required <= classes for required in self.hatnote_classes)
+
+    def _rejected(self, text):
+        """Отбрасывается ли параграф по префиксу, подстроке или выражению (без учёта регистра)"""
+        folded = text.lower()
+        return (folded.startswith(self._prefixes) or any(word in folded for word in self._words) or
+                any(pattern.search(text) for pattern in self._patterns))
+
+    def accept_paragraph(self, text):
+        """Проверка одного параграфа"""
+        return bool(text) and len(text) >= self.paragraph_min_length and not self._rejected(text)
+
+    def filter_paragraphs(self, texts):
+        """Параграфы статьи, прошедшие правила, в исходном порядке
+
+        Все параграфы проверяются по склеенному через SEPARATOR тексту: в нём ищутся
+        только первые буквы запрещённых подстрок и префиксов (в обоих регистрах).
+        Полная проверка выполняется лишь для параграфов, где такие буквы нашлись, —
+        в обычном тексте статьи их единицы.
+        """
+        texts = texts if isinstance(texts, list) else list(texts)
+        if not texts:
+            return []
+        blob = SEPARATOR.join(texts)
+        # Проверка зависит только от текста, поэтому подозрительные параграфы собираются
+        # как строки: номер параграфа и смещения не нужны
+        suspects = set()
+        for needle in self._anchors:
+            position = blob.find(needle)
+            while position != -1:
+                start = blob.rfind(SEPARATOR, 0, position) + 1
+                end = blob.find(SEPARATOR, position)
+                if end == -1:
+                    end = len(blob)
+                suspects.add(blob[start:end])
+                # Остальные вхождения в этом же параграфе не нужны
+                position = blob.find(needle, end)
+        if self._patterns:
+            # Выражения проверяются по каждому параграфу: «^» означает начало параграфа
+            suspects.update(text for text in texts
+                            if any(pattern.search(text) for pattern in self._patterns))
+        rejected = {text for text in suspects if self._rejected(text)}
+
+        min_length = self.paragraph_min_length
+        if not rejected:
+            return [text for text in texts if len(text) >= min_length]
+        return [text for text in texts if len(text) >= min_length and text not in rejected]
+
+    def filter_links(self, raw, base_url):
+        """Ссылки «Основная статья» из пар (текст, адрес): только статьи, без дубликатов
+
+        Текст обрезается по краям, переводы строк внутри заменяются пробелами
+        (остальные пробелы сохраняются); дубликаты определяются по этому тексту.
+        """
+        article_prefix = f"{base_url.rstrip('/')}/wiki/"
+        links = []
+        seen = set()
+        for text, href in raw:
+            text = (text or "").strip()
+            if not href or not href.startswith(article_prefix) or len(text) < self.link_min_length:
+                continue
+            lowered = href.lower()
+            if any(part in lowered for part in self._link_skip):
+                continue
+            clean_text = text.replace("\n", " ").strip()
+            if self._hatnote_text is not None and not self._hatnote_text.search(clean_text):
+                continue
+            if clean_text and clean_text not in seen:
+                seen.add(clean_text)
+                links.append(Link(clean_text, href))
+        return links
+
+    def __repr__(self):
+        return f"RuleSet({self.language!r})"
+
+
+# Скомпилированные правила по языкам
+RULES = {language: RuleSet.from_dict(language, data) for language, data in RULE_SETS.items()}
+
+
+def language_of(url):
+    """Код языкового раздела по адресу (ru.wikipedia.org → 'ru'), None если не Википедия"""
+    host = urlsplit(url).hostname or ""
+    language, _, domain = host.partition(".")
+    if domain in ("wikipedia.org", "m.wikipedia.org"):
+        return language
+    return None
+
+
+def rules_for(url):
+    """Правила для языкового раздела адреса (для неизвестных — правила по умолчанию)"""
+    return RULES.get(language_of(url) or DEFAULT_LANGUAGE, RULES[DEFAULT_LANGUAGE])
+
+
+def load_rules(path, language=None):
+    """Правила из JSON-файла: словарь полей RULE_SETS (недостающие — по умолчанию)
+
+    Ошибки формата (в том числе пустые строки в списках) — ValueError с описанием.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    language = data.pop('language', language or DEFAULT_LANGUAGE)
+    return RuleSet.from_dict(language, data)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ограничение частоты запросов к Википедии по алгоритму token bucket
+Общий лимит для потоков, задач asyncio и (через файл состояния) процессов
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl  # Unix
+except ImportError:
+    fcntl = None
+    import msvcrt  # Windows
+
+
+# Лимиты по умолчанию: запросов в секунду и допустимый всплеск
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 5
+
+
+class _FileLock:
+    """Межпроцессная блокировка файла состояния"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self._file
+
+    def __exit__(self, *exc):
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+class RateLimiter:
+    """Token bucket с отдельным бюджетом для каждого хоста
+
+    rate — запросов в секунду (None — без ограничения), burst — ёмкость корзины.
+    Запрос резервирует жетон сразу, а ждёт уже вне блокировки, поэтому
+    одновременные потоки и задачи получают жетоны по очереди без лишних пауз.
+    При state_file состояние корзин хранится в файле и общее для всех процессов.
+    clock — источник текущего времени в секундах (у процессов с общим файлом — общий).
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, per_host=None, state_file=None,
+                 clock=time.time):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        # {'ru.wikipedia.org': (rate, burst)} — бюджеты отдельных хостов
+        self.per_host = dict(per_host or {})
+        self.state_file = state_file
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _budget(self, host):
+        """Скорость и ёмкость корзины хоста"""
+        return self.per_host.get(host, (self.rate, self.burst))
+
+    def _take(self, buckets, host, now):
+        """Резервирование жетона: возвращает, сколько нужно подождать"""
+        rate, burst = self._budget(host)
+        if not rate:
+            return 0.0
+        tokens, updated = buckets.get(host, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate) - 1
+        buckets[host] = (tokens, now)
+        # Отрицательный остаток — очередь резервов, каждый ждёт своей доли времени
+        return -tokens / rate if tokens < 0 else 0.0
+
+    def reserve(self, host):
+        """Резервирование жетона для хоста, возвращает необходимую паузу в секундах"""
+        now = self.clock()
+        with self._lock:
+            if self.state_file is None:
+                delay = self._take(self._buckets, host, now)
+            else:
+                delay = self._reserve_shared(host, now)
+            self._record(host, delay)
+        return delay
+
+    def _reserve_shared(self, host, now):
+        """Резервирование через файл состояния, общий для процессов"""
+        with _FileLock(self.state_file) as f:
+            f.seek(0)
+            raw = f.read()
+            try:
+                buckets = {key: tuple(value) for key, value in json.loads(raw).items()} if raw else {}
+            except ValueError:
+                buckets = {}
+            delay = self._take(buckets, host, now)
+            f.seek(0)
+            f.truncate()
+            f.write(json.dumps(buckets).encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return delay
+
+    def _record(self, host, delay):
+        """Учёт времени ожидания по хосту"""
+        stats = self._stats.setdefault(host, {'acquired': 0, 'delayed': 0, 'wait_total': 0.0, 'wait_max': 0.0})
+        stats['acquired'] += 1
+        if delay > 0:
+            stats['delayed'] += 1
+            stats['wait_total'] += delay
+            stats['wait_max'] = max(stats['wait_max'], delay)
+
+    def acquire(self, host):
+        """Получение жетона с ожиданием в текущем потоке, возвращает время ожидания"""
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self, host):
+        """Получение жетона в задаче asyncio без блокировки цикла"""
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def stats(self):
+        """Статистика ожиданий по хостам (в пределах текущего процесса)"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._stats.items()}
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def shared_rate_limiter():
+    """Общий для всех навигаторов процесса ограничитель с лимитами по умолчанию"""
+    global _shared_limiter
+    with _shared_lock:
+        if _shared_limiter is None:
+            _shared_limiter = RateLimiter()
+        return _shared_limiter
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальный полнотекстовый индекс прочитанных статей для поиска без сети и браузера
+Слова приводятся к основе стеммером Snowball для русского языка, результаты
+ранжируются по BM25. Индекс хранится в SQLite и дополняется по мере чтения статей
+
+Наполнение: python search_index.py add wiki_search.sqlite3 crawl.jsonl [articles.jsonl ...]
+Поиск:      python search_index.py query wiki_search.sqlite3 "столица россии"
+"""
+
+import argparse
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter
+from functools import lru_cache
+
+from wiki_cache import canonical_url
+
+
+# Параметры BM25 и вес слов заголовка (слово заголовка считается как несколько вхождений)
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 3
+
+# Длина фрагмента текста в результатах поиска
+SNIPPET_LENGTH = 200
+
+WORD_RE = re.compile(r"\w+")
+CYRILLIC_RE = re.compile(r"[а-я]")
+
+# Служебные слова, которые не индексируются
+STOP_WORDS = frozenset("""
+    а без более бы был была были было быть в вам вас весь во вот все всего всех вы где да даже
+    для до его ее ей ему если есть еще же за здесь и из или им их к как ко когда кто ли либо мне
+    может мы на над надо наш не него нее нет ни них но ну о об однако он она они оно от очень по
+    под при про с со так также такой там те тем то того тоже той только том ты у уже хотя чего
+    чей чем что чтобы чье чья эта эти это я
+""".split())
+
+# Стеммер Snowball для русского языка (snowballstem.org/algorithms/russian)
+VOWELS = "аеиоуыэюя"
+PERFECTIVE_GERUND = (("в", "вши", "вшись"), ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись"))
+REFLEXIVE = ((), ("ся", "сь"))
+ADJECTIVE = ((), ("ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им", "ым",
+                  "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею"))
+PARTICIPLE = (("ем", "нн", "вш", "ющ", "щ"), ("ивш", "ывш", "ующ"))
+VERB = (("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны",
+         "ть", "ешь", "нно"),
+        ("ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл", "им",
+         "ым", "ен", "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены", "ить", "ыть",
+         "ишь", "ую", "ю"))
+NOUN = ((), ("а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и", "ией", "ей",
+             "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам", "ом", "о", "у", "ах", "иях", "ях",
+             "ы", "ь", "ию", "ью", "ю", "ия", "ья", "я"))
+DERIVATIONAL = ((), ("ост", "ость"))
+SUPERLATIVE = ((), ("ейш", "ейше"))
+
+
+def _regions(word):
+    """Начала областей RV и R2 алгоритма Snowball"""
+    rv = r1 = r2 = len(word)
+    for i, char in enumerate(word):
+        if char in VOWELS:
+            rv = i + 1
+            break
+    for i in range(1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r1 = i + 1
+            break
+    for i in range(r1 + 1, len(word)):
+        if word[i - 1] in VOWELS and word[i] not in VOWELS:
+            r2 = i + 1
+            break
+    return rv, r2
+
+
+def _strip_suffix(word, start, groups):
+    """Удаление самого длинного окончания из groups в области word[start:]
+
+    Окончания первой группы удаляются только после «а» или «я».
+    Возвращает слово без окончания или None, если окончание не найдено.
+    """
+    best = None
+    for group, suffixes in enumerate(groups):
+        for suffix in suffixes:
+            if (word.endswith(suffix) and len(word) - len(suffix) >= start and
+                    (best is None or len(suffix) > len(best[1]))):
+                best = (group, suffix)
+    if best is None:
+        return None
+    group, suffix = best
+    stem = word[:-len(suffix)]
+    if group == 0 and (len(stem) <= start or stem[-1] not in "ая"):
+        return None
+    return stem
+
+
+@lru_cache(maxsize=65536)
+def stem(word):
+    """Основа русского слова (Snowball); слова не на кириллице возвращаются как есть"""
+    word = word.replace("ё", "е")
+    if not CYRILLIC_RE.search(word):
+        return word
+    rv, r2 = _regions(word)
+
+    # Шаг 1: деепричастие, иначе возвратная частица и окончание прилагательного,
+    # причастия, глагола или существительного
+    stripped = _strip_suffix(word, rv, PERFECTIVE_GERUND)
+    if stripped is not None:
+        word = stripped
+    else:
+        word = _strip_suffix(word, rv, REFLEXIVE) or word
+        stripped = _strip_suffix(word, rv, ADJECTIVE)
+        if stripped is not None:
+            word = _strip_suffix(stripped, rv, PARTICIPLE) or stripped
+        else:
+            word = _strip_suffix(word, rv, VERB) or _strip_suffix(word, rv, NOUN) or word
+
+    # Шаг 2: конечное «и»
+    if word.endswith("и") and len(word) > rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательный суффикс в области R2
+    word = _strip_suffix(word, r2, DERIVATIONAL) or word
+
+    # Шаг 4: превосходная степень, двойное «н», мягкий знак
+    word = _strip_suffix(word, rv, SUPERLATIVE) or word
+    if word.endswith("нн") and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif word.endswith("ь") and len(word) > rv:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Основы значимых слов текста в порядке следования"""
+    return [stem(word) for word in WORD_RE.findall(text.casefold().replace("ё", "е"))
+            if (len(word) > 1 or word.isdigit()) and word not in STOP_WORDS]
+
+
+def _chunks(items, size=500):
+    """Разбиение списка на части (ограничение числа параметров запроса SQLite)"""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _pack_ids(ids):
+    """Отсортированные номера слов: разности соседних чисел, сжатые zlib"""
+    ids = sorted(ids)
+    deltas = array('I', (current - previous for previous, current in zip([0] + ids, ids)))
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    return zlib.compress(deltas.tobytes())
+
+
+def _unpack_ids(data):
+    """Номера слов из _pack_ids"""
+    deltas = array('I')
+    deltas.frombytes(zlib.decompress(data))
+    if sys.byteorder != "little":
+        deltas.byteswap()
+    return list(itertools.accumulate(deltas))
+
+
+class SearchIndex:
+    """Инвертированный индекс статей в SQLite с ранжированием BM25 и обновлением на месте"""
+
+    def __init__(self, path="wiki_search.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Индекс восстанавливается повторным чтением статей, fsync на каждую статью не нужен
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        # Постинги — строки без rowid с ключом (слово, статья). Вместо второго индекса
+        # по статье у статьи хранится сжатый список её слов (нужен только при обновлении),
+        # вместо полного текста — начала параграфов для фрагментов в выдаче
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                checksum BLOB NOT NULL,
+                terms BLOB NOT NULL,
+                snippets BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY,
+                term TEXT UNIQUE NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term_id INTEGER NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                paragraph INTEGER NOT NULL,
+                PRIMARY KEY (term_id, doc_id)
+            ) WITHOUT ROWID;
+        """)
+        self._db.commit()
+        self._load_lengths()
+
+    def _load_lengths(self):
+        """Длины статей в памяти: для BM25 не нужно обращаться к таблице статей"""
+        self._lengths = dict(self._db.execute("SELECT id, length FROM docs"))
+        self.total_length = sum(self._lengths.values())
+
+    @property
+    def docs(self):
+        """Число статей в индексе"""
+        return len(self._lengths)
+
+    def add_article(self, url, title, paragraphs, commit=True):
+        """Добавление или обновление статьи; False, если статья в индексе не изменилась
+
+        commit=False откладывает фиксацию до commit() (пакетное наполнение).
+        """
+        url = canonical_url(url)
+        title = title or ""
+        paragraphs = list(paragraphs)
+        checksum = hashlib.blake2b(
+            json.dumps([title, paragraphs], ensure_ascii=False).encode("utf-8"), digest_size=16
+        ).digest()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, checksum, terms FROM docs WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None and row[1] == checksum:
+                return False
+
+            # Частота слова и первый параграф, где оно встречается (для фрагмента в выдаче)
+            counts = Counter()
+            first_paragraph = {}
+            for term in tokenize(title):
+                counts[term] += TITLE_WEIGHT
+                first_paragraph.setdefault(term, -1)
+            for number, text in enumerate(paragraphs):
+                for term in tokenize(text):
+                    counts[term] += 1
+                    first_paragraph.setdefault(term, number)
+            length = sum(counts.values())
+            snippets = [" ".join(text.split())[:SNIPPET_LENGTH + 1] for text in paragraphs]
+
+            try:
+                old_term_ids = self._remove(row[0], row[2]) if row is not None else []
+                term_ids = self._term_ids(list(counts))
+                doc_id = self._db.execute(
+                    "INSERT INTO docs (url, title, length, checksum, terms, snippets) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, title, length, checksum, _pack_ids(term_ids.values()),
+                     zlib.compress(json.dumps(snippets, ensure_ascii=False).encode("utf-8"))),
+                ).lastrowid
+                self._db.executemany(
+                    "INSERT INTO postings (term_id, doc_id, tf, paragraph) VALUES (?, ?, ?, ?)",
+                    sorted((term_ids[term], doc_id, tf, first_paragraph[term])
+                           for term, tf in counts.items()),
+                )
+                # Слова, которые остались только в прежней версии статьи, удаляются из словаря
+                self._drop_orphan_terms(old_term_ids)
+                if commit:
+                    self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                self._load_lengths()
+                raise
+            self._lengths[doc_id] = length
+            self.total_length += length
+            return True
+
+    def commit(self):
+        """Фиксация статей, добавленных с commit=False"""
+        with self._lock:
+            self._db.commit()
+
+    def _term_ids(self, terms):
+        """Номера слов словаря (новые слова добавляются)"""
+        self._db.executemany("INSERT OR IGNORE INTO terms (term) VALUES (?)", [(term,) for term in terms])
+        ids = {}
+        for chunk in _chunks(terms):
+            ids.update(self._db.execute(
+                f"SELECT term, id FROM terms WHERE term IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return ids
+
+    def _remove(self, doc_id, terms):
+        """Удаление статьи и её постингов (без фиксации транзакции); номера её слов"""
+        term_ids = _unpack_ids(terms)
+        self._db.executemany("DELETE FROM postings WHERE term_id = ? AND doc_id = ?",
+                             [(term_id, doc_id) for term_id in term_ids])
+        self._db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+        self.total_length -= self._lengths.pop(doc_id, 0)
+        return term_ids
+
+    def _drop_orphan_terms(self, term_ids):
+        """Удаление из словаря слов без постингов (без фиксации транзакции)"""
+        self._db.executemany(
+            "DELETE FROM terms WHERE id = ? AND NOT EXISTS "
+            "(SELECT 1 FROM postings WHERE term_id = ?)",
+            [(term_id, term_id) for term_id in term_ids],
+        )
+
+    def remove_article(self, url):
+        """Удаление статьи из индекса; False, если её там не было"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, terms FROM docs WHERE url = ?", (canonical_url(url),)
+            ).fetchone()
+            if row is None:
+                return False
+            self._drop_orphan_terms(self._remove(*row))
+            self._db.commit()
+            return True
+
+    def search(self, query, limit=10):
+        """Статьи по запросу в порядке убывания BM25: [{'title', 'url', 'score', 'snippet'}]"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            if not self._lengths:
+                return []
+            lengths = self._lengths
+            average_length = self.total_length / len(lengths)
+            scores = {}
+            paragraph_hits = {}
+            for (term_id,) in self._db.execute(
+                f"SELECT id FROM terms WHERE term IN ({','.join('?' * len(terms))})", terms
+            ).fetchall():
+                rows = self._db.execute(
+                    "SELECT doc_id, tf, paragraph FROM postings WHERE term_id = ?", (term_id,)
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (len(lengths) - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, paragraph in rows:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    if paragraph >= 0:
+                        paragraph_hits.setdefault(doc_id, Counter())[paragraph] += 1
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            results = []
+            for doc_id, score in best:
+                title, url, snippets = self._db.execute(
+                    "SELECT title, url, snippets FROM docs WHERE id = ?", (doc_id,)
+                ).fetchone()
+                results.append({'title': title, 'url': url, 'score': score,
+                                'snippet': self._snippet(snippets, paragraph_hits.get(doc_id))})
+            return results
+
+    def _snippet(self, data, paragraph_hits):
+        """Начало параграфа, где встречается больше всего слов запроса"""
+        snippets = json.loads(zlib.decompress(data))
+        if not snippets:
+            return ""
+        text = snippets[paragraph_hits.most_common(1)[0][0] if paragraph_hits else 0]
+        if len(text) > SNIPPET_LENGTH:
+            text = text[:SNIPPET_LENGTH].rsplit(" ", 1)[0] + "…"
+        return text
+
+    def __contains__(self, url):
+        with self._lock:
+            return self._db.execute(
+                "SELECT 1 FROM docs WHERE url = ?", (canonical_url(url),)
+            ).fetchone() is not None
+
+    def stats(self):
+        """Число статей и слов словаря, размер файла индекса"""
+        with self._lock:
+            terms = self._db.execute("SELECT COUNT(*) FROM terms").fetchone()[0]
+            page_count = self._db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+        return {'docs': self.docs, 'terms': terms, 'bytes': page_count * page_size}
+
+    def close(self):
+        """Закрытие базы индекса"""
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+
+def index_jsonl(index, path):
+    """Добавление статей из файла JSON Lines (результаты wiki_crawler.py и wiki_bulk.py)"""
+    added = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get('url') and record.get('paragraphs') is not None:
+                added += index.add_article(record['url'], record.get('title'), record['paragraphs'],
+                                           commit=False)
+    index.commit()
+    return added
+
+
+def main():
+    """Наполнение индекса и поиск из командной строки"""
+    parser = argparse.ArgumentParser(description="Полнотекстовый поиск по прочитанным статьям")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="добавить статьи из файлов JSON Lines")
+    add.add_argument("index", help="файл индекса")
+    add.add_argument("files", nargs="+", help="результаты wiki_crawler.py или wiki_bulk.py")
+    query = commands.add_parser("query", help="найти статьи по словам")
+    query.add_argument("index")
+    query.add_argument("query")
+    query.add_argument("--limit", type=int, default=10, help="число результатов")
+    query.add_argument("--json", action="store_true", help="результаты в JSON Lines")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    try:
+        if args.command == "add":
+            for path in args.files:
+                added = index_jsonl(index, path)
+                print(f"✅ {path}: добавлено или обновлено статей: {added}", file=sys.stderr)
+            stats = index.stats()
+            print(f"🗂 В индексе статей: {stats['docs']}, слов: {stats['terms']}", file=sys.stderr)
+        else:
+            started = time.perf_counter()
+            results = index.search(args.query, limit=args.limit)
+            elapsed = time.perf_counter() - started
+            for number, result in enumerate(results, 1):
+                if args.json:
+                    print(json.dumps(result, ensure_ascii=False))
+                else:
+                    print(f"{number}. {result['title']} ({result['score']:.2f})\n"
+                          f"   {result['url']}\n   {result['snippet']}")
+            print(f"🔎 Найдено: {len(results)} за {elapsed * 1000:.1f} мс", file=sys.stderr)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Общие заготовки тестов: модули проекта лежат в корне репозитория"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wiki_backends import ArticleBackend
+
+
+class FakeBackend(ArticleBackend):
+    """Источник страниц в памяти: pages — {адрес: (заголовок, параграфы, hatnote)},
+    адреса из broken открываются, но чтение их содержимого завершается ошибкой;
+    ready=False — страница не дожидается готовности (например, about:blank);
+    redirects — {адрес: адрес статьи}, как перенаправления Википедии"""
+
+    name = "fake"
+
+    def __init__(self, pages, broken=(), ready=True, redirects=None):
+        super().__init__(verbose=False)
+        self.pages = pages
+        self.broken = set(broken)
+        self.ready = ready
+        self.redirects = redirects or {}
+        self.url = None
+        self.waits = 0
+        self.validator_reads = 0
+        # Диапазоны (start, end) запросов параграфов
+        self.paragraph_reads = []
+        # Номер правки открытой страницы (validators)
+        self.revision = 1
+
+    def open(self, url):
+        self.url = self.redirects.get(url, url)
+        return self.url in self.pages
+
+    def wait_for_page_load(self):
+        self.waits += 1
+        return self.ready
+
+    def current_url(self):
+        return self.url
+
+    def title(self):
+        return self.pages[self.url][0]
+
+    def validators(self):
+        self.validator_reads += 1
+        return {'revision': self.revision}
+
+    def _page(self):
+        if self.url in self.broken:
+            raise RuntimeError(f"сбой чтения {self.url}")
+        return self.pages[self.url]
+
+    def paragraph_texts(self, start=0, end=None, batched=True):
+        self.paragraph_reads.append((start, end))
+        paragraphs = self._page()[1]
+        return len(paragraphs), paragraphs[start:end]
+
+    def hatnotes(self, batched=True):
+        hatnotes = self._page()[2]
+        return len(hatnotes), list(hatnotes)
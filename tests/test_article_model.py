@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Компактная статья: ссылки Link, буфер параграфов и преобразование в JSON"""
+
+import json
+
+import pytest
+
+from article_model import Link, ParagraphBuffer, URLTable, compact_links, compact_paragraphs, to_plain
+
+URL = "http://wiki.test/wiki/A"
+
+
+def test_links_compare_and_hash_by_text_and_url():
+    first, same, other = Link("A", URL), Link("A", URL), Link("Б", URL)
+    assert first == same and hash(first) == hash(same)
+    assert first != other
+    assert first == {'text': "A", 'url': URL}
+    assert {first, same, other} == {first, other}
+    assert {first: 1}[same] == 1
+    # Дедупликация в порядке появления, как раньше для словарей
+    assert list(dict.fromkeys([first, other, same])) == [first, other]
+
+
+def test_link_behaves_like_dict():
+    link = Link("A", URL)
+    assert dict(link) == {'text': "A", 'url': URL}
+    assert link['url'] == URL
+    with pytest.raises(KeyError):
+        link['title']
+
+
+def test_links_share_url_strings():
+    urls = URLTable()
+    first = Link("A", "".join(["http://wiki.test/", "wiki/A"]), urls)
+    second = Link("A2", "".join(["http://wiki.test/wiki/", "A"]), urls)
+    assert first.url is second.url and len(urls) == 1
+
+
+def test_paragraph_buffer_indexing_and_slicing():
+    texts = ["один", "два — второй", "", "četiri", "пять"]
+    buffer = ParagraphBuffer(texts)
+    assert len(buffer) == 5
+    assert buffer[1] == texts[1] and buffer[-1] == "пять" and buffer[2] == ""
+    assert buffer[1:4] == texts[1:4]
+    assert buffer[::-2] == texts[::-2]
+    assert buffer[10:] == []
+    for index in (5, -6):
+        with pytest.raises(IndexError):
+            buffer[index]
+    assert list(buffer) == texts and "пять" in buffer
+    assert buffer == texts and buffer == tuple(texts) and buffer == ParagraphBuffer(texts)
+    assert buffer != texts[:-1]
+    buffer.append("шесть")
+    assert buffer[-1] == "шесть"
+    assert buffer.nbytes() >= len("".join(texts).encode("utf-8"))
+
+
+def test_compact_helpers_keep_ready_objects():
+    buffer = ParagraphBuffer(["текст"])
+    assert compact_paragraphs(buffer) is buffer
+    assert compact_paragraphs(["текст"]) == buffer
+    link = Link("A", URL)
+    links = compact_links([link, {'text': "Б", 'url': URL}])
+    assert links[0] is link and links[1] == Link("Б", URL)
+
+
+def test_to_plain_round_trips_through_json():
+    record = {'paragraphs': ParagraphBuffer(["один", "два"]),
+              'related_links': [Link("A", URL)]}
+    plain = json.loads(json.dumps(record, ensure_ascii=False, default=to_plain))
+    assert plain == {'paragraphs': ["один", "два"], 'related_links': [{'text': "A", 'url': URL}]}
+    assert compact_paragraphs(plain['paragraphs']) == record['paragraphs']
+    assert compact_links(plain['related_links']) == record['related_links']
+    with pytest.raises(TypeError):
+        to_plain(object())
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Запись статьи для пакетной выгрузки при ошибках извлечения"""
+
+from conftest import FakeBackend
+from dom_zadanie import WikipediaNavigator
+from rate_limiter import RateLimiter
+from wiki_cache import ArticleCache
+
+BASE = "http://wiki.test"
+A = f"{BASE}/wiki/A"
+B = f"{BASE}/wiki/B"
+PAGES = {
+    A: ("A", ["Параграф статьи A достаточной длины для фильтра"],
+        [("Основная статья: C", f"{BASE}/wiki/C")]),
+    B: ("B", ["Параграф статьи B достаточной длины для фильтра"], []),
+}
+
+
+def navigator(broken=()):
+    return WikipediaNavigator(base_url=BASE, backend=FakeBackend(PAGES, broken), fallback=False,
+                              rate_limiter=RateLimiter(rate=None), verbose=False)
+
+
+def test_record_of_readable_article():
+    nav = navigator()
+    assert nav.open_article(A)
+    record = nav.article_record()
+    assert record['title'] == "A"
+    assert record['paragraphs'] == list(PAGES[A][1])
+    assert record['links'] == [{'text': "Основная статья: C", 'url': f"{BASE}/wiki/C"}]
+
+
+def test_failed_extraction_does_not_reuse_previous_article():
+    nav = navigator(broken={B})
+    assert nav.open_article(A)
+    assert nav.article_record() is not None
+    assert nav.open_article(B)
+    assert nav.article_record() is None
+    assert list(nav.paragraphs) == []
+    assert nav.related_links == []
+
+
+def test_get_methods_clear_previous_article_on_failure():
+    nav = navigator(broken={B})
+    nav.open_article(A)
+    assert nav.get_article_paragraphs() and nav.get_related_links()
+    nav.open_article(B)
+    assert not nav.get_article_paragraphs()
+    assert not nav.get_related_links()
+    assert list(nav.paragraphs) == [] and nav.related_links == []
+
+
+def test_article_without_links_is_not_a_failure():
+    nav = navigator()
+    nav.open_article(B)
+    record = nav.article_record()
+    assert record is not None and record['links'] == []
+
+
+def cached_navigator(tmp_path, backend):
+    return WikipediaNavigator(base_url=BASE, backend=backend, fallback=False,
+                              cache=ArticleCache(str(tmp_path / "cache.sqlite3")),
+                              rate_limiter=RateLimiter(rate=None), verbose=False)
+
+
+def test_validators_are_read_only_with_stored_content(tmp_path):
+    backend = FakeBackend(PAGES)
+    nav = cached_navigator(tmp_path, backend)
+    assert nav.open_article(A)
+    assert backend.validator_reads == 0
+    nav.cache.ttl = -1
+    assert nav.open_article(A)
+    assert backend.validator_reads == 0
+    assert nav.get_article_paragraphs()
+    assert nav.cache.get_stale(A)['revision'] == 1
+
+
+def test_new_alias_to_changed_article_drops_stale_content(tmp_path):
+    backend = FakeBackend(dict(PAGES), redirects={f"{BASE}/wiki/A_redirect": A})
+    nav = cached_navigator(tmp_path, backend)
+    assert nav.open_article(A) and nav.get_article_paragraphs()
+    new_text = "Новый текст статьи A после правки, достаточной длины"
+    backend.pages[A] = ("A", [new_text], [])
+    backend.revision = 2
+    assert nav.open_article(f"{BASE}/wiki/A_redirect")
+    assert nav.current_url == A
+    assert nav.get_article_paragraphs()
+    assert list(nav.paragraphs) == [new_text]
+    entry = nav.cache.get_stale(A)
+    assert entry['revision'] == 2 and entry['paragraphs'] == [new_text]
+    assert entry['related_links'] is None
+
+
+def test_new_alias_to_unchanged_article_keeps_cached_content(tmp_path):
+    backend = FakeBackend(dict(PAGES), redirects={f"{BASE}/wiki/A_redirect": A})
+    nav = cached_navigator(tmp_path, backend)
+    assert nav.open_article(A) and nav.get_article_paragraphs()
+    assert nav.open_article(f"{BASE}/wiki/A_redirect")
+    backend.broken.add(A)
+    assert nav.get_article_paragraphs()
+    assert list(nav.paragraphs) == list(PAGES[A][1])
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Источники страниц: разбор HTML по тем же правилам, что и чтение страницы в браузере,
+и HTTP-режим против стенда"""
+
+import pytest
+
+from wiki_backends import HttpBackend, article_url, parse_wiki_page
+from wiki_standin import StandinServer, make_search_results, make_synthetic_article, page_filename
+
+BASE = "http://wiki.test"
+URL = f"{BASE}/wiki/A"
+
+# Разметка, на которой браузер (innerText) и разбор HTML могли бы разойтись
+TRICKY = """<!DOCTYPE html><html><head><meta charset="utf-8">
+<script>RLCONF={"wgRevisionId":42};</script><style>p {color: red}</style></head><body>
+<p>Параграф вне контента</p>
+<h1 id="firstHeading">Статья   <span>A</span></h1>
+<div id="mw-content-text"><div class="mw-parser-output">
+<div class="ts-main hatnote navigation-not-searchable">Основная статья:
+  <a href="/wiki/B">B</a>, <a href="/wiki/C">C</a></div>
+<div class="hatnote">Не «основная статья»: <a href="/wiki/D">D</a></div>
+<div class="hatnote navigation-not-searchable ts-main">Без ссылки</div>
+<p>Первая   строка<br>вторая строка</p>
+<p>Текст<span style="display: none">скрытый</span> и <b>жирный</b><script>var x = 1;</script>
+<p>Незакрытый параграф закрывается следующим</p>
+<p>Знаки &laquo;цитаты&raquo; &amp; сущности</p>
+</div></div>
+<div class="footer">подвал</div>
+</body></html>"""
+
+
+def test_parser_follows_browser_text_rules():
+    page = parse_wiki_page(TRICKY, URL)
+    assert page['title'] == "Статья A"
+    assert page['paragraphs'] == [
+        "Первая строка\nвторая строка",
+        "Текст и жирный",
+        "Незакрытый параграф закрывается следующим",
+        "Знаки «цитаты» & сущности",
+    ]
+    # Hatnote опознаётся по набору классов в любом порядке; ссылка — первая, абсолютная
+    assert page['hatnotes'] == [("Основная статья: B, C", f"{BASE}/wiki/B"),
+                                ("Без ссылки", None)]
+    assert page['div_count'] == 6
+    assert page['has_content'] and not page['is_search_page'] and not page['no_article']
+    assert page['revision'] == 42
+
+
+def test_synthetic_article_matches_generator():
+    targets = ["Б", "В", "Г"]
+    html = make_synthetic_article("А", paragraphs=6, targets=targets, filler_divs=12, revision=3)
+    page = parse_wiki_page(html, URL)
+    assert page['title'] == "А" and page['revision'] == 3
+    assert len(page['paragraphs']) == 6
+    assert all(text.startswith(f"Параграф {n} статьи «А».") for n, text in enumerate(page['paragraphs']))
+    assert page['hatnotes'] == [(f"Основная статья: {t}", article_url(BASE, t)) for t in targets]
+    # Hatnote и заполнители плюс #mw-content-text и .mw-parser-output
+    assert page['div_count'] == 3 + 12 + 2
+    # Разделы по h2: преамбула и по разделу на каждую основную статью
+    assert len(page['sections']) == 4
+    assert sum(len(section['paragraphs']) for section in page['sections']) == 6
+
+
+def test_known_sections_are_not_parsed_again():
+    html = make_synthetic_article("А", paragraphs=6, targets=["Б", "В", "Г"], filler_divs=0)
+    first = parse_wiki_page(html, URL)
+    known = {first['sections'][1]['hash']}
+    page = parse_wiki_page(html, URL, known_sections=known)
+    assert [section['reused'] for section in page['sections']] == [False, True, False, False]
+    assert page['sections'][1]['paragraphs'] == [] and page['sections'][1]['hatnotes'] == []
+    assert page['sections'][2] == first['sections'][2]
+
+
+def test_search_results_page():
+    page = parse_wiki_page(make_search_results("кот", ["Кот", "Кот (значение)"]), f"{BASE}/w/index.php")
+    assert page['is_search_page']
+    assert page['search_results'] == [{'text': title, 'url': article_url(BASE, title)}
+                                      for title in ("Кот", "Кот (значение)")]
+    empty = parse_wiki_page(make_search_results("ъъъ", []), f"{BASE}/w/index.php")
+    assert empty['is_search_page'] and empty['search_results'] == []
+
+
+MISSING = """<html><body><h1 id="firstHeading">Нет такой статьи</h1>
+<div id="mw-content-text"><div class="noarticletext mw-content-ltr">
+<p>В Википедии нет статьи с таким названием.</p></div></div></body></html>"""
+
+
+@pytest.fixture
+def standin(tmp_path):
+    (tmp_path / page_filename("Пропавшая")).write_text(MISSING, encoding="utf-8")
+    (tmp_path / page_filename("Кот")).write_text(
+        make_synthetic_article("Кот", paragraphs=4, hatnotes=2, filler_divs=0), encoding="utf-8")
+    with StandinServer(pages_dir=str(tmp_path), synthetic=False) as server:
+        backend = HttpBackend(verbose=False)
+        yield server, backend
+        backend.close()
+
+
+def test_missing_article_is_not_opened(standin):
+    server, backend = standin
+    assert parse_wiki_page(MISSING, URL)['no_article']
+    # Сохранённая страница отдаётся с кодом 200, но статьи на ней нет — как в браузере
+    assert not backend.open(server.article_url("Пропавшая"))
+    assert not backend.open(server.article_url("Нет на стенде"))
+
+
+def test_http_backend_reads_article_and_searches(standin):
+    server, backend = standin
+    assert backend.open(server.article_url("Кот"))
+    assert backend.title() == "Кот"
+    total, texts = backend.paragraph_texts(1, 3)
+    assert total == 4 and len(texts) == 2 and texts[0].startswith("Параграф 1 ")
+    count, hatnotes = backend.hatnotes()
+    assert count == 4 and [url for _, url in hatnotes] == [
+        server.article_url("Кот (раздел 0)"), server.article_url("Кот (раздел 1)")]
+    # Точное совпадение — перенаправление на статью, иначе первый результат
+    assert backend.search("Кот", server.base_url) and backend.title() == "Кот"
+    assert backend.search("ко", server.base_url) and backend.title() == "Кот"
+    assert not backend.search("ъъъ", server.base_url)
+
+
+def test_http_session_reuses_keep_alive_connection(standin):
+    server, backend = standin
+    url = server.article_url("Кот")
+    assert backend.open(url)
+    key = ("http", url.split("/")[2])
+    [connection] = backend.session._idle[key]
+    for _ in range(3):
+        assert backend.open(url)
+    assert backend.session._idle[key] == [connection]
+    # Неизменившаяся страница: условный запрос с ETag получает 304
+    status, validators, page = backend.fetch_if_changed(url, backend.validators())
+    assert status == 304 and page is None and validators['etag'] == backend.page['etag']
+
+
+def test_wait_stats_are_per_backend():
+    first, second = HttpBackend(verbose=False), HttpBackend(verbose=False)
+    first.wait_stats['page_load'] = {'count': 1, 'total': 0.5, 'max': 0.5, 'last': 0.5}
+    assert second.wait_stats == {}
+    first.close()
+    second.close()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Пул драйверов: аренда, замена упавших и старых драйверов, исчерпание и метрики"""
+
+import time
+
+import pytest
+from urllib3.exceptions import MaxRetryError
+
+from driver_pool import DriverPool, PoolTimeout
+
+
+class FakeDriver:
+    """Драйвер без браузера: после kill() запросы завершаются ошибкой соединения"""
+
+    def __init__(self):
+        self.dead = False
+        self.quit_called = False
+        self.cookies_cleared = 0
+        self.url = None
+
+    def kill(self):
+        self.dead = True
+
+    def _check(self):
+        if self.dead:
+            raise MaxRetryError(None, "/session", "Connection refused")
+
+    def execute_script(self, script, *args):
+        self._check()
+        return 1
+
+    def delete_all_cookies(self):
+        self._check()
+        self.cookies_cleared += 1
+
+    def get(self, url):
+        self._check()
+        self.url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Factory:
+    def __init__(self, fail=False):
+        self.started = []
+        self.fail = fail
+
+    def __call__(self):
+        if self.fail:
+            raise OSError("geckodriver не запускается")
+        self.started.append(FakeDriver())
+        return self.started[-1]
+
+
+@pytest.fixture
+def factory():
+    return Factory()
+
+
+def test_lease_and_release_reset_driver(factory):
+    pool = DriverPool(size=2, factory=factory)
+    driver = pool.lease(timeout=5)
+    metrics = pool.metrics()
+    assert metrics['leases'] == 1 and metrics['leased'] == 1
+    pool.release(driver)
+    assert driver.cookies_cleared == 1 and driver.url == "about:blank"
+    with pool.leased(timeout=5) as second:
+        assert not second.dead
+    metrics = pool.metrics()
+    assert metrics['created'] == 2 and metrics['alive'] == 2 and metrics['leased'] == 0
+    assert metrics['leases'] == 2 and metrics['lease_wait_avg'] >= 0
+    pool.close()
+    assert all(driver.quit_called for driver in factory.started)
+
+
+def test_dead_idle_driver_is_replaced_on_lease(factory):
+    pool = DriverPool(size=2, factory=factory)
+    first, second = pool.lease(timeout=5), pool.lease(timeout=5)
+    pool.release(first)
+    pool.release(second)
+    second.kill()
+    leased = [pool.lease(timeout=5), pool.lease(timeout=5)]
+    assert second not in leased and not any(driver.dead for driver in leased)
+    assert second.quit_called
+    metrics = pool.metrics()
+    assert metrics['replaced'] == 1 and metrics['created'] == 3
+    pool.close()
+
+
+def test_driver_failing_reset_is_replaced_on_release(factory):
+    pool = DriverPool(size=1, factory=factory)
+    driver = pool.lease(timeout=5)
+    driver.kill()
+    pool.release(driver)
+    replacement = pool.lease(timeout=5)
+    assert replacement is not driver and pool.metrics()['replaced'] == 1
+    pool.close()
+
+
+def test_expired_driver_is_replaced(factory):
+    pool = DriverPool(size=1, max_lifetime=0.2, factory=factory)
+    old = pool.lease(timeout=5)
+    pool.release(old)
+    time.sleep(0.3)
+    driver = pool.lease(timeout=5)
+    assert driver is not old and old.quit_called
+    assert pool.metrics()['expired'] == 1
+    pool.close()
+
+
+def test_exhausted_pool_times_out(factory):
+    pool = DriverPool(size=1, factory=factory)
+    driver = pool.lease(timeout=5)
+    started = time.monotonic()
+    with pytest.raises(PoolTimeout):
+        pool.lease(timeout=0.1)
+    assert time.monotonic() - started >= 0.1
+    pool.release(driver)
+    assert pool.lease(timeout=0.1) is driver
+    pool.close()
+
+
+def test_pool_without_startable_drivers_fails_fast():
+    pool = DriverPool(size=2, factory=Factory(fail=True))
+    with pytest.raises(PoolTimeout, match="ни один не запускается"):
+        pool.lease(timeout=5)
+    assert pool.metrics()['failed_starts'] == 2
+    pool.close()
+
+
+def test_release_after_close_quits_driver(factory):
+    pool = DriverPool(size=1, factory=factory)
+    driver = pool.lease(timeout=5)
+    pool.close()
+    pool.release(driver)
+    assert driver.quit_called
+    with pytest.raises(PoolTimeout, match="закрыт"):
+        pool.lease(timeout=1)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Замена упавшего драйвера: ошибки запуска, запасной драйвер, фоновая проверка"""
+
+import os
+import shutil
+import signal
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from urllib3.exceptions import MaxRetryError
+
+from dom_zadanie import WikipediaNavigator
+from driver_supervisor import DriverRestartError, DriverSupervisor, driver_processes
+from rate_limiter import RateLimiter
+from wiki_cache import canonical_url
+from wiki_standin import StandinServer
+
+
+class FakeDriver:
+    """Драйвер без браузера: после kill() запросы завершаются ошибкой соединения"""
+
+    def __init__(self):
+        self.dead = False
+        self.quit_called = False
+
+    def kill(self):
+        self.dead = True
+
+    def execute_script(self, script, *args):
+        if self.dead:
+            raise MaxRetryError(None, "/session", "Connection refused")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class Factory:
+    def __init__(self):
+        self.started = []
+        self.fail = False
+
+    def __call__(self):
+        if self.fail:
+            raise OSError("geckodriver не запускается")
+        self.started.append(FakeDriver())
+        return self.started[-1]
+
+
+def test_session_lost_only_for_dead_driver():
+    supervisor = DriverSupervisor(Factory(), watch_interval=0)
+    error = MaxRetryError(None, "/session", "Connection refused")
+    assert not supervisor.session_lost(error)
+    supervisor.driver.kill()
+    assert supervisor.session_lost(error)
+    assert not supervisor.session_lost(NoSuchElementException("p"))
+    supervisor.close()
+
+
+def test_restart_replaces_driver_and_restores():
+    factory = Factory()
+    supervisor = DriverSupervisor(factory, watch_interval=0)
+    dead = supervisor.driver
+    dead.kill()
+    restored = []
+    seconds = supervisor.restart(restored.append)
+    assert supervisor.driver is factory.started[1] and restored == [supervisor.driver]
+    assert seconds >= 0 and supervisor.stats()['restarts'] == 1
+    supervisor.close()
+
+
+def test_failed_restart_keeps_old_driver_and_can_retry():
+    factory = Factory()
+    supervisor = DriverSupervisor(factory, watch_interval=0)
+    dead = supervisor.driver
+    dead.kill()
+    factory.fail = True
+    with pytest.raises(DriverRestartError):
+        supervisor.restart()
+    # Текущим остаётся упавший драйвер, а не None: сбой обнаружится снова
+    assert supervisor.driver is dead and not dead.quit_called
+    assert supervisor.session_lost(MaxRetryError(None, "/session", "refused"))
+    factory.fail = False
+    supervisor.restart()
+    assert supervisor.driver is factory.started[-1] and supervisor.driver is not dead
+    supervisor.close()
+
+
+def test_no_extra_driver_without_standby():
+    factory = Factory()
+    supervisor = DriverSupervisor(factory, watch_interval=0.01)
+    supervisor.driver.kill()
+    time.sleep(0.1)
+    assert len(factory.started) == 1
+    supervisor.close()
+
+
+def test_standby_driver_replaces_dead_one():
+    factory = Factory()
+    supervisor = DriverSupervisor(factory, standby=True, watch_interval=0.01)
+    assert supervisor.wait_spare(5)
+    supervisor.driver.kill()
+    spare = factory.started[1]
+    supervisor.restart()
+    assert supervisor.driver is spare and supervisor.stats()['from_standby'] == 1
+    # Новый запасной запускается в фоне
+    assert supervisor.wait_spare(5)
+    supervisor.close()
+    assert all(driver.quit_called for driver in factory.started[1:])
+
+
+def kill_driver(driver):
+    """Аварийное завершение geckodriver и Firefox, как при сбое"""
+    for pid in driver_processes(driver):
+        if pid:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+
+@pytest.mark.skipif(shutil.which("geckodriver") is None or shutil.which("firefox") is None,
+                    reason="нужны geckodriver и Firefox")
+def test_killed_geckodriver_restores_article_and_position():
+    with StandinServer() as server:
+        nav = WikipediaNavigator(base_url=server.base_url, backend="selenium", fallback=False,
+                                 rate_limiter=RateLimiter(rate=None), verbose=False)
+        try:
+            assert nav.open_article(server.article_url("Тестовая статья"))
+            assert nav.get_article_paragraphs()
+            expected = list(nav.paragraphs)
+            nav.current_paragraph = position = 3
+            url = nav.current_url
+            backend = nav.backend
+            supervisor = backend.supervisor
+            dead = supervisor.driver
+
+            # Посреди чтения процессы драйвера убиты: сбой опознаётся как потеря сессии
+            kill_driver(dead)
+            with pytest.raises(Exception) as error:
+                backend.paragraph_texts()
+            assert supervisor.session_lost(error.value)
+            backend.recover()
+            assert supervisor.driver is not dead
+            assert canonical_url(backend.current_url()) == url
+            assert nav.current_paragraph == position
+
+            # Через навигатор замена происходит сама, чтение повторяется
+            kill_driver(supervisor.driver)
+            _, texts = nav._read_paragraph_texts()
+            assert nav.rules.filter_paragraphs(texts) == expected
+            assert canonical_url(backend.current_url()) == url
+            assert nav.current_paragraph == position
+            assert supervisor.stats()['restarts'] == 2
+        finally:
+            nav.close()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Выгрузка статей: неполные записи, ошибки записи, учёт записанного объёма"""
+
+import pytest
+
+from wiki_crawler import HatnoteCrawler
+from wiki_export import ExportPipeline, JsonlWriter, article_records
+
+
+class FakeNavigator:
+    """Навигатор, у которого статьи из broken не извлекаются"""
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.target = None
+        self.closed = False
+
+    def search_article(self, query):
+        self.target = query
+        return True
+
+    open_article = search_article
+
+    def article_record(self):
+        if self.target in self.broken:
+            return None
+        return {'title': self.target, 'url': f"http://wiki.test/wiki/{self.target}",
+                'paragraphs': [f"Текст статьи {self.target}"], 'links': []}
+
+    def close(self):
+        self.closed = True
+
+
+class FailingWriter:
+    def write(self, records):
+        raise OSError("диск заполнен")
+
+    def close(self):
+        return 0
+
+
+def test_article_records_skip_failed_extraction():
+    records = list(article_records(FakeNavigator(broken={"B"}), ["A", "B", "C"]))
+    assert [record['title'] for record in records] == ["A", "C"]
+
+
+def test_jsonl_bytes_match_file_size(tmp_path):
+    path = tmp_path / "export.jsonl"
+    export = ExportPipeline(JsonlWriter(str(path), append=False), batch_size=2, flush_interval=0.01)
+    export.consume(article_records(FakeNavigator(), ["A", "B", "C"]))
+    export.close()
+    assert export.stats()['articles'] == 3
+    assert export.stats()['bytes'] == path.stat().st_size
+
+
+def test_crawler_closes_navigators_when_writer_fails():
+    navigators = []
+
+    def factory():
+        navigators.append(FakeNavigator())
+        return navigators[-1]
+
+    export = ExportPipeline(FailingWriter(), max_bytes=1, flush_interval=0.01)
+    crawler = HatnoteCrawler(factory, depth=0, workers=2)
+    with pytest.raises(RuntimeError):
+        # Первая статья уходит в очередь, запись падает, следующие submit получают ошибку
+        crawler.crawl([f"Статья {n}" for n in range(20)], export.submit)
+    with pytest.raises(RuntimeError):
+        export.close()
+    assert navigators and all(navigator.closed for navigator in navigators)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Правила извлечения: пакетный отбор параграфов, hatnote, ссылки, файлы правил"""
+
+import json
+import random
+
+import pytest
+
+from extraction_rules import RULES, RuleSet, load_rules, rules_for
+
+BASE = "https://ru.wikipedia.org"
+WORDS = ["Город", "стоит", "на", "реке", "edit", "Source", "EDIT", "↑", "сноска", "ts-main",
+         "editor", "sources", "в", "1990", "году", "Ｅ", "е", "s", "É",
+         # Знак кельвина: в нижнем регистре — латинская k
+         "\u212aILO", "kilo"]
+
+
+def random_paragraphs(rng, count):
+    paragraphs = []
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 12)))
+        if rng.random() < 0.1:
+            text = "↑" + text
+        paragraphs.append(text)
+    return paragraphs
+
+
+@pytest.mark.parametrize("rules", [
+    RULES['ru'],
+    RULES['en'],
+    RuleSet.from_dict('custom', {'paragraph_skip_prefixes': ["См.", "↑"],
+                                 'paragraph_skip_words': ["ПРАВИТЬ", "[1]", "kilo"],
+                                 'paragraph_skip_patterns': [r"^\d{4}\b", r"году$"]}),
+])
+def test_filter_paragraphs_matches_accept_paragraph(rules):
+    rng = random.Random(0)
+    for _ in range(200):
+        texts = random_paragraphs(rng, rng.randint(0, 30))
+        assert rules.filter_paragraphs(texts) == [text for text in texts if rules.accept_paragraph(text)]
+
+
+def test_ru_rules_match_legacy_filter():
+    def legacy(text):
+        return (text and len(text) > 20 and not text.startswith("↑") and
+                "edit" not in text.lower() and "source" not in text.lower())
+
+    rng = random.Random(1)
+    texts = random_paragraphs(rng, 2000)
+    assert RULES['ru'].filter_paragraphs(texts) == [text for text in texts if legacy(text)]
+
+
+def test_filter_paragraphs_accepts_generators():
+    texts = ["Короткий", "Параграф статьи достаточной длины"]
+    assert RULES['ru'].filter_paragraphs(iter(texts)) == texts[1:]
+
+
+def test_hatnote_class_order_and_required_classes():
+    rules = rules_for(BASE)
+    assert rules.is_hatnote("ts-main hatnote navigation-not-searchable")
+    assert rules.is_hatnote("navigation-not-searchable extra ts-main hatnote")
+    assert not rules.is_hatnote("hatnote ts-main")
+    assert not rules.is_hatnote("")
+    assert not rules.is_hatnote(None)
+    assert rules.hatnote_selector() == "div.hatnote.navigation-not-searchable.ts-main"
+
+
+def test_filter_links_keeps_baseline_normalization():
+    raw = [
+        ("  Основная статья: Москва  ", f"{BASE}/wiki/Москва"),
+        ("Основная статья: Москва", f"{BASE}/wiki/Москва_(город)"),
+        ("Основная  статья:\nРоссия", f"{BASE}/wiki/Россия"),
+        ("Основная статья: Правка", f"{BASE}/wiki/Special:Edit"),
+        ("Основная статья: Вне", "https://en.wikipedia.org/wiki/Out"),
+        ("Кор", f"{BASE}/wiki/Кор"),
+        ("Без ссылки", None),
+    ]
+    links = RULES['ru'].filter_links(raw, BASE)
+    # Двойной пробел сохраняется, перевод строки становится пробелом, дубликат по тексту убран
+    assert [link['text'] for link in links] == ["Основная статья: Москва", "Основная  статья: Россия"]
+
+
+@pytest.mark.parametrize("field, value", [
+    ('paragraph_skip_words', ["edit", ""]),
+    ('paragraph_skip_prefixes', [""]),
+    ('link_skip_parts', [""]),
+    ('hatnote_classes', [[]]),
+    ('hatnote_classes', [["hatnote", ""]]),
+])
+def test_empty_rule_strings_are_rejected(tmp_path, field, value):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({field: value}), encoding="utf-8")
+    with pytest.raises(ValueError, match=field):
+        load_rules(str(path))
+
+
+def test_unknown_rule_fields_are_rejected(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({'language': 'xx', 'paragraph_min_lenght': 10}), encoding="utf-8")
+    with pytest.raises(ValueError, match="paragraph_min_lenght"):
+        load_rules(str(path))
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Потоковое чтение параграфов и листание: первые параграфы без чтения всей статьи,
+статья из кэша не ждёт страницу в браузере"""
+
+import itertools
+
+from conftest import FakeBackend
+from dom_zadanie import ParagraphPager, WikipediaNavigator
+from rate_limiter import RateLimiter
+from wiki_cache import ArticleCache
+
+BASE = "http://wiki.test"
+URL = f"{BASE}/wiki/A"
+PARAGRAPHS = [f"Параграф {n} статьи достаточной длины для фильтра" for n in range(5)]
+
+
+def navigator(backend, cache=None):
+    return WikipediaNavigator(base_url=BASE, backend=backend, fallback=False, cache=cache,
+                              rate_limiter=RateLimiter(rate=None), verbose=False)
+
+
+def test_cached_article_streams_without_waiting_for_browser(tmp_path):
+    cache = ArticleCache(str(tmp_path / "cache.sqlite3"))
+    cache.update(URL, title="A", paragraphs=PARAGRAPHS, related_links=[])
+    backend = FakeBackend({}, ready=False)
+    nav = navigator(backend, cache)
+    assert nav.open_article(URL)
+    assert nav._start_paragraph_stream()
+    nav._fill_paragraphs(len(PARAGRAPHS))
+    assert list(nav.paragraphs) == PARAGRAPHS
+    assert backend.waits == 0
+    cache.close()
+
+
+def test_live_page_waits_and_reports_timeout(capsys):
+    backend = FakeBackend({URL: ("A", PARAGRAPHS, [])}, ready=False)
+    nav = navigator(backend)
+    assert nav.open_article(URL)
+    assert not nav._start_paragraph_stream()
+    assert "Страница не загружена" in capsys.readouterr().out
+    backend.ready = True
+    assert nav._start_paragraph_stream()
+    nav._fill_paragraphs(len(PARAGRAPHS))
+    assert list(nav.paragraphs) == PARAGRAPHS
+
+
+LONG = [f"Параграф {n} длинной статьи достаточной длины для фильтра" for n in range(10)]
+
+
+def test_first_paragraphs_come_before_the_rest_is_read():
+    backend = FakeBackend({URL: ("A", LONG, [])})
+    nav = navigator(backend)
+    nav.open_article(URL)
+    stream = nav.iter_article_paragraphs(first_n=3)
+    assert list(itertools.islice(stream, 3)) == LONG[:3]
+    assert backend.paragraph_reads == [(0, 3)]
+    assert list(stream) == LONG[3:]
+    assert backend.paragraph_reads == [(0, 3), (3, None)]
+
+
+def test_short_article_is_read_once_and_filtered():
+    texts = PARAGRAPHS[:2] + ["коротко", ""]
+    backend = FakeBackend({URL: ("A", texts, [])})
+    nav = navigator(backend)
+    nav.open_article(URL)
+    assert list(nav.iter_article_paragraphs(first_n=5)) == PARAGRAPHS[:2]
+    assert backend.paragraph_reads == [(0, 5)]
+
+
+def pager_session(monkeypatch, nav, keys):
+    keys = iter(keys)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(keys))
+    nav.clear_screen = lambda: None
+    nav.display_paragraphs()
+
+
+def test_pager_reads_on_demand_and_keeps_position(monkeypatch, capsys):
+    backend = FakeBackend({URL: ("A", LONG, [])})
+    nav = navigator(backend)
+    nav.open_article(URL)
+    # Вперёд, назад, вперёд дважды и выход: до конца потока дело не дошло
+    pager_session(monkeypatch, nav, ["", "2", "", "", "4"])
+    out = capsys.readouterr().out
+    assert nav.current_paragraph == 2
+    # Общее число параграфов неизвестно, пока поток не дочитан
+    assert "Параграф 1/1+:" in out and "Параграф 3/3+:" in out
+    assert backend.paragraph_reads == [(0, 3)]
+    assert nav._paragraph_stream is not None
+
+
+def test_pager_stops_at_the_end(monkeypatch, capsys):
+    backend = FakeBackend({URL: ("A", PARAGRAPHS[:4], [])})
+    nav = navigator(backend)
+    nav.open_article(URL)
+    pager_session(monkeypatch, nav, ["2", "", "", "x", ""])
+    out = capsys.readouterr().out
+    assert "Вы уже в начале статьи" in out
+    assert "Параграф 4/4+:" in out
+    assert "Достигнут конец статьи" in out
+    assert nav.current_paragraph == 4 and list(nav.paragraphs) == PARAGRAPHS[:4]
+
+
+def test_pager_wraps_each_paragraph_once_per_width():
+    wraps = []
+
+    def wrap(text, width):
+        wraps.append((text, width))
+        return text
+
+    pager = ParagraphPager("Заголовок", wrap)
+    first = pager.render(0, "текст", 1)
+    assert pager.render(0, "текст", 1) == first
+    assert wraps == [("текст", pager.width() - 2)]
+    assert pager.header(60) is pager.header(60)
+    assert "Заголовок" in pager.header(60)
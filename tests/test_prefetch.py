@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Предзагрузка: открытая статья не загружается второй раз"""
+
+import pytest
+
+from dom_zadanie import WikipediaNavigator
+from rate_limiter import RateLimiter
+from wiki_cache import ArticleCache
+from wiki_standin import StandinServer, SyntheticGraph
+
+
+@pytest.fixture
+def standin():
+    graph = SyntheticGraph(pages=50, fanout=3)
+    with StandinServer(graph=graph) as server:
+        yield server, graph
+
+
+def navigator(server, cache=None):
+    return WikipediaNavigator(base_url=server.base_url, backend="http", fallback=False, cache=cache,
+                              rate_limiter=RateLimiter(rate=None), prefetch_workers=2, verbose=False)
+
+
+def path(title):
+    return "/wiki/" + title.replace(" ", "_")
+
+
+def wait_prefetched(nav, server, titles):
+    for title in titles:
+        assert nav.prefetcher.get(server.article_url(title), timeout=5)
+
+
+def test_each_navigation_requests_the_article_once(standin):
+    server, graph = standin
+    nav = navigator(server)
+    try:
+        assert nav.open_article(server.article_url(graph.title(0)))
+        wait_prefetched(nav, server, graph.targets(0))
+        assert server.paths_served[path(graph.title(0))] == 1
+        # Переход на предзагруженную статью обходится без запроса
+        target = graph.targets(0)[0]
+        assert nav.open_article(server.article_url(target))
+        wait_prefetched(nav, server, graph.targets(graph.number(target)))
+        assert server.paths_served[path(target)] == 1
+        assert all(count == 1 for count in server.paths_served.values())
+    finally:
+        nav.close()
+
+
+def test_cached_article_is_not_requested_again(standin, tmp_path):
+    server, graph = standin
+    cache = ArticleCache(str(tmp_path / "cache.sqlite3"))
+    first = navigator(server, cache)
+    assert first.open_article(server.article_url(graph.title(0)))
+    first.close()
+    nav = navigator(server, cache)
+    try:
+        assert nav.open_article(server.article_url(graph.title(0)))
+        # Основные статьи берутся из записи кэша, сама статья не запрашивается
+        wait_prefetched(nav, server, graph.targets(0))
+        assert server.paths_served[path(graph.title(0))] == 1
+    finally:
+        nav.close()
+        cache.close()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Token bucket: всплеск, скорость пополнения, бюджеты хостов, общий файл состояния"""
+
+import multiprocessing
+
+from rate_limiter import RateLimiter
+
+
+class Clock:
+    """Время, которое сдвигается только вручную"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def fixed_clock():
+    return 1000.0
+
+
+def test_burst_then_queue_at_rate():
+    clock = Clock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    assert [limiter.reserve("wiki") for _ in range(5)] == [0, 0, 0, 0.5, 1.0]
+    # За секунду пополняются два жетона, но очередь ещё не разобрана
+    clock.now += 1
+    assert limiter.reserve("wiki") == 0.5
+    clock.now += 10
+    assert limiter.reserve("wiki") == 0
+
+
+def test_bucket_never_exceeds_burst():
+    clock = Clock()
+    limiter = RateLimiter(rate=1, burst=2, clock=clock)
+    clock.now += 3600
+    assert [limiter.reserve("wiki") for _ in range(3)] == [0, 0, 1.0]
+
+
+def test_hosts_have_separate_budgets():
+    limiter = RateLimiter(rate=1, burst=1, per_host={"fast": (10, 1), "free": (None, 0)},
+                          clock=Clock())
+    assert [limiter.reserve("slow") for _ in range(2)] == [0, 1.0]
+    assert [limiter.reserve("fast") for _ in range(2)] == [0, 0.1]
+    assert [limiter.reserve("free") for _ in range(3)] == [0, 0, 0]
+    assert [limiter.reserve("other") for _ in range(2)] == [0, 1.0]
+    stats = limiter.stats()
+    assert stats["slow"] == {'acquired': 2, 'delayed': 1, 'wait_total': 1.0, 'wait_max': 1.0}
+    assert stats["free"]['delayed'] == 0
+
+
+def test_unlimited_rate_never_waits():
+    limiter = RateLimiter(rate=None, clock=Clock())
+    assert all(limiter.acquire("wiki") == 0 for _ in range(100))
+
+
+def test_state_file_is_shared_between_limiters(tmp_path):
+    path = str(tmp_path / "rate.json")
+    clock = Clock()
+    first = RateLimiter(rate=1, burst=1, state_file=path, clock=clock)
+    second = RateLimiter(rate=1, burst=1, state_file=path, clock=clock)
+    assert [first.reserve("wiki"), second.reserve("wiki"), first.reserve("wiki")] == [0, 1.0, 2.0]
+    clock.now += 3
+    assert second.reserve("wiki") == 0
+
+
+def reserve_in_process(path, count, results):
+    limiter = RateLimiter(rate=1, burst=2, state_file=path, clock=fixed_clock)
+    results.put([limiter.reserve("wiki") for _ in range(count)])
+
+
+def test_state_file_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / "rate.json")
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=reserve_in_process, args=(path, 5, results))
+                 for _ in range(2)]
+    for process in processes:
+        process.start()
+    delays = results.get(timeout=30) + results.get(timeout=30)
+    for process in processes:
+        process.join(timeout=30)
+        assert process.exitcode == 0
+    # Каждый жетон выдан ровно одному процессу: под блокировкой файла очередь общая
+    assert sorted(delays) == [0, 0] + [float(n) for n in range(1, 9)]
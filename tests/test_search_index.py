@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Поисковый индекс: обновление и удаление статей"""
+
+from search_index import SearchIndex, tokenize
+
+A = "http://wiki.test/wiki/A"
+B = "http://wiki.test/wiki/B"
+
+
+def vocabulary(index):
+    return {term for (term,) in index._db.execute("SELECT term FROM terms")}
+
+
+def test_reindexed_article_leaves_no_orphan_terms(tmp_path):
+    index = SearchIndex(str(tmp_path / "index.sqlite3"))
+    index.add_article(A, "Кошки", ["Домашняя кошка любит молоко"])
+    index.add_article(B, "Собаки", ["Собака охраняет дом"])
+    index.add_article(A, "Кошки", ["Кошка ловит мышей"])
+    expected = set(tokenize("Кошки Кошка ловит мышей Собаки Собака охраняет дом"))
+    assert vocabulary(index) == expected
+    assert [hit['url'] for hit in index.search("мыши")] == [A]
+    assert index.search("молоко") == []
+
+
+def test_removed_article_takes_only_its_own_terms(tmp_path):
+    index = SearchIndex(str(tmp_path / "index.sqlite3"))
+    index.add_article(A, "Кошки", ["Кошка и собака"])
+    index.add_article(B, "Собаки", ["Собака охраняет дом"])
+    assert index.remove_article(A)
+    assert vocabulary(index) == set(tokenize("Собаки Собака охраняет дом"))
+    assert [hit['url'] for hit in index.search("собака")] == [B]
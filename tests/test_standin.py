@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Запись страниц для стенда"""
+
+import os
+
+from wiki_standin import StandinServer, page_filename, record_pages
+
+ARTICLE = """<html><body>
+<h1 id="firstHeading">{title}</h1>
+<div id="mw-content-text">
+<div class="hatnote navigation-not-searchable ts-main">Основная статья без ссылки</div>
+<div class="hatnote navigation-not-searchable ts-main">Основная статья: <a href="/wiki/B">B</a></div>
+<p>Параграф статьи достаточной длины для фильтра.</p>
+</div></body></html>"""
+
+
+def test_record_follows_hatnotes_and_skips_ones_without_link(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    for title in ("A", "B"):
+        (source / page_filename(title)).write_text(ARTICLE.format(title=title), encoding="utf-8")
+    target = tmp_path / "saved"
+    with StandinServer(pages_dir=str(source), synthetic=False) as server:
+        record_pages(str(target), titles=["A"], follow_hatnotes=True, base_url=server.base_url, rate=0)
+    assert os.path.exists(target / page_filename("A"))
+    assert os.path.exists(target / page_filename("B"))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Индекс заголовков: построение, точный поиск, префиксы и перенаправления"""
+
+import gzip
+
+import pytest
+
+from title_index import TitleIndex, build_index, normalize_title
+
+TITLES = ["page title", "Москва", "Московская_область", "Ёж", "Еж_(значение)",
+          "Санкт-Петербург", "Питер", "Москва_(река)"]
+REDIRECTS = ["Питер\tСанкт-Петербург", "МСК\tМосква"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    titles = tmp_path / "titles.gz"
+    with gzip.open(titles, "wt", encoding="utf-8") as f:
+        f.write("\n".join(TITLES) + "\n")
+    redirects = tmp_path / "redirects.tsv"
+    redirects.write_text("\n".join(REDIRECTS) + "\n", encoding="utf-8")
+    path = str(tmp_path / "titles.idx")
+    assert build_index(str(titles), path, str(redirects)) == 8
+    index = TitleIndex(path)
+    yield index
+    index.close()
+
+
+def test_normalize_title():
+    assert normalize_title("  Ёжик_в   тумане ") == "ежик в тумане"
+
+
+def test_lookup_is_exact_after_normalization(index):
+    assert len(index) == 8
+    assert index.lookup("москва") == "Москва"
+    assert index.lookup("ЕЖ") == "Ёж"
+    assert index.lookup("московская область") == "Московская область"
+    assert index.lookup("моск") is None
+    assert index.lookup("яблоко") is None
+
+
+def test_prefix_is_sorted_and_limited(index):
+    assert index.prefix("моск") == ["Москва", "Москва (река)", "Московская область"]
+    assert index.prefix("моск", limit=1) == ["Москва"]
+    assert index.prefix("яб") == []
+
+
+def test_redirect_overrides_title_entry(index):
+    assert index.lookup("Питер") == "Санкт-Петербург"
+    assert index.lookup("мск") == "Москва"
+
+
+def test_resolve_falls_back_to_prefix_only_on_request(index):
+    assert index.resolve("москва") == "Москва"
+    assert index.resolve("санкт-петер") is None
+    assert index.resolve("санкт-петер", prefix=True) == "Санкт-Петербург"
+    # Неоднозначный префикс не разрешается никогда
+    assert index.resolve("моск", prefix=True) is None
+
+
+def test_not_an_index(tmp_path):
+    path = tmp_path / "broken.idx"
+    path.write_bytes(b"NOTANIDX" + bytes(8))
+    with pytest.raises(ValueError):
+        TitleIndex(str(path))
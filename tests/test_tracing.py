@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Запись трассы во время работы"""
+
+import json
+
+from tracing import Tracer
+
+
+def read_spans(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_reach_disk_before_close(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    tracer = Tracer(path, flush_interval=3600)
+    with tracer.span("open_article"):
+        with tracer.span("webdriver.get"):
+            pass
+        # Вложенный интервал ждёт сброса до конца внешнего
+        assert read_spans(path) == []
+    assert [span['name'] for span in read_spans(path)] == ["webdriver.get", "open_article"]
+    tracer.close()
+
+
+def test_nested_spans_flushed_by_interval(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    tracer = Tracer(path, flush_interval=0)
+    with tracer.span("crawl"):
+        with tracer.span("open_article", url="A"):
+            pass
+        assert [span['name'] for span in read_spans(path)] == ["open_article"]
+    tracer.close()
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Контрольная точка массового извлечения: продолжение прерванного запуска"""
+
+import json
+
+import pytest
+
+from wiki_bulk import BulkExtractor, load_checkpoint, valid_record
+from wiki_standin import StandinServer, SyntheticGraph
+
+
+@pytest.fixture
+def standin():
+    graph = SyntheticGraph(pages=20)
+    with StandinServer(graph=graph) as server:
+        yield server, graph
+
+
+def options(base_url):
+    return {'base_url': base_url, 'backend': 'http', 'rate': 0, 'burst': 5, 'rate_state': None,
+            'title_index': None, 'rules': None}
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def record(query):
+    return {'query': query, 'title': query, 'url': f"http://wiki.test/wiki/{query}",
+            'paragraphs': ["Параграф достаточной длины для фильтра"], 'links': []}
+
+
+def test_checkpoint_skips_incomplete_records_and_truncates_partial_line(tmp_path):
+    path = tmp_path / "articles.jsonl"
+    lines = [json.dumps(record("A")), json.dumps(dict(record("B"), paragraphs=[]))]
+    path.write_text("\n".join(lines) + '\n{"query": "C", "tit', encoding="utf-8")
+    assert load_checkpoint(str(path)) == {"A"}
+    assert path.read_text(encoding="utf-8").endswith("\n")
+    assert not valid_record(None)
+
+
+def test_resume_extracts_only_missing_titles(standin, tmp_path):
+    server, graph = standin
+    titles = [graph.title(n) for n in range(6)] + ["Нет такой статьи"]
+    output = tmp_path / "articles.jsonl"
+    failed = tmp_path / "articles.jsonl.failed"
+    # Прерванный запуск: одна полная запись, одна неполная и недописанная строка
+    output.write_text(json.dumps(record(titles[0]), ensure_ascii=False) + "\n" +
+                      json.dumps(dict(record(titles[1]), paragraphs=[]), ensure_ascii=False) +
+                      "\n" + '{"query": "обрыв', encoding="utf-8")
+
+    extractor = BulkExtractor(options(server.base_url), workers=2, chunk_size=2)
+    extractor.run(titles, str(output), str(failed))
+
+    assert extractor.skipped == 1
+    assert extractor.extracted == 5
+    assert extractor.failed == 1
+    records = read_records(output)
+    # После двух строк прерванного запуска дописаны только полные записи
+    assert all(valid_record(item) for item in records[2:])
+    assert {item['query'] for item in records if valid_record(item)} == set(titles[:6])
+    assert failed.read_text(encoding="utf-8").startswith("Нет такой статьи\t")
+
+    # Повторный запуск ничего не извлекает заново
+    again = BulkExtractor(options(server.base_url), workers=1)
+    again.run(titles[:6], str(output))
+    assert again.skipped == 6 and again.extracted == 0
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Дисковый кэш статей: срок жизни и вытеснение давно не использованных"""
+
+import time
+
+from wiki_cache import ArticleCache
+
+A = "http://wiki.test/wiki/A"
+B = "http://wiki.test/wiki/B"
+C = "http://wiki.test/wiki/C"
+
+
+def test_expired_entry_is_a_miss_but_kept_for_revalidation(tmp_path):
+    cache = ArticleCache(str(tmp_path / "cache.sqlite3"), ttl=3600)
+    cache.update(A, title="A", paragraphs=["текст"])
+    assert cache.get(A)['title'] == "A"
+    cache.ttl = -1
+    assert cache.get(A) is None
+    assert cache.stats()['stale'] == 1
+    assert cache.get_stale(A)['paragraphs'] == ["текст"]
+    cache.mark_fresh(A, revision=7)
+    cache.ttl = 3600
+    assert cache.get(A)['revision'] == 7
+    cache.close()
+
+
+def test_expired_fields_are_not_mixed_with_new_ones(tmp_path):
+    cache = ArticleCache(str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.update(A, title="A", paragraphs=["старый текст"])
+    cache.update(A, title="A")
+    assert 'paragraphs' not in cache.get_stale(A)
+    cache.close()
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ArticleCache(str(tmp_path / "cache.sqlite3"))
+    cache.update(A, title="A", paragraphs=["а" * 200])
+    entry_bytes = cache.stats()['bytes']
+    cache.max_bytes = entry_bytes * 2 + entry_bytes // 2
+    cache.update(B, title="B", paragraphs=["б" * 200])
+    time.sleep(0.01)
+    cache.add_alias("запрос A", A)
+    assert cache.get(A) is not None
+    cache.update(C, title="C", paragraphs=["в" * 200])
+    assert cache.get_stale(B) is None
+    assert cache.get(A) is not None and cache.get(C) is not None
+    assert cache.resolve("запрос A") == A
+    stats = cache.stats()
+    assert stats['evictions'] == 1 and stats['entries'] == 2
+    assert cache._total == stats['bytes']
+    cache.close()
+
+
+def test_size_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ArticleCache(path)
+    cache.update(A, title="A", paragraphs=["а" * 200])
+    cache.update(A, title="A", paragraphs=["а" * 100])
+    size = cache.stats()['bytes']
+    assert cache._total == size
+    cache.close()
+    assert ArticleCache(path)._total == size
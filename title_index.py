@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Компактный индекс заголовков статей для поиска без загрузки страниц
+Строится заранее из дампа заголовков Википедии (ruwiki-latest-all-titles-in-ns0.gz)
+и открывается через mmap, поэтому миллионы заголовков доступны сразу после запуска
+
+Построение: python title_index.py build ruwiki-latest-all-titles-in-ns0.gz titles.idx [--redirects redirects.tsv]
+Проверка:   python title_index.py lookup titles.idx "москва"
+"""
+
+import argparse
+import gzip
+import mmap
+import struct
+
+
+# Формат файла: сигнатура, число записей, таблица смещений (count + 1 чисел uint64),
+# затем записи «ключ\tзаголовок\n», отсортированные по байтам ключа в UTF-8
+MAGIC = b"WTITLE01"
+HEADER = struct.Struct("<8sQ")
+OFFSET = struct.Struct("<Q")
+
+
+def normalize_title(text):
+    """Ключ поиска: без учёта регистра, «_» как пробел, «ё» как «е», единичные пробелы"""
+    return " ".join(text.replace("_", " ").casefold().replace("ё", "е").split())
+
+
+def _open_text(path):
+    """Открытие текстового дампа, в том числе сжатого gzip"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def build_index(titles_path, index_path, redirects_path=None):
+    """Построение индекса из файла заголовков (по одному в строке) и перенаправлений (источник\\tцель)"""
+    entries = {}
+    with _open_text(titles_path) as f:
+        for line in f:
+            title = line.rstrip("\n").replace("_", " ").strip()
+            if not title or title == "page title":
+                continue
+            key = normalize_title(title)
+            # При совпадении ключей (регистр, «ё») оставляем первый заголовок
+            entries.setdefault(key, title)
+
+    if redirects_path:
+        with _open_text(redirects_path) as f:
+            for line in f:
+                source, _, target = line.rstrip("\n").partition("\t")
+                if target:
+                    # Страница-перенаправление есть и в дампе заголовков: ведём на цель
+                    entries[normalize_title(source)] = target.replace("_", " ").strip()
+
+    records = sorted(
+        (key.encode("utf-8"), title.encode("utf-8")) for key, title in entries.items()
+    )
+    with open(index_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, len(records)))
+        offset = 0
+        offsets = bytearray()
+        for key, title in records:
+            offsets += OFFSET.pack(offset)
+            offset += len(key) + len(title) + 2
+        offsets += OFFSET.pack(offset)
+        out.write(offsets)
+        for key, title in records:
+            out.write(key + b"\t" + title + b"\n")
+    return len(records)
+
+
+class TitleIndex:
+    """Индекс заголовков, отображённый в память: точный поиск и поиск по префиксу"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: не индекс заголовков")
+        self._offsets_at = HEADER.size
+        self._data_at = self._offsets_at + (self.count + 1) * OFFSET.size
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, i):
+        """Ключ и заголовок записи с номером i"""
+        start = OFFSET.unpack_from(self._mm, self._offsets_at + i * OFFSET.size)[0]
+        end = OFFSET.unpack_from(self._mm, self._offsets_at + (i + 1) * OFFSET.size)[0]
+        record = self._mm[self._data_at + start:self._data_at + end - 1]
+        key, _, title = record.partition(b"\t")
+        return key, title
+
+    def _lower_bound(self, key):
+        """Номер первой записи с ключом не меньше key"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def lookup(self, text):
+        """Заголовок статьи по точному (нормализованному) совпадению или None"""
+        key = normalize_title(text).encode("utf-8")
+        i = self._lower_bound(key)
+        if i < self.count:
+            found, title = self._record(i)
+            if found == key:
+                return title.decode("utf-8")
+        return None
+
+    def prefix(self, text, limit=10):
+        """Заголовки, ключ которых начинается с text"""
+        key = normalize_title(text).encode("utf-8")
+        titles = []
+        i = self._lower_bound(key)
+        while i < self.count and len(titles) < limit:
+            found, title = self._record(i)
+            if not found.startswith(key):
+                break
+            titles.append(title.decode("utf-8"))
+            i += 1
+        return titles
+
+    def resolve(self, query, prefix=False):
+        """Заголовок для запроса: точное (нормализованное) совпадение или None
+
+        prefix=True — при промахе ещё и единственный заголовок, начинающийся с запроса.
+        По умолчанию выключено: опечатка или неполный заголовок должны попасть в форму
+        поиска, а не в случайную статью с таким началом.
+        """
+        title = self.lookup(query)
+        if title is None and prefix:
+            candidates = self.prefix(query, limit=2)
+            if len(candidates) == 1:
+                title = candidates[0]
+        return title
+
+    def close(self):
+        """Закрытие отображения файла"""
+        self._mm.close()
+        self._file.close()
+
+
+def main():
+    """Построение индекса и проверочный поиск из командной строки"""
+    parser = argparse.ArgumentParser(description="Индекс заголовков статей Википедии")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="построить индекс из дампа заголовков")
+    build.add_argument("titles", help="файл заголовков (можно .gz)")
+    build.add_argument("index", help="файл индекса")
+    build.add_argument("--redirects", help="перенаправления: источник<TAB>цель (можно .gz)")
+    lookup = commands.add_parser("lookup", help="найти заголовок в индексе")
+    lookup.add_argument("index")
+    lookup.add_argument("query")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_index(args.titles, args.index, args.redirects)
+        print(f"✅ В индексе заголовков: {count}")
+    else:
+        index = TitleIndex(args.index)
+        print(f"🔎 Точное совпадение: {index.lookup(args.query)}")
+        for title in index.prefix(args.query):
+            print(f"   {title}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
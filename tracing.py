@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Инструментирование навигатора: интервалы операций, запросы к WebDriver и экспорт
+Интервалы пишутся в трассу JSON Lines, сводные метрики — в текстовый файл
+в формате Prometheus (для textfile collector node_exporter)
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Сбор интервалов (span) с вложенностью по потокам и сводной статистикой по именам"""
+
+    def __init__(self, trace_path=None, metrics_path=None, metrics_interval=5.0, flush_interval=1.0):
+        """trace_path — трасса JSON Lines, metrics_path — файл метрик Prometheus
+
+        Трасса сбрасывается на диск после каждого интервала верхнего уровня и не реже чем
+        раз в flush_interval секунд (0 — после каждого интервала): её можно читать во время
+        работы, а при аварийном завершении теряются только последние интервалы.
+        """
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self.flush_interval = flush_interval
+        self._trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+        self._stats = {}
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._metrics_written = 0.0
+        self._trace_flushed = time.monotonic()
+
+    def _stack(self):
+        """Открытые интервалы текущего потока"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Интервал операции name; вложенные интервалы ссылаются на родителя"""
+        stack = self._stack()
+        span_id = next(self._ids)
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        start = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            stack.pop()
+            self._finish(name, start, time.perf_counter() - started, span_id, parent_id, error, attrs)
+
+    def record(self, name, duration, **attrs):
+        """Уже измеренное событие (например, запрос к драйверу) как дочерний интервал"""
+        stack = self._stack()
+        self._finish(name, time.time() - duration, duration, next(self._ids),
+                     stack[-1] if stack else None, None, attrs)
+
+    def _finish(self, name, start, duration, span_id, parent_id, error, attrs):
+        """Учёт интервала в статистике и запись в трассу"""
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0})
+            stats['count'] += 1
+            stats['total'] += duration
+            stats['max'] = max(stats['max'], duration)
+            if error:
+                stats['errors'] += 1
+            if self._trace is not None:
+                event = {'name': name, 'span_id': span_id, 'parent_id': parent_id,
+                         'thread': threading.current_thread().name,
+                         'start': start, 'duration': duration}
+                if error:
+                    event['error'] = error
+                if attrs:
+                    event['attrs'] = attrs
+                self._trace.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+                if parent_id is None or time.monotonic() - self._trace_flushed >= self.flush_interval:
+                    self._trace.flush()
+                    self._trace_flushed = time.monotonic()
+            write_metrics = (self.metrics_path is not None and
+                             time.monotonic() - self._metrics_written >= self.metrics_interval)
+        if write_metrics:
+            self.write_metrics()
+
+    def stats(self):
+        """Сводная статистика: {имя: {'count', 'errors', 'total', 'max'}}"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def prometheus_text(self):
+        """Метрики в текстовом формате Prometheus"""
+        lines = [
+            "# HELP wiki_span_seconds Время операций навигатора и запросов к WebDriver",
+            "# TYPE wiki_span_seconds summary",
+        ]
+        maxima = [
+            "# HELP wiki_span_seconds_max Наибольшее время операции",
+            "# TYPE wiki_span_seconds_max gauge",
+        ]
+        errors = [
+            "# HELP wiki_span_errors_total Операции, завершившиеся исключением",
+            "# TYPE wiki_span_errors_total counter",
+        ]
+        for name, stats in sorted(self.stats().items()):
+            label = '{span="%s"}' % name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f"wiki_span_seconds_count{label} {stats['count']}")
+            lines.append(f"wiki_span_seconds_sum{label} {stats['total']:.6f}")
+            maxima.append(f"wiki_span_seconds_max{label} {stats['max']:.6f}")
+            errors.append(f"wiki_span_errors_total{label} {stats['errors']}")
+        return "\n".join(lines + maxima + errors) + "\n"
+
+    def write_metrics(self):
+        """Атомарная перезапись файла метрик (читатель не увидит файл наполовину)"""
+        if self.metrics_path is None:
+            return
+        self._metrics_written = time.monotonic()
+        temp_path = f"{self.metrics_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, self.metrics_path)
+
+    def close(self):
+        """Запись итоговых метрик и закрытие трассы"""
+        self.write_metrics()
+        with self._lock:
+            if self._trace is not None:
+                self._trace.close()
+                self._trace = None
+
+
+def traced(name):
+    """Декоратор метода: вызов выполняется внутри интервала self.tracer.span(name)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instrument_driver(driver, tracer):
+    """Учёт каждого запроса к WebDriver: число и время по командам (webdriver.<команда>)"""
+    driver._tracer = tracer
+    if getattr(driver, '_instrumented', False):
+        return driver
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        started = time.perf_counter()
+        try:
+            return original_execute(driver_command, params)
+        finally:
+            driver._tracer.record(f"webdriver.{driver_command}", time.perf_counter() - started)
+
+    driver.execute = execute
+    driver._instrumented = True
+    return driver
@@ -0,0 +1,869 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Источники страниц для WikipediaNavigator
+SeleniumBackend — headless Firefox, HttpBackend — прямые HTTP-запросы без браузера
+"""
+
+import gzip
+import hashlib
+import http.client
+import os
+import re
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+from urllib.parse import quote, urlencode, urljoin, urlsplit
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.firefox.options import Options
+from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+from tracing import Tracer, instrument_driver
+from driver_supervisor import DriverSupervisor
+from extraction_rules import rules_for
+
+
+# Скрипт для сбора всех hatnote за один запрос к драйверу: arguments[0] — CSS-селектор
+# hatnote-блоков из правил извлечения; возвращает количество div на странице и пары [текст, ссылка]
+HATNOTES_SCRIPT = """
+var divs = document.getElementsByTagName('div');
+var hatnotes = document.querySelectorAll(arguments[0]);
+var items = [];
+for (var i = 0; i < hatnotes.length; i++) {
+    var div = hatnotes[i];
+    var link = div.getElementsByTagName('a')[0];
+    items.push([div.innerText || '', link ? link.href : null]);
+}
+return {count: divs.length, items: items};
+"""
+
+# Скрипт для чтения текста параграфов статьи за один запрос к драйверу:
+# arguments[0] и arguments[1] задают диапазон параграфов [start, end)
+PARAGRAPHS_SCRIPT = """
+var content = document.getElementById('mw-content-text');
+if (!content) {
+    return null;
+}
+var ps = content.getElementsByTagName('p');
+var start = arguments[0] || 0;
+var end = arguments[1] == null ? ps.length : Math.min(arguments[1], ps.length);
+var texts = [];
+for (var i = start; i < end; i++) {
+    texts.push(ps[i].innerText || '');
+}
+return {total: ps.length, texts: texts};
+"""
+
+# Скрипт проверки готовности страницы: состояние документа и наличие контента статьи
+READY_SCRIPT = "return [document.readyState, !!document.getElementById(arguments[0])];"
+
+# Объём переданных данных для текущей страницы (Navigation и Resource Timing):
+# [байт по сети, число загруженных ресурсов]; ресурсы из кэша дают 0 байт
+PAGE_WEIGHT_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var bytes = 0;
+for (var i = 0; i < entries.length; i++) {
+    bytes += entries[i].transferSize || 0;
+}
+return [bytes, entries.length];
+"""
+
+# Экономный профиль Firefox: нужен только текст статьи, поэтому без картинок,
+# веб-шрифтов, медиа, предзагрузок и фоновых обращений браузера к своим сервисам
+LEAN_PREFS = {
+    "permissions.default.image": 2,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+    "media.autoplay.default": 5,
+    "media.mediasource.enabled": False,
+    "media.navigator.enabled": False,
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.http.speculative-parallel-limit": 0,
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.startup.page": 0,
+    "browser.newtabpage.enabled": False,
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "browser.safebrowsing.downloads.enabled": False,
+    "app.update.auto": False,
+    "extensions.update.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "toolkit.telemetry.enabled": False,
+}
+
+# Хосты, запросы к которым в экономном профиле не выполняются: картинки и медиа,
+# аналитика, баннеры и межсайтовая авторизация Викимедиа
+LEAN_BLOCKED_HOSTS = (
+    "upload.wikimedia.org",
+    "intake-analytics.wikimedia.org",
+    "meta.wikimedia.org",
+    "login.wikimedia.org",
+    "auth.wikimedia.org",
+    "maps.wikimedia.org",
+)
+
+# С eager-стратегией драйвер возвращается после разбора HTML, не дожидаясь ресурсов
+LEAN_READY_STATES = ("interactive", "complete")
+
+# Номер правки статьи в конфигурации страницы (RLCONF)
+REVISION_RE = re.compile(r'"wgRevisionId":\s*(\d+)')
+
+# Скрипт получения номера правки открытой в браузере статьи
+REVISION_SCRIPT = "return window.mw ? mw.config.get('wgRevisionId') : null;"
+
+# Начало раздела второго уровня (в новой разметке заголовок обёрнут в div.mw-heading)
+SECTION_RE = re.compile(r'(?:<div class="mw-heading mw-heading2[^"]*">\s*)?<h2[\s>]')
+
+# Пробельные символы HTML (неразрывный пробел к ним не относится)
+HTML_SPACE_RE = re.compile(r"[ \t\n\r\f]+")
+
+# Заголовок User-Agent для HTTP-режима (Википедия требует осмысленный UA)
+USER_AGENT = "WikipediaNavigator/1.0 (PS04 Selenium educational project)"
+
+
+class BackendError(Exception):
+    """Сбой источника страниц (сеть, неожиданный ответ сервера)"""
+
+
+class WaitPolicy:
+    """Параметры ожидания готовности страницы"""
+
+    def __init__(self, timeout=15, poll_frequency=0.1, ready_states=("complete",),
+                 content_id="mw-content-text"):
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        # Допустимые значения document.readyState
+        self.ready_states = tuple(ready_states)
+        # Элемент, появление которого означает, что контент статьи доступен
+        self.content_id = content_id
+
+
+def _blocking_pac(hosts):
+    """PAC-скрипт, отправляющий запросы к hosts на несуществующий прокси (запрос сразу падает)"""
+    condition = " || ".join(f'dnsDomainIs(host, "{host}")' for host in hosts)
+    script = ("function FindProxyForURL(url, host) {"
+              f" if ({condition}) return 'PROXY 127.0.0.1:9'; return 'DIRECT'; }}")
+    return "data:application/x-ns-proxy-autoconfig," + quote(script)
+
+
+def create_firefox_driver(lean=False, profile_dir=None):
+    """Запуск Firefox в headless режиме
+
+    lean — экономный режим: без картинок, шрифтов и медиа, eager-загрузка страниц
+    (ожидание с LEAN_READY_STATES) и блокировка LEAN_BLOCKED_HOSTS.
+    profile_dir — постоянный каталог профиля, который используется повторно вместо
+    создания нового профиля при каждом запуске (один каталог — один браузер одновременно).
+    """
+    firefox_options = Options()
+    firefox_options.add_argument("--headless")
+    firefox_options.add_argument("--width=1920")
+    firefox_options.add_argument("--height=1080")
+    if lean:
+        firefox_options.page_load_strategy = "eager"
+        for name, value in LEAN_PREFS.items():
+            firefox_options.set_preference(name, value)
+        firefox_options.set_preference("network.proxy.type", 2)
+        firefox_options.set_preference("network.proxy.autoconfig_url", _blocking_pac(LEAN_BLOCKED_HOSTS))
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        # Профиль передаётся самому Firefox, и geckodriver не копирует его во временный каталог
+        firefox_options.add_argument("-profile")
+        firefox_options.add_argument(os.path.abspath(profile_dir))
+    return webdriver.Firefox(options=firefox_options)
+
+
+class ArticleBackend:
+    """Интерфейс источника страниц: навигация и чтение содержимого текущей статьи"""
+
+    name = "base"
+
+    def __init__(self, verbose=True):
+        # Вывод сообщений о ходе работы
+        self.verbose = verbose
+        # Время ожиданий по видам: {'page_load': {'count', 'total', 'max', 'last'}},
+        # у каждого источника своё
+        self.wait_stats = {}
+
+    def log(self, message):
+        """Сообщение о ходе работы (только в подробном режиме)"""
+        if self.verbose:
+            print(message)
+
+    def open(self, url):
+        """Переход по адресу, True если страница загрузилась"""
+        raise NotImplementedError
+
+    def search(self, query, base_url):
+        """Поиск статьи по запросу, True если открыта страница статьи"""
+        raise NotImplementedError
+
+    def wait_for_page_load(self):
+        """Ожидание готовности текущей страницы"""
+        return True
+
+    def current_url(self):
+        """Адрес текущей страницы"""
+        raise NotImplementedError
+
+    def validators(self):
+        """Номер правки, ETag и Last-Modified текущей страницы (что известно)"""
+        return {}
+
+    def parsed_page(self):
+        """Разобранная текущая страница (parse_wiki_page), если источник её хранит"""
+        return None
+
+    def title(self):
+        """Заголовок текущей статьи (#firstHeading)"""
+        raise NotImplementedError
+
+    def paragraph_texts(self, start=0, end=None, batched=True):
+        """Общее число параграфов #mw-content-text и их текст из диапазона [start, end)"""
+        raise NotImplementedError
+
+    def hatnotes(self, batched=True):
+        """Число div на странице и пары (текст, ссылка) hatnote-блоков"""
+        raise NotImplementedError
+
+    def close(self):
+        """Освобождение ресурсов"""
+
+
+class SeleniumBackend(ArticleBackend):
+    """Страницы через headless Firefox"""
+
+    name = "selenium"
+
+    def __init__(self, driver=None, wait_policy=None, pool=None, verbose=True, tracer=None,
+                 lean=False, profile_dir=None, rules=None, standby=False):
+        """Инициализация драйвера Firefox в headless режиме (или аренда драйвера из пула)
+
+        Упавший драйвер заменяется новым (DriverSupervisor); standby — держать запущенным
+        запасной браузер для быстрой замены.
+        """
+        super().__init__(verbose)
+        self.rules = rules
+        self.pool = pool
+        self.tracer = tracer or Tracer()
+        self.wait_policy = wait_policy or WaitPolicy()
+        # Адрес открытой страницы, на которую браузер возвращается после замены драйвера
+        self.page_url = None
+        if pool is not None:
+            self.supervisor = DriverSupervisor(pool.lease, pool.release, driver=driver,
+                                               verbose=verbose)
+        else:
+            if standby and profile_dir:
+                # Один каталог профиля не может быть открыт двумя браузерами сразу
+                self.log("⚠️ Запасной браузер не используется с постоянным каталогом профиля")
+                standby = False
+            self.supervisor = DriverSupervisor(lambda: create_firefox_driver(lean, profile_dir),
+                                               driver=driver, standby=standby, verbose=verbose)
+        self._bind(self.supervisor.driver)
+        self.log("✓ Драйвер Firefox успешно инициализирован")
+
+    def _bind(self, driver):
+        """Переход на драйвер (при запуске и после замены упавшего)"""
+        # Каждый запрос к драйверу учитывается как интервал webdriver.<команда>
+        self.driver = instrument_driver(driver, self.tracer)
+        self.wait = WebDriverWait(
+            self.driver, self.wait_policy.timeout, poll_frequency=self.wait_policy.poll_frequency
+        )
+
+    def session_lost(self, error):
+        """Вызвана ли ошибка потерей сессии браузера"""
+        return self.supervisor.session_lost(error)
+
+    def recover(self, reopen=True):
+        """Замена упавшего браузера и возврат на открытую страницу (reopen=False — без
+        возврата, например перед повтором перехода); время восстановления, секунд"""
+        url = self.page_url if reopen else None
+
+        def restore(driver):
+            self._bind(driver)
+            if url:
+                self.open(url)
+
+        with self.tracer.span("driver.recover", url=url) as attrs:
+            seconds = self.supervisor.restart(restore)
+            attrs.update(seconds=seconds)
+        return seconds
+
+    def _wait_until(self, kind, condition):
+        """Ожидание условия с учётом фактически затраченного времени"""
+        started = time.perf_counter()
+        try:
+            with self.tracer.span(f"wait.{kind}"):
+                return self.wait.until(condition)
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = self.wait_stats.setdefault(kind, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += elapsed
+            stats['max'] = max(stats['max'], elapsed)
+            stats['last'] = elapsed
+
+    def _page_ready(self, driver):
+        """Документ загружен и контент статьи присутствует"""
+        state, has_content = driver.execute_script(READY_SCRIPT, self.wait_policy.content_id)
+        return state in self.wait_policy.ready_states and has_content
+
+    def open(self, url):
+        self.page_url = url
+        self.driver.get(url)
+        if not self.wait_for_page_load():
+            return False
+        # Несуществующая статья открывается с заголовком, но без текста
+        return not self.driver.find_elements(By.CSS_SELECTOR, ".noarticletext")
+
+    def search(self, query, base_url):
+        # Адрес найденной статьи станет известен при запросе current_url()
+        self.page_url = None
+        # Переход на главную страницу Википедии
+        self.driver.get(f"{base_url}/wiki/")
+
+        # Поиск по запросу
+        search_box = self._wait_until(
+            "search_box", EC.presence_of_element_located((By.NAME, "search"))
+        )
+        search_box.clear()
+        search_box.send_keys(query)
+        start_url = self.driver.current_url
+        search_box.submit()
+        
+        # Ждём перехода со страницы с формой, а не фиксированную паузу
+        try:
+            self._wait_until("navigation", EC.url_changes(start_url))
+        except TimeoutException:
+            self.log("⚠️ Превышено время ожидания результатов поиска")
+            return False
+
+        # Ожидание загрузки результатов
+        if not self.wait_for_page_load():
+            return False
+
+        # Страница результатов поиска тоже содержит #firstHeading,
+        # поэтому сначала проверяем, есть ли результаты поиска
+        try:
+            search_results = self.driver.find_elements(By.CSS_SELECTOR, ".mw-search-result-heading a")
+            if search_results:
+                self.log(f"📋 Найдено результатов поиска: {len(search_results)}")
+                # Берем первый результат
+                first_result = search_results[0]
+                self.log(f"🔗 Переходим к первому результату: {first_result.text}")
+                results_url = self.driver.current_url
+                first_result.click()
+                self._wait_until("navigation", EC.url_changes(results_url))
+                return self.wait_for_page_load() and self._has_title()
+        except Exception as e:
+            if self.session_lost(e):
+                raise
+            self.log(f"⚠️ Ошибка при переходе к результату поиска: {e}")
+            return False
+
+        # Страница поиска без результатов — статья не найдена
+        if self.driver.find_elements(By.CSS_SELECTOR, ".searchresults"):
+            return False
+        # Проверка, что мы на странице статьи
+        return self._has_title()
+
+    def _has_title(self):
+        """Есть ли на странице заголовок статьи"""
+        try:
+            return bool(self.driver.find_element(By.ID, "firstHeading"))
+        except NoSuchElementException:
+            return False
+
+    def wait_for_page_load(self):
+        try:
+            # Ждем готовности документа и появления контента статьи
+            self._wait_until("page_load", self._page_ready)
+            return True
+        except TimeoutException:
+            self.log("⚠️ Превышено время ожидания загрузки страницы")
+            return False
+
+    def current_url(self):
+        self.page_url = self.driver.current_url
+        return self.page_url
+
+    def validators(self):
+        return {'revision': self.driver.execute_script(REVISION_SCRIPT)}
+
+    def page_weight(self):
+        """Байт передано по сети и число ресурсов для текущей страницы"""
+        return tuple(self.driver.execute_script(PAGE_WEIGHT_SCRIPT))
+
+    def title(self):
+        return self.driver.find_element(By.ID, "firstHeading").text
+
+    def paragraph_texts(self, start=0, end=None, batched=True):
+        if batched:
+            # Весь текст параграфов одним запросом
+            result = self.driver.execute_script(PARAGRAPHS_SCRIPT, start, end)
+            if result is None:
+                raise NoSuchElementException("mw-content-text")
+            return result['total'], result['texts']
+
+        # Ищем основной контент статьи и читаем параграфы по одному запросу на каждый
+        content = self.driver.find_element(By.ID, "mw-content-text")
+        paragraphs = content.find_elements(By.TAG_NAME, "p")
+        return len(paragraphs), [p.text for p in paragraphs[start:end]]
+
+    def hatnotes(self, batched=True):
+        rules = self.rules or rules_for(self.driver.current_url)
+        if batched:
+            result = self.driver.execute_script(HATNOTES_SCRIPT, rules.hatnote_selector()) or {}
+            return result.get('count', 0), [(text, href) for text, href in result.get('items', [])]
+
+        # Поэлементный сбор (запрос к драйверу на каждый div), оставлен для сравнения
+        elements = self.driver.find_elements(By.TAG_NAME, "div")
+        raw = []
+        for element in elements:
+            try:
+                cl = element.get_attribute("class")
+                if not rules.is_hatnote(cl):
+                    continue
+                # Ищем ссылку внутри hatnote
+                link_element = element.find_element(By.TAG_NAME, "a")
+                raw.append((element.text, link_element.get_attribute("href")))
+            except Exception as e:
+                if self.session_lost(e):
+                    raise
+                self.log(f"⚠️ Ошибка при обработке hatnote: {e}")
+                continue
+        return len(elements), raw
+
+    def close(self):
+        # Драйвер из пула возвращается в пул и будет очищен для следующей аренды
+        self.supervisor.close()
+        if self.pool is None:
+            self.log("🔒 Браузер Firefox закрыт")
+
+
+class HttpSession:
+    """Пул keep-alive соединений http.client по хостам"""
+
+    def __init__(self, timeout=15, max_idle_per_host=4, max_redirects=5):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.max_redirects = max_redirects
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _acquire(self, scheme, netloc):
+        """Свободное соединение с хостом из пула или новое"""
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                return idle.pop()
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _release(self, scheme, netloc, conn):
+        """Возврат соединения в пул"""
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _request_once(self, url, headers):
+        """Один запрос без обработки перенаправлений"""
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = dict({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+        }, **(headers or {}))
+
+        # Соединение из пула могло быть закрыто сервером — одна повторная попытка
+        for attempt in range(2):
+            conn = self._acquire(parts.scheme, parts.netloc)
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, ConnectionError) as e:
+                conn.close()
+                if attempt:
+                    raise BackendError(f"{url}: {e}")
+                continue
+            except OSError as e:
+                conn.close()
+                raise BackendError(f"{url}: {e}")
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(parts.scheme, parts.netloc, conn)
+
+            encoding = response.getheader('Content-Encoding', '')
+            if encoding == 'gzip':
+                body = gzip.decompress(body)
+            elif encoding == 'deflate':
+                body = zlib.decompress(body)
+            return response.status, response, body
+
+    def get(self, url, headers=None):
+        """GET с переходом по перенаправлениям: (статус, ответ, тело, итоговый адрес)"""
+        for _ in range(self.max_redirects + 1):
+            status, response, body = self._request_once(url, headers)
+            location = response.getheader('Location')
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return status, response, body, url
+        raise BackendError(f"{url}: слишком много перенаправлений")
+
+    def close(self):
+        """Закрытие всех соединений пула"""
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class WikiPageParser(HTMLParser):
+    """Разбор HTML страницы Википедии: заголовок, параграфы, hatnote, результаты поиска"""
+
+    VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "param", "source", "track", "wbr"}
+    SKIP_TAGS = {"script", "style"}
+
+    def __init__(self, base_url, rules=None):
+        """rules — правила извлечения (по умолчанию — для языкового раздела base_url)"""
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.rules = rules or rules_for(base_url)
+        self.title = None
+        self.paragraphs = []
+        self.hatnotes = []
+        self.search_results = []
+        self.div_count = 0
+        self.has_content = False
+        self.is_search_page = False
+        # Несуществующая статья: заголовок есть, вместо текста — блок .noarticletext
+        self.no_article = False
+        self._stack = []
+        self._content_depth = 0
+        self._skip_depth = 0
+        self._title_buf = None
+        self._p_buf = None
+        self._hatnote = None
+        self._result_depth = 0
+        self._result_link = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag in self.VOID_TAGS:
+            if tag == "br":
+                self._text("\n")
+            return
+        # Новый <p> неявно закрывает незакрытый предыдущий
+        if tag == "p" and self._p_buf is not None:
+            self._close_until("p")
+
+        marks = []
+        if tag in self.SKIP_TAGS or "display:none" in (attrs.get("style") or "").replace(" ", ""):
+            self._skip_depth += 1
+            marks.append("skip")
+        if attrs.get("id") == "mw-content-text":
+            self.has_content = True
+            self._content_depth += 1
+            marks.append("content")
+        if tag == "h1" and attrs.get("id") == "firstHeading":
+            self._title_buf = []
+            marks.append("title")
+        if tag == "div":
+            self.div_count += 1
+            if self._hatnote is None and self.rules.is_hatnote(attrs.get("class")):
+                self._hatnote = {'text': [], 'href': None}
+                marks.append("hatnote")
+        if tag == "p" and self._content_depth:
+            self._p_buf = []
+            marks.append("p")
+        classes = (attrs.get("class") or "").split()
+        if "searchresults" in classes:
+            self.is_search_page = True
+        if "noarticletext" in classes:
+            self.no_article = True
+        if "mw-search-result-heading" in classes:
+            self._result_depth += 1
+            marks.append("result")
+        if tag == "a":
+            href = attrs.get("href")
+            if self._hatnote is not None and self._hatnote['href'] is None and href:
+                self._hatnote['href'] = urljoin(self.base_url, href)
+            if self._result_depth and self._result_link is None and href:
+                self._result_link = {'href': urljoin(self.base_url, href), 'text': []}
+                marks.append("result_link")
+        self._stack.append((tag, marks))
+
+    def handle_startendtag(self, tag, attrs):
+        if tag not in self.VOID_TAGS:
+            self.handle_starttag(tag, attrs)
+            self.handle_endtag(tag)
+        else:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in self.VOID_TAGS:
+            return
+        if any(open_tag == tag for open_tag, _ in self._stack):
+            self._close_until(tag)
+
+    def _close_until(self, tag):
+        """Закрытие элементов стека до tag включительно"""
+        while self._stack:
+            open_tag, marks = self._stack.pop()
+            for mark in marks:
+                self._finish(mark)
+            if open_tag == tag:
+                return
+
+    def _finish(self, mark):
+        """Завершение сбора данных для закрытого элемента"""
+        if mark == "skip":
+            self._skip_depth -= 1
+        elif mark == "content":
+            self._content_depth -= 1
+        elif mark == "title":
+            self.title = _collapse("".join(self._title_buf))
+            self._title_buf = None
+        elif mark == "p":
+            self.paragraphs.append(_collapse("".join(self._p_buf)))
+            self._p_buf = None
+        elif mark == "hatnote":
+            self.hatnotes.append((_collapse("".join(self._hatnote['text'])), self._hatnote['href']))
+            self._hatnote = None
+        elif mark == "result":
+            self._result_depth -= 1
+        elif mark == "result_link":
+            link = self._result_link
+            self.search_results.append({'text': _collapse("".join(link['text'])), 'url': link['href']})
+            self._result_link = None
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            # Переносы строк в исходном HTML — такие же пробелы, как в innerText браузера;
+            # перенос строки в тексте дают только <br>
+            self._text(HTML_SPACE_RE.sub(" ", data))
+
+    def _text(self, data):
+        """Добавление текста во все собираемые сейчас фрагменты"""
+        if self._title_buf is not None:
+            self._title_buf.append(data)
+        if self._p_buf is not None:
+            self._p_buf.append(data)
+        if self._hatnote is not None:
+            self._hatnote['text'].append(data)
+        if self._result_link is not None:
+            self._result_link['text'].append(data)
+
+
+def _collapse(text):
+    """Схлопывание пробелов в строках, как это делает браузер при отображении текста"""
+    lines = (" ".join(line.split()) for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def page_revision(html):
+    """Номер правки статьи из HTML страницы или None"""
+    match = REVISION_RE.search(html)
+    return int(match.group(1)) if match else None
+
+
+def split_sections(html):
+    """Части HTML страницы по разделам второго уровня контента статьи
+
+    Первая часть — шапка и преамбула, последняя включает подвал страницы.
+    Разделы между заголовками h2 сбалансированы по тегам, поэтому неизменившийся
+    раздел можно не разбирать, не нарушая состояния разбора остальных.
+    """
+    content = html.find('id="mw-content-text"')
+    if content < 0:
+        return [html]
+    bounds = [0] + [match.start() for match in SECTION_RE.finditer(html, content)] + [len(html)]
+    return [html[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def section_hash(chunk):
+    """Короткий хеш HTML раздела"""
+    return hashlib.blake2b(chunk.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def parse_wiki_page(html, url, known_sections=(), rules=None):
+    """Разбор страницы в словарь с заголовком, параграфами, hatnote и результатами поиска
+
+    Разделы с хешем из known_sections не разбираются (их содержимое уже известно):
+    в 'sections' у них reused=True и пустые списки параграфов и hatnote.
+    """
+    parser = WikiPageParser(url, rules)
+    sections = []
+    for chunk in split_sections(html):
+        digest = section_hash(chunk)
+        reused = digest in known_sections
+        paragraphs, hatnotes = len(parser.paragraphs), len(parser.hatnotes)
+        if not reused:
+            parser.feed(chunk)
+        sections.append({
+            'hash': digest,
+            'reused': reused,
+            'paragraphs': parser.paragraphs[paragraphs:],
+            'hatnotes': parser.hatnotes[hatnotes:],
+        })
+    parser.close()
+    return {
+        'url': url,
+        'title': parser.title,
+        'paragraphs': parser.paragraphs,
+        'hatnotes': parser.hatnotes,
+        'div_count': parser.div_count,
+        'has_content': parser.has_content,
+        'search_results': parser.search_results,
+        'is_search_page': parser.is_search_page,
+        'no_article': parser.no_article,
+        'revision': page_revision(html),
+        'sections': sections,
+    }
+
+
+class HttpBackend(ArticleBackend):
+    """Страницы через прямые HTTP-запросы и разбор HTML без браузера"""
+
+    name = "http"
+
+    def __init__(self, session=None, verbose=True, tracer=None, rules=None):
+        super().__init__(verbose)
+        self.tracer = tracer or Tracer()
+        self.rules = rules
+        self.session = session or HttpSession()
+        self.page = None
+        self.log("✓ HTTP-режим инициализирован (без браузера)")
+
+    def _get(self, url, headers=None):
+        """Запрос страницы: (статус, ответ, HTML, итоговый адрес)"""
+        with self.tracer.span("http.request", url=url) as attrs:
+            status, response, body, final_url = self.session.get(url, headers)
+            attrs.update(status=status, bytes=len(body))
+        if status >= 500:
+            raise BackendError(f"{url}: HTTP {status}")
+        charset = response.headers.get_content_charset() or "utf-8"
+        return status, response, body.decode(charset, errors="replace"), final_url
+
+    def _parse(self, html, url, response, known_sections=()):
+        """Разбор страницы с валидаторами ответа для условных запросов"""
+        with self.tracer.span("http.parse"):
+            page = parse_wiki_page(html, url, known_sections, self.rules)
+        page['etag'] = response.getheader('ETag')
+        page['last_modified'] = response.getheader('Last-Modified')
+        return page
+
+    def fetch(self, url):
+        """Загрузка и разбор страницы: (статус, разобранная страница)"""
+        status, response, html, final_url = self._get(url)
+        return status, self._parse(html, final_url, response)
+
+    def fetch_if_changed(self, url, known):
+        """Условная загрузка статьи, известной по записи known (revision, etag, last_modified, sections)
+
+        Возвращает (статус, валидаторы, страница); страница None, если статья не изменилась:
+        сервер ответил 304 или номер правки прежний. Разделы с известными хешами не разбираются.
+        """
+        headers = {}
+        if known.get('etag'):
+            headers['If-None-Match'] = known['etag']
+        if known.get('last_modified'):
+            headers['If-Modified-Since'] = known['last_modified']
+        status, response, html, final_url = self._get(url, headers)
+        validators = {
+            'revision': known.get('revision'),
+            'etag': response.getheader('ETag') or known.get('etag'),
+            'last_modified': response.getheader('Last-Modified') or known.get('last_modified'),
+        }
+        if status == 304:
+            return status, validators, None
+        revision = page_revision(html)
+        if status == 200 and revision is not None and revision == known.get('revision'):
+            return status, validators, None
+        known_sections = {section[0] for section in known.get('sections') or ()}
+        page = self._parse(html, final_url, response, known_sections)
+        validators['revision'] = page['revision']
+        return status, validators, page
+
+    def open(self, url):
+        status, self.page = self.fetch(url)
+        # Как и в браузере: страница несуществующей статьи (.noarticletext) — не статья
+        return status == 200 and self.page['title'] is not None and not self.page['no_article']
+
+    def search(self, query, base_url):
+        params = urlencode({'search': query, 'title': 'Служебная:Поиск'})
+        status, self.page = self.fetch(f"{base_url}/w/index.php?{params}")
+
+        # Нет точного совпадения — Википедия показывает страницу результатов поиска
+        results = self.page['search_results']
+        if results:
+            self.log(f"📋 Найдено результатов поиска: {len(results)}")
+            self.log(f"🔗 Переходим к первому результату: {results[0]['text']}")
+            return self.open(results[0]['url'])
+        # Страница поиска без результатов — статья не найдена
+        return status == 200 and self.page['title'] is not None and not self.page['is_search_page']
+
+    def _require_page(self):
+        """Текущая страница или ошибка, если ещё ничего не открыто"""
+        if self.page is None:
+            raise NoSuchElementException("Страница не открыта")
+        return self.page
+
+    def current_url(self):
+        return self.page['url'] if self.page else None
+
+    def validators(self):
+        page = self._require_page()
+        return {key: page[key] for key in ('revision', 'etag', 'last_modified')}
+
+    def parsed_page(self):
+        return self.page
+
+    def title(self):
+        title = self._require_page()['title']
+        if title is None:
+            raise NoSuchElementException("firstHeading")
+        return title
+
+    def paragraph_texts(self, start=0, end=None, batched=True):
+        page = self._require_page()
+        if not page['has_content']:
+            raise NoSuchElementException("mw-content-text")
+        paragraphs = page['paragraphs']
+        return len(paragraphs), paragraphs[start:end]
+
+    def hatnotes(self, batched=True):
+        page = self._require_page()
+        return page['div_count'], list(page['hatnotes'])
+
+    def close(self):
+        self.session.close()
+
+
+def article_url(base_url, title):
+    """Адрес статьи по заголовку"""
+    return f"{base_url}/wiki/{quote(title.replace(' ', '_'))}"
+
+
+BACKENDS = {
+    SeleniumBackend.name: SeleniumBackend,
+    HttpBackend.name: HttpBackend,
+}
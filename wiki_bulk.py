@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Массовое извлечение статей по списку заголовков в нескольких процессах
+Запуск: python wiki_bulk.py titles.txt --output articles.jsonl --workers 4
+У каждого процесса свой навигатор (браузер или HTTP), лимит частоты запросов общий.
+Результаты дописываются в один файл JSON Lines по мере готовности; он же служит
+контрольной точкой: при повторном запуске уже извлечённые заголовки пропускаются
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing.util import Finalize
+
+from dom_zadanie import WIKI_BASE_URL, WikipediaNavigator
+from wiki_backends import BACKENDS
+from rate_limiter import RateLimiter
+from title_index import TitleIndex
+from search_index import SearchIndex
+from extraction_rules import load_rules
+
+
+# Навигатор процесса-исполнителя (создаётся один раз при запуске процесса)
+_worker_navigator = None
+
+
+def _init_worker(options):
+    """Создание навигатора в процессе-исполнителе"""
+    global _worker_navigator
+    rate_limiter = RateLimiter(options['rate'], options['burst'], state_file=options['rate_state'])
+    title_index = TitleIndex(options['title_index']) if options['title_index'] else None
+    rules = load_rules(options['rules']) if options.get('rules') else None
+    _worker_navigator = WikipediaNavigator(base_url=options['base_url'], backend=options['backend'],
+                                           rate_limiter=rate_limiter, verbose=False,
+                                           title_index=title_index, rules=rules)
+    # Браузер закрывается при штатном завершении процесса пула (atexit там не вызывается)
+    Finalize(_worker_navigator, _worker_navigator.close, exitpriority=10)
+
+
+def valid_record(record):
+    """Полная ли запись статьи: заголовок, адрес, запрос и хотя бы один параграф"""
+    return (isinstance(record, dict) and bool(record.get('title')) and bool(record.get('url')) and
+            bool(record.get('query')) and bool(record.get('paragraphs')) and
+            isinstance(record.get('links'), list))
+
+
+def _extract_chunk(titles):
+    """Извлечение статей порции: [(заголовок, запись или None, ошибка или None)]"""
+    results = []
+    for title in titles:
+        try:
+            if not _worker_navigator.search_article(title):
+                results.append((title, None, "статья не найдена"))
+                continue
+            record = _worker_navigator.article_record()
+            if record is None:
+                results.append((title, None, "не удалось извлечь содержимое статьи"))
+                continue
+            record['query'] = title
+            results.append((title, record, None))
+        except Exception as e:
+            results.append((title, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def load_checkpoint(path):
+    """Заголовки, уже записанные в файл результатов; недописанная последняя строка отрезается
+
+    Неполные записи (без параграфов и т.п.) не считаются извлечёнными и извлекаются заново.
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good_size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+                query = record['query']
+            except (ValueError, KeyError, TypeError):
+                break
+            if valid_record(record):
+                done.add(query)
+            good_size += len(line)
+    if good_size != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_size)
+    return done
+
+
+def read_titles(path):
+    """Заголовки из файла (по одному в строке, пустые строки и повторы пропускаются)"""
+    seen = set()
+    titles = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            title = line.strip()
+            if title and title not in seen:
+                seen.add(title)
+                titles.append(title)
+    return titles
+
+
+class BulkExtractor:
+    """Извлечение статей пулом процессов порциями с дозаписью результатов"""
+
+    def __init__(self, options, workers=4, chunk_size=10, search_index=None):
+        """options — параметры навигатора процессов (base_url, backend, rate, burst,
+        rate_state, title_index, rules); search_index — полнотекстовый индекс (SearchIndex),
+        который пополняется в основном процессе по мере записи результатов"""
+        self.options = options
+        self.search_index = search_index
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.extracted = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def run(self, titles, output_path, failed_path=None, progress=None):
+        """Извлечение статей titles в output_path, пропуская уже извлечённые"""
+        done = load_checkpoint(output_path)
+        pending = [title for title in titles if title not in done]
+        self.skipped = len(titles) - len(pending)
+        chunks = [pending[i:i + self.chunk_size] for i in range(0, len(pending), self.chunk_size)]
+        chunks.reverse()
+
+        output = open(output_path, "a", encoding="utf-8")
+        failed = open(failed_path, "w", encoding="utf-8") if failed_path else None
+        executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                       initargs=(self.options,))
+        in_flight = set()
+        try:
+            while chunks or in_flight:
+                # Несколько порций на процесс в очереди, чтобы процессы не простаивали
+                while chunks and len(in_flight) < self.workers * 2:
+                    in_flight.add(executor.submit(_extract_chunk, chunks.pop()))
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    for title, record, error in future.result():
+                        if record is not None and not valid_record(record):
+                            record, error = None, "неполная запись статьи"
+                        if record is None:
+                            self.failed += 1
+                            if failed is not None:
+                                failed.write(f"{title}\t{error}\n")
+                            continue
+                        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        self.extracted += 1
+                        if self.search_index is not None:
+                            self.search_index.add_article(record['url'], record['title'],
+                                                          record['paragraphs'], commit=False)
+                    # Контрольная точка: записанное на диске не придётся извлекать повторно
+                    output.flush()
+                    if self.search_index is not None:
+                        self.search_index.commit()
+                    if failed is not None:
+                        failed.flush()
+                    if progress is not None:
+                        progress(self)
+        except BaseException:
+            for future in in_flight:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            output.close()
+            if failed is not None:
+                failed.close()
+        return self.extracted
+
+
+def main(argv=None):
+    """Массовое извлечение из командной строки"""
+    parser = argparse.ArgumentParser(description="Массовое извлечение статей Википедии по списку заголовков")
+    parser.add_argument("titles", help="файл заголовков, по одному в строке")
+    parser.add_argument("--output", required=True, help="файл результатов JSON Lines (дописывается)")
+    parser.add_argument("--workers", type=int, default=4, help="число процессов")
+    parser.add_argument("--chunk-size", type=int, default=10, help="заголовков в одной порции")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="http")
+    parser.add_argument("--base-url", default=WIKI_BASE_URL)
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="запросов в секунду на все процессы (0 — без ограничения)")
+    parser.add_argument("--burst", type=int, default=5, help="допустимый всплеск запросов")
+    parser.add_argument("--rate-state", help="файл состояния общего лимита "
+                        "(по умолчанию <output>.rate)")
+    parser.add_argument("--title-index", help="индекс заголовков для поиска статей")
+    parser.add_argument("--search-index", help="полнотекстовый индекс, в который добавляются статьи")
+    parser.add_argument("--rules", help="файл правил извлечения (JSON)")
+    args = parser.parse_args(argv)
+    if args.rules:
+        # Правила читаются каждым процессом; ошибку в файле сообщаем до их запуска
+        try:
+            load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            parser.error(f"правила извлечения {args.rules}: {e}")
+
+    options = {
+        'base_url': args.base_url,
+        'backend': args.backend,
+        'rate': args.rate,
+        'burst': args.burst,
+        # Без ограничения частоты файл общего состояния не нужен
+        'rate_state': (args.rate_state or f"{args.output}.rate") if args.rate else None,
+        'title_index': args.title_index,
+        'rules': args.rules,
+    }
+    titles = read_titles(args.titles)
+    search_index = SearchIndex(args.search_index) if args.search_index else None
+    extractor = BulkExtractor(options, workers=args.workers, chunk_size=args.chunk_size,
+                              search_index=search_index)
+    started = time.perf_counter()
+
+    def progress(extractor):
+        elapsed = time.perf_counter() - started
+        processed = extractor.extracted + extractor.failed
+        print(f"📦 {extractor.skipped + processed}/{len(titles)}, "
+              f"{processed / elapsed:.1f} статей/с", file=sys.stderr)
+
+    try:
+        extractor.run(titles, args.output, failed_path=f"{args.output}.failed", progress=progress)
+    except KeyboardInterrupt:
+        print("\n⚠️ Прервано: при повторном запуске извлечение продолжится с места остановки",
+              file=sys.stderr)
+    finally:
+        if search_index is not None:
+            search_index.close()
+    elapsed = time.perf_counter() - started
+    print(f"✅ Извлечено: {extractor.extracted}, ранее: {extractor.skipped}, "
+          f"ошибок: {extractor.failed}, время: {elapsed:.1f} с", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
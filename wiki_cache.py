@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Дисковый кэш статей Википедии на SQLite
+Хранит заголовок, параграфы и основные статьи по каноническому адресу,
+с проверкой срока жизни (TTL), ограничением размера и вытеснением LRU
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import quote, unquote, urlsplit, urlunsplit
+
+from article_model import to_plain
+
+
+# Поля статьи, которые хранятся в кэше: содержимое, валидаторы для условных
+# запросов и хеши разделов ([хеш, число параграфов, hatnote раздела])
+CACHE_FIELDS = ("title", "paragraphs", "related_links",
+                "revision", "etag", "last_modified", "sections")
+
+
+def canonical_url(url):
+    """Канонический адрес статьи: без якоря и параметров, с единообразным кодированием пути"""
+    parts = urlsplit(url)
+    path = quote(unquote(parts.path).replace(" ", "_"), safe="/:_-.,()'!~*@;+$")
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, "", ""))
+
+
+class ArticleCache:
+    """Кэш статей с TTL, ограничением размера и LRU-вытеснением"""
+
+    def __init__(self, path="wiki_cache.sqlite3", ttl=24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.revalidated = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Журнал WAL без fsync на каждую запись: кэш можно потерять при сбое питания,
+        # а повторная проверка сотен статей не упирается в синхронизацию диска
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                url TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_accessed ON articles(accessed_at);
+            CREATE TABLE IF NOT EXISTS aliases (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL
+            );
+        """)
+        self._db.commit()
+        # Объём записей ведётся при каждом изменении: полный подсчёт по таблице
+        # нужен только при открытии и перед вытеснением
+        self._total = self._stored_bytes()
+
+    def _stored_bytes(self):
+        """Объём всех записей по таблице (запись могла изменить и другая копия кэша)"""
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+
+    def _load(self, url):
+        """Запись статьи, время загрузки и размер записи без учёта в счётчиках"""
+        row = self._db.execute(
+            "SELECT data, fetched_at FROM articles WHERE url = ?", (url,)
+        ).fetchone()
+        if row is None:
+            return None, 0, 0
+        return json.loads(zlib.decompress(row[0])), row[1], len(row[0])
+
+    def get(self, url, fields=("title",)):
+        """Свежая запись статьи, в которой есть все поля fields, иначе None"""
+        url = canonical_url(url)
+        with self._lock:
+            entry, fetched_at, _ = self._load(url)
+            if entry is None or any(entry.get(field) is None for field in fields):
+                self.misses += 1
+                return None
+            if time.time() - fetched_at > self.ttl:
+                # Запись устарела — статью нужно загрузить заново
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE articles SET accessed_at = ? WHERE url = ?", (time.time(), url)
+            )
+            self._db.commit()
+            self.hits += 1
+            entry['url'] = url
+            return entry
+
+    def get_stale(self, url):
+        """Запись статьи независимо от срока жизни (для проверки, изменилась ли статья)"""
+        url = canonical_url(url)
+        with self._lock:
+            entry, _, _ = self._load(url)
+        if entry is not None:
+            entry['url'] = url
+        return entry
+
+    def mark_fresh(self, url, **validators):
+        """Статья не изменилась: срок жизни записи отсчитывается заново, валидаторы обновляются"""
+        url = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            entry, _, old_size = self._load(url)
+            if entry is None:
+                return
+            entry.update(validators)
+            data = zlib.compress(json.dumps(entry, ensure_ascii=False, default=to_plain).encode("utf-8"))
+            self._db.execute(
+                "UPDATE articles SET data = ?, size = ?, fetched_at = ?, accessed_at = ? WHERE url = ?",
+                (data, len(data), now, now, url),
+            )
+            self._total += len(data) - old_size
+            self._db.commit()
+            self.revalidated += 1
+
+    def update(self, url, **fields):
+        """Сохранение полей статьи (CACHE_FIELDS)"""
+        unknown = set(fields) - set(CACHE_FIELDS)
+        if unknown:
+            raise ValueError(f"Неизвестные поля кэша: {', '.join(sorted(unknown))}")
+        url = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            entry, fetched_at, old_size = self._load(url)
+            if entry is None or now - fetched_at > self.ttl:
+                # Устаревшие поля не смешиваем со свежими, срок жизни отсчитываем заново
+                entry, fetched_at = {}, now
+            entry.update(fields)
+            data = zlib.compress(json.dumps(entry, ensure_ascii=False, default=to_plain).encode("utf-8"))
+            self._db.execute(
+                "INSERT OR REPLACE INTO articles (url, data, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, data, len(data), fetched_at, now),
+            )
+            self._total += len(data) - old_size
+            if self._total > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Удаление давно не использованных статей при превышении размера"""
+        total = self._total = self._stored_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, size FROM articles ORDER BY accessed_at").fetchall()
+        for url, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM articles WHERE url = ?", (url,))
+            self._db.execute("DELETE FROM aliases WHERE url = ?", (url,))
+            total -= size
+            self.evictions += 1
+        self._total = total
+
+    def add_alias(self, key, url):
+        """Запоминание адреса статьи для поискового запроса или ссылки-перенаправления"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO aliases (key, url) VALUES (?, ?)", (key, canonical_url(url))
+            )
+            self._db.commit()
+
+    def resolve(self, key):
+        """Адрес статьи по поисковому запросу или ссылке, None если неизвестен"""
+        with self._lock:
+            row = self._db.execute("SELECT url FROM aliases WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def stats(self):
+        """Счётчики попаданий и промахов, число и объём записей"""
+        with self._lock:
+            count, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM articles"
+            ).fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'revalidated': self.revalidated,
+            'evictions': self.evictions,
+            'entries': count,
+            'bytes': size,
+        }
+
+    def close(self):
+        """Закрытие базы кэша"""
+        with self._lock:
+            self._db.close()
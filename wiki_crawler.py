@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пакетный обход Википедии в ширину по ссылкам «Основная статья» (hatnote)
+Запуск: python wiki_crawler.py "Запрос 1" "Запрос 2" --depth 2 --workers 4 --output crawl.jsonl
+Результаты пишутся построчно в формате JSON Lines по мере обхода
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dom_zadanie import WIKI_BASE_URL, WikipediaNavigator
+from wiki_backends import BACKENDS
+from wiki_cache import ArticleCache, canonical_url
+from rate_limiter import RateLimiter
+from title_index import TitleIndex
+from search_index import SearchIndex
+from extraction_rules import load_rules
+from tracing import Tracer
+from wiki_export import FORMATS, ExportPipeline, open_writer
+
+
+class HatnoteCrawler:
+    """Обход графа основных статей в ширину с ограничением параллельности"""
+
+    def __init__(self, navigator_factory, depth=1, workers=4, max_pages=None):
+        """navigator_factory — функция, создающая WikipediaNavigator для рабочего потока"""
+        self.navigator_factory = navigator_factory
+        self.depth = depth
+        self.workers = workers
+        self.max_pages = max_pages
+        self.pages = 0
+        self.failures = 0
+        self._local = threading.local()
+        self._navigators = []
+        self._navigators_lock = threading.Lock()
+
+    def _navigator(self):
+        """Навигатор текущего рабочего потока"""
+        navigator = getattr(self._local, 'navigator', None)
+        if navigator is None:
+            navigator = self._local.navigator = self.navigator_factory()
+            with self._navigators_lock:
+                self._navigators.append(navigator)
+        return navigator
+
+    def _visit(self, kind, value):
+        """Открытие статьи по поисковому запросу или адресу и извлечение её содержимого"""
+        navigator = self._navigator()
+        if kind == 'search':
+            found = navigator.search_article(value)
+        else:
+            found = navigator.open_article(value)
+        if not found:
+            return None
+        return navigator.article_record()
+
+    def crawl(self, seeds, write):
+        """Обход от поисковых запросов seeds, каждая статья передаётся в write(record)"""
+        frontier = deque(('search', seed, 0) for seed in seeds)
+        visited = set()
+        in_flight = {}
+        # Очередь задач держим небольшой: в памяти только адреса, а не статьи
+        max_in_flight = self.workers * 2
+
+        # Навигаторы закрываются и тогда, когда обход прерван ошибкой записи
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while frontier or in_flight:
+                    while frontier and len(in_flight) < max_in_flight and not self._limit_reached(in_flight):
+                        kind, value, level = frontier.popleft()
+                        future = executor.submit(self._visit, kind, value)
+                        in_flight[future] = (kind, value, level)
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, value, level = in_flight.pop(future)
+                        try:
+                            record = future.result()
+                        except Exception as e:
+                            print(f"⚠️ Ошибка при обработке {value}: {e}", file=sys.stderr)
+                            record = None
+                        if record is None:
+                            self.failures += 1
+                            continue
+
+                        # Разные ссылки и запросы могут вести на одну статью через перенаправления
+                        requested = canonical_url(value) if kind == 'url' else None
+                        if record['url'] != requested and record['url'] in visited:
+                            continue
+                        visited.add(record['url'])
+
+                        record['depth'] = level
+                        write(record)
+                        self.pages += 1
+
+                        if level >= self.depth:
+                            continue
+                        for link in record['links']:
+                            url = canonical_url(link['url'])
+                            if url not in visited:
+                                visited.add(url)
+                                frontier.append(('url', link['url'], level + 1))
+        finally:
+            self.close()
+        return self.pages
+
+    def _limit_reached(self, in_flight):
+        """Достигнут ли лимит числа статей с учётом уже запущенных задач"""
+        return self.max_pages is not None and self.pages + len(in_flight) >= self.max_pages
+
+    def close(self):
+        """Закрытие навигаторов рабочих потоков"""
+        with self._navigators_lock:
+            navigators, self._navigators = self._navigators, []
+        for navigator in navigators:
+            navigator.close()
+
+
+def main(argv=None):
+    """Пакетный обход из командной строки"""
+    parser = argparse.ArgumentParser(description="Обход Википедии по ссылкам «Основная статья»")
+    parser.add_argument("seeds", nargs="+", help="поисковые запросы, с которых начинается обход")
+    parser.add_argument("--depth", type=int, default=1, help="глубина обхода по ссылкам")
+    parser.add_argument("--workers", type=int, default=4, help="число параллельных навигаторов")
+    parser.add_argument("--max-pages", type=int, help="предельное число статей")
+    parser.add_argument("--output", default="-",
+                        help="файл JSON Lines ('-' — стандартный вывод) или каталог частей Parquet")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="формат выгрузки")
+    parser.add_argument("--export-memory", type=float, default=64,
+                        help="предел памяти очереди записи, МБ (обход ждёт запись)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="http")
+    parser.add_argument("--base-url", default=WIKI_BASE_URL)
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="запросов в секунду на все потоки (0 — без ограничения)")
+    parser.add_argument("--burst", type=int, default=5, help="допустимый всплеск запросов")
+    parser.add_argument("--rate-state", help="файл состояния лимита, общий для нескольких процессов")
+    parser.add_argument("--cache", help="файл дискового кэша статей")
+    parser.add_argument("--title-index", help="индекс заголовков для поиска начальных статей")
+    parser.add_argument("--search-index", help="полнотекстовый индекс, в который добавляются статьи")
+    parser.add_argument("--rules", help="файл правил извлечения (JSON)")
+    parser.add_argument("--trace", help="файл трассы операций (JSON Lines)")
+    parser.add_argument("--metrics", help="файл метрик в текстовом формате Prometheus")
+    args = parser.parse_args(argv)
+    try:
+        rules = load_rules(args.rules) if args.rules else None
+    except (OSError, ValueError) as e:
+        parser.error(f"правила извлечения {args.rules}: {e}")
+    try:
+        writer = (open_writer(args.output, "parquet") if args.format == "parquet"
+                  else open_writer(args.output, append=False))
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    cache = ArticleCache(args.cache) if args.cache else None
+    title_index = TitleIndex(args.title_index) if args.title_index else None
+    search_index = SearchIndex(args.search_index) if args.search_index else None
+    tracer = Tracer(args.trace, args.metrics)
+    rate_limiter = RateLimiter(args.rate, args.burst, state_file=args.rate_state)
+
+    def navigator_factory():
+        return WikipediaNavigator(base_url=args.base_url, backend=args.backend, cache=cache,
+                                  rate_limiter=rate_limiter, verbose=False,
+                                  title_index=title_index, tracer=tracer,
+                                  search_index=search_index, rules=rules)
+
+    crawler = HatnoteCrawler(navigator_factory, depth=args.depth, workers=args.workers,
+                             max_pages=args.max_pages)
+    export = ExportPipeline(writer, max_bytes=int(args.export_memory * 1024 * 1024))
+    started = time.perf_counter()
+    try:
+        crawler.crawl(args.seeds, export.submit)
+    finally:
+        export.close()
+        if cache is not None:
+            cache.close()
+        if title_index is not None:
+            title_index.close()
+        if search_index is not None:
+            search_index.close()
+        tracer.close()
+    elapsed = time.perf_counter() - started
+    waited = sum(stats['wait_total'] for stats in rate_limiter.stats().values())
+    stats = export.stats()
+    print(f"✅ Обработано статей: {crawler.pages}, ошибок: {crawler.failures}, "
+          f"время: {elapsed:.1f} с, ожидание лимита: {waited:.1f} с", file=sys.stderr)
+    print(f"📤 Выгружено: {stats['articles']} статей, {stats['articles_per_second']:.1f} статей/с, "
+          f"{stats['mb_per_second']:.2f} МБ/с, ожидание записи: {stats['blocked_seconds']:.1f} с",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Потоковая выгрузка статей (заголовок, адрес, параграфы, основные статьи)
+в JSON Lines или Parquet с ограничением памяти очереди записи
+Записанное сразу доступно другим процессам: строки JSON Lines сбрасываются
+на диск порциями, файлы Parquet дописываются частями part-NNNNN.parquet
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet необязателен, JSON Lines работает без pyarrow
+    pyarrow = None
+
+from article_model import to_plain
+
+
+FORMATS = ("jsonl", "parquet")
+
+
+def record_size(record):
+    """Примерный объём записи статьи в памяти (строки по два байта на символ)"""
+    size = 2 * (len(record.get('title') or "") + len(record.get('url') or ""))
+    size += sum(2 * len(text) + 64 for text in record.get('paragraphs') or ())
+    size += sum(2 * (len(link['text']) + len(link['url'])) + 128 for link in record.get('links') or ())
+    return size
+
+
+def article_records(navigator, targets):
+    """Записи статей для выгрузки: targets — поисковые запросы или адреса статей"""
+    for target in targets:
+        if "://" in target:
+            found = navigator.open_article(target)
+        else:
+            found = navigator.search_article(target)
+        # Статья, содержимое которой извлечь не удалось, не выгружается
+        record = navigator.article_record() if found else None
+        if record is not None:
+            yield record
+
+
+class JsonlWriter:
+    """Запись статей в JSON Lines ('-' — стандартный вывод)"""
+
+    def __init__(self, path, append=True):
+        """append=False — файл перезаписывается"""
+        self.path = path
+        if path == "-":
+            self._file = sys.stdout
+        else:
+            self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, records):
+        """Запись порции статей; возвращает число записанных на диск байт"""
+        text = "".join(json.dumps(record, ensure_ascii=False, default=to_plain) + "\n"
+                       for record in records)
+        self._file.write(text)
+        self._file.flush()
+        return len(text.encode("utf-8"))
+
+    def close(self):
+        """Закрытие файла; возвращает байты, дописанные при закрытии (для JSON Lines — 0)"""
+        if self._file is not None and self.path != "-":
+            self._file.close()
+        self._file = None
+        return 0
+
+
+class ParquetWriter:
+    """Запись статей в Parquet частями: каждая порция — группа строк, каждые
+    rows_per_file статей — новый файл, который появляется под своим именем только
+    после закрытия (читатель не увидит файл без метаданных)"""
+
+    def __init__(self, directory, rows_per_file=10000, compression="zstd"):
+        if pyarrow is None:
+            raise RuntimeError("Для выгрузки в Parquet нужен pyarrow (pip install pyarrow)")
+        self.directory = directory
+        self.rows_per_file = rows_per_file
+        self.compression = compression
+        self.schema = pyarrow.schema([
+            ("title", pyarrow.string()),
+            ("url", pyarrow.string()),
+            ("paragraphs", pyarrow.list_(pyarrow.string())),
+            ("links", pyarrow.list_(pyarrow.struct([("text", pyarrow.string()),
+                                                    ("url", pyarrow.string())]))),
+        ])
+        os.makedirs(directory, exist_ok=True)
+        # Нумерация частей продолжается после уже записанных файлов
+        self._part = sum(name.startswith("part-") and name.endswith(".parquet")
+                         for name in os.listdir(directory))
+        self._writer = None
+        self._rows = 0
+        # Размер закрытых частей этого запуска на диске
+        self._finished_bytes = 0
+
+    def _part_path(self):
+        return os.path.join(self.directory, f"part-{self._part:05d}.parquet")
+
+    def _disk_bytes(self):
+        """Записано на диск этим запуском: закрытые части и текущий недописанный файл"""
+        current = os.path.getsize(f"{self._part_path()}.tmp") if self._writer is not None else 0
+        return self._finished_bytes + current
+
+    def write(self, records):
+        """Запись порции статей группой строк; возвращает прирост файлов на диске в байтах
+        (метаданные части дописываются при её закрытии и учитываются тогда же)"""
+        before = self._disk_bytes()
+        columns = {
+            'title': [record.get('title') for record in records],
+            'url': [record.get('url') for record in records],
+            'paragraphs': [list(record.get('paragraphs') or ()) for record in records],
+            'links': [[{'text': link['text'], 'url': link['url']} for link in record.get('links') or ()]
+                      for record in records],
+        }
+        batch = pyarrow.RecordBatch.from_pydict(columns, schema=self.schema)
+        if self._writer is None:
+            self._writer = pyarrow.parquet.ParquetWriter(f"{self._part_path()}.tmp", self.schema,
+                                                         compression=self.compression)
+        self._writer.write_batch(batch)
+        self._rows += len(records)
+        if self._rows >= self.rows_per_file:
+            self._finish_part()
+        return self._disk_bytes() - before
+
+    def _finish_part(self):
+        """Закрытие текущей части и переименование в окончательное имя"""
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.replace(f"{self._part_path()}.tmp", self._part_path())
+        self._finished_bytes += os.path.getsize(self._part_path())
+        self._writer = None
+        self._rows = 0
+        self._part += 1
+
+    def close(self):
+        """Закрытие последней части; возвращает байты, дописанные при закрытии"""
+        before = self._disk_bytes()
+        self._finish_part()
+        return self._disk_bytes() - before
+
+
+def open_writer(path, fmt="jsonl", **kwargs):
+    """Запись в формате fmt: файл JSON Lines или каталог частей Parquet"""
+    if fmt == "parquet":
+        return ParquetWriter(path, **kwargs)
+    return JsonlWriter(path, **kwargs)
+
+
+class ExportPipeline:
+    """Очередь выгрузки с фоновой записью: submit() блокируется, пока в очереди
+    больше max_bytes данных, поэтому быстрый обход не копит статьи в памяти"""
+
+    def __init__(self, writer, max_bytes=64 * 1024 * 1024, batch_size=500, flush_interval=1.0):
+        """writer — JsonlWriter или ParquetWriter; порция записывается, когда набрано
+        batch_size статей или с первой статьи порции прошло flush_interval секунд"""
+        self.writer = writer
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.articles = 0
+        self.bytes_written = 0
+        self.peak_queued_bytes = 0
+        self.blocked_seconds = 0.0
+        self._queue = []
+        self._queued_bytes = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error = None
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="export-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Постановка статьи в очередь записи (ожидание, если очередь заполнена)"""
+        size = record_size(record)
+        with self._condition:
+            started = None
+            # Статья крупнее предела проходит в пустую очередь, иначе выгрузка встанет
+            while (not self._closed and self._error is None and self._queue and
+                   self._queued_bytes + size > self.max_bytes):
+                if started is None:
+                    started = time.perf_counter()
+                    self._waiting += 1
+                self._condition.wait()
+            if started is not None:
+                self._waiting -= 1
+                self.blocked_seconds += time.perf_counter() - started
+            if self._error is not None:
+                raise RuntimeError(f"Ошибка записи выгрузки: {self._error}") from self._error
+            if self._closed:
+                raise RuntimeError("Выгрузка уже закрыта")
+            self._queue.append((record, size))
+            self._queued_bytes += size
+            self.peak_queued_bytes = max(self.peak_queued_bytes, self._queued_bytes)
+            self._condition.notify_all()
+
+    __call__ = submit
+
+    def consume(self, records):
+        """Выгрузка всех статей из генератора records"""
+        for record in records:
+            self.submit(record)
+        return self.articles
+
+    def _next_batch(self):
+        """Очередная порция статей для записи (пустая — выгрузка закрыта)"""
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            deadline = time.monotonic() + self.flush_interval
+            # Порцию не добираем, если очередь уже упёрлась в предел памяти
+            while len(self._queue) < self.batch_size and not self._closed and not self._waiting:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            # Статьи остаются в учёте памяти до окончания записи порции
+            return self._queue[:self.batch_size]
+
+    def _run(self):
+        """Фоновая запись порций"""
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                written = self.writer.write([record for record, _ in batch])
+            except Exception as e:
+                with self._condition:
+                    self._error = e
+                    self._queue = []
+                    self._queued_bytes = 0
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                del self._queue[:len(batch)]
+                self._queued_bytes -= sum(size for _, size in batch)
+                self.articles += len(batch)
+                self.bytes_written += written
+                self._condition.notify_all()
+
+    def stats(self):
+        """Счётчики выгрузки: статей и мегабайт в секунду, пик очереди, время ожидания"""
+        elapsed = time.perf_counter() - self._started
+        with self._condition:
+            return {
+                'articles': self.articles,
+                # Байт на диске (для Parquet — после сжатия)
+                'bytes': self.bytes_written,
+                'articles_per_second': self.articles / elapsed if elapsed else 0.0,
+                'mb_per_second': self.bytes_written / elapsed / 1e6 if elapsed else 0.0,
+                'queued_bytes': self._queued_bytes,
+                'peak_queued_bytes': self.peak_queued_bytes,
+                'blocked_seconds': self.blocked_seconds,
+            }
+
+    def close(self):
+        """Запись оставшихся статей и закрытие файла"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        # Закрытие дописывает метаданные Parquet: они тоже входят в записанный объём
+        self.bytes_written += self.writer.close() or 0
+        if self._error is not None:
+            raise RuntimeError(f"Ошибка записи выгрузки: {self._error}") from self._error
+
+
+def main(argv=None):
+    """Выгрузка статей по запросам или адресам из командной строки"""
+    import argparse
+    from dom_zadanie import WIKI_BASE_URL, WikipediaNavigator
+    from wiki_backends import BACKENDS
+    from rate_limiter import RateLimiter
+
+    parser = argparse.ArgumentParser(description="Выгрузка статей Википедии в JSON Lines или Parquet")
+    parser.add_argument("targets", nargs="+", help="поисковые запросы или адреса статей")
+    parser.add_argument("--output", default="-",
+                        help="файл JSON Lines ('-' — стандартный вывод) или каталог частей Parquet")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--export-memory", type=float, default=64, help="предел памяти очереди записи, МБ")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="http")
+    parser.add_argument("--base-url", default=WIKI_BASE_URL)
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="запросов в секунду к Википедии (0 — без ограничения)")
+    args = parser.parse_args(argv)
+    try:
+        writer = open_writer(args.output, args.format)
+    except RuntimeError as e:
+        parser.error(str(e))
+
+    export = ExportPipeline(writer, max_bytes=int(args.export_memory * 1024 * 1024))
+    navigator = WikipediaNavigator(base_url=args.base_url, backend=args.backend, verbose=False,
+                                   rate_limiter=RateLimiter(args.rate))
+    try:
+        export.consume(article_records(navigator, args.targets))
+    finally:
+        navigator.close()
+        export.close()
+    stats = export.stats()
+    print(f"📤 Выгружено: {stats['articles']} статей, {stats['articles_per_second']:.1f} статей/с, "
+          f"{stats['mb_per_second']:.2f} МБ/с", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
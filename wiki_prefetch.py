@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Фоновая предзагрузка статей на собственном цикле asyncio
+Пока пользователь читает статью, загружаются и разбираются её основные статьи,
+а поисковый запрос разрешается сразу до страницы первого результата
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from urllib.parse import urlencode, urlsplit
+
+from wiki_backends import HttpBackend
+from wiki_cache import canonical_url
+
+
+class AsyncPrefetcher:
+    """Предзагрузка статей: цикл asyncio в фоновом потоке, загрузка и разбор в пуле потоков"""
+
+    def __init__(self, base_url, extract, workers=2, max_entries=128, rate_limiter=None,
+                 tracer=None, rules=None):
+        """extract(page) превращает разобранную страницу в запись статьи навигатора"""
+        self.base_url = base_url.rstrip("/")
+        # Общий с навигатором ограничитель частоты запросов (RateLimiter)
+        self.rate_limiter = rate_limiter
+        # Интервалы загрузки и разбора страниц (Tracer навигатора)
+        self.tracer = tracer
+        # Правила извлечения навигатора для разбора hatnote (None — по адресу страницы)
+        self.rules = rules
+        self.extract = extract
+        self.max_entries = max_entries
+        self.stats = {'scheduled': 0, 'hits': 0, 'misses': 0, 'failed': 0}
+        self._tasks = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._backends = []
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._semaphore = asyncio.Semaphore(workers)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def _backend(self):
+        """HTTP-источник страниц для потока пула"""
+        backend = getattr(self._local, 'backend', None)
+        if backend is None:
+            backend = self._local.backend = HttpBackend(verbose=False, tracer=self.tracer, rules=self.rules)
+            with self._lock:
+                self._backends.append(backend)
+        return backend
+
+    def _fetch(self, url):
+        """Загрузка и разбор страницы (выполняется в пуле потоков)"""
+        return self._backend().fetch(url)
+
+    async def _load(self, url):
+        """Загрузка страницы с ограничением числа одновременных запросов"""
+        async with self._semaphore:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(urlsplit(url).netloc)
+            return await self.loop.run_in_executor(self._executor, self._fetch, url)
+
+    async def _article(self, url):
+        """Запись статьи по адресу или None"""
+        status, page = await self._load(url)
+        if status != 200 or page['title'] is None or page['no_article']:
+            return None
+        return self.extract(page)
+
+    async def _search(self, query):
+        """Поиск: точное совпадение или сразу первая статья из результатов поиска"""
+        params = urlencode({'search': query, 'title': 'Служебная:Поиск'})
+        status, page = await self._load(f"{self.base_url}/w/index.php?{params}")
+        results = page['search_results']
+        if results:
+            return await asyncio.wrap_future(self._schedule(canonical_url(results[0]['url']),
+                                                            self._article, results[0]['url']))
+        if status != 200 or page['title'] is None or page['is_search_page'] or page['no_article']:
+            return None
+        return self.extract(page)
+
+    async def _related(self, url):
+        """Статья и, после её разбора, все её основные статьи"""
+        record = await asyncio.wrap_future(self._schedule(canonical_url(url), self._article, url))
+        if record:
+            self.prefetch(link['url'] for link in record['related_links'])
+        return record
+
+    def _schedule(self, key, coroutine, *args):
+        """Запуск задачи в цикле asyncio, если такой ещё нет; старые задачи вытесняются"""
+        with self._lock:
+            if self._closed:
+                future = Future()
+                future.cancel()
+                return future
+            future = self._tasks.get(key)
+            if future is not None and not (future.done() and not future.cancelled() and future.exception()):
+                self._tasks.move_to_end(key)
+                return future
+            future = asyncio.run_coroutine_threadsafe(coroutine(*args), self.loop)
+            self._tasks[key] = future
+            self.stats['scheduled'] += 1
+            while len(self._tasks) > self.max_entries:
+                _, old = self._tasks.popitem(last=False)
+                old.cancel()
+        return future
+
+    def prefetch(self, urls):
+        """Фоновая загрузка статей по адресам"""
+        for url in urls:
+            self._schedule(canonical_url(url), self._article, url)
+
+    def prefetch_related(self, url, record=None):
+        """Фоновая загрузка основных статей; сама статья загружается, только если
+        её записи с основными статьями ещё нет (record)"""
+        if record is not None and record.get('related_links') is not None:
+            self.prefetch(link['url'] for link in record['related_links'])
+            return
+        self._schedule(f"related:{canonical_url(url)}", self._related, url)
+
+    def prefetch_search(self, query):
+        """Фоновое разрешение поискового запроса до страницы статьи"""
+        return self._schedule(f"search:{query.casefold()}", self._search, query)
+
+    def _result(self, key, timeout):
+        """Результат задачи или None, если её нет, она не успела или завершилась ошибкой"""
+        with self._lock:
+            future = self._tasks.get(key)
+        if future is None:
+            self.stats['misses'] += 1
+            return None
+        try:
+            record = future.result(timeout=timeout)
+        except FutureTimeout:
+            self.stats['misses'] += 1
+            return None
+        except Exception:
+            self.stats['failed'] += 1
+            return None
+        self.stats['hits' if record else 'misses'] += 1
+        return record
+
+    def get(self, url, timeout=0):
+        """Предзагруженная статья (ожидание не дольше timeout, если загрузка уже идёт)"""
+        return self._result(canonical_url(url), timeout)
+
+    def search(self, query, timeout=15):
+        """Статья по поисковому запросу через асинхронный поиск"""
+        self.prefetch_search(query)
+        return self._result(f"search:{query.casefold()}", timeout)
+
+    async def _shutdown(self):
+        """Отмена всех задач цикла"""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self):
+        """Остановка цикла asyncio и пула потоков"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._tasks.clear()
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        if not self._thread.is_alive():
+            self.loop.close()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self._backends:
+            backend.close()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Локальный стенд Википедии для бенчмарков и проверок без выхода в интернет
+Отдаёт сохранённые страницы статей из каталога либо синтетические статьи,
+с настраиваемой задержкой ответа; страницы для каталога записываются с живой Википедии
+"""
+
+import hashlib
+import os
+import random
+import threading
+import time
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+from wiki_backends import HttpSession, article_url, parse_wiki_page
+from rate_limiter import RateLimiter
+
+
+# Адрес, который подменяется на адрес стенда в сохранённых страницах
+LIVE_BASE_URL = "https://ru.wikipedia.org"
+
+
+# Подкаталог каталога страниц с сохранёнными страницами результатов поиска
+SEARCH_DIR = "search"
+
+
+def page_filename(name):
+    """Имя файла сохранённой страницы по заголовку или поисковому запросу"""
+    return name.replace("/", "_") + ".html"
+
+
+# Форма поиска, как в шапке ru.wikipedia
+SEARCH_FORM = (
+    "<form action=\"/w/index.php\" id=\"searchform\">"
+    "<input type=\"search\" name=\"search\">"
+    "<input type=\"hidden\" name=\"title\" value=\"Служебная:Поиск\">"
+    "</form>"
+)
+
+
+def make_search_results(query, titles):
+    """Страница результатов поиска в разметке ru.wikipedia"""
+    items = "".join(
+        "<li class=\"mw-search-result\"><div class=\"mw-search-result-heading\">"
+        f"<a href=\"/wiki/{quote(t.replace(' ', '_'))}\">{escape(t)}</a></div></li>"
+        for t in titles
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        "<title>Результаты поиска — Википедия</title></head><body>"
+        f"{SEARCH_FORM}<h1 id=\"firstHeading\">Результаты поиска</h1>"
+        f"<div id=\"mw-content-text\"><div class=\"searchresults\">"
+        f"<p>По запросу «{escape(query)}» найдено:</p>"
+        f"<ul class=\"mw-search-results\">{items}</ul></div></div></body></html>"
+    )
+
+
+def make_synthetic_article(title, paragraphs=200, hatnotes=40, filler_divs=3000, targets=None,
+                           revision=1, edited_section=None):
+    """Генерация большой статьи в разметке ru.wikipedia (targets — заголовки основных статей,
+    edited_section — раздел, текст которого изменён правкой revision)"""
+    if targets is not None:
+        hatnotes = len(targets)
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>{escape(title)} — Википедия</title>",
+        f"<script>RLCONF={{\"wgRevisionId\":{revision}}};</script></head><body>",
+        SEARCH_FORM,
+        f"<h1 id=\"firstHeading\">{escape(title)}</h1>",
+        "<div id=\"mw-content-text\"><div class=\"mw-parser-output\">",
+    ]
+    per_section = max(1, paragraphs // max(1, hatnotes))
+    fillers_per_paragraph = filler_divs // max(1, paragraphs)
+    for i in range(paragraphs):
+        if i % per_section == 0 and i // per_section < hatnotes:
+            n = i // per_section
+            target = targets[n] if targets is not None else f"{title} (раздел {n})"
+            parts.append(f"<h2>Раздел {n}</h2>")
+            parts.append(
+                "<div class=\"hatnote navigation-not-searchable ts-main\">"
+                f"Основная статья: <a href=\"/wiki/{quote(target.replace(' ', '_'))}\">"
+                f"{escape(target)}</a></div>"
+            )
+        edit = f" Правка {revision}." if edited_section == i // per_section else ""
+        parts.append(
+            f"<p>Параграф {i} статьи «{escape(title)}». "
+            f"Текст достаточной длины, чтобы пройти фильтр коротких параграфов.{edit}</p>"
+        )
+        for j in range(fillers_per_paragraph):
+            parts.append(f"<div class=\"filler filler-{j}\"><span>·</span></div>")
+    parts.append("</div></div></body></html>")
+    return "".join(parts)
+
+
+class SyntheticGraph:
+    """Синтетический сайт: pages статей «Страница N», каждая ссылается на fanout других"""
+
+    def __init__(self, pages=5000, fanout=4, paragraphs=5):
+        self.pages = pages
+        self.fanout = fanout
+        self.paragraphs = paragraphs
+        # Номера правок изменённых статей (у остальных — 1)
+        self.revisions = {}
+
+    def edit(self, n):
+        """Правка статьи n: новый номер правки и изменённый текст одного раздела"""
+        self.revisions[n] = self.revisions.get(n, 1) + 1
+
+    def title(self, n):
+        """Заголовок статьи с номером n"""
+        return f"Страница {n}"
+
+    def number(self, title):
+        """Номер статьи по заголовку или None"""
+        prefix, _, number = title.rpartition(" ")
+        if prefix != "Страница" or not number.isdigit() or int(number) >= self.pages:
+            return None
+        return int(number)
+
+    def targets(self, n):
+        """Заголовки основных статей для статьи n"""
+        return [self.title((n * self.fanout + j + 1) % self.pages) for j in range(self.fanout)]
+
+    def render(self, title):
+        """HTML статьи графа или None, если такой статьи нет"""
+        n = self.number(title)
+        if n is None:
+            return None
+        revision = self.revisions.get(n, 1)
+        return make_synthetic_article(title, paragraphs=max(self.paragraphs, self.fanout),
+                                      filler_divs=0, targets=self.targets(n), revision=revision,
+                                      edited_section=revision % self.fanout if revision > 1 else None)
+
+
+class StandinServer:
+    """HTTP-сервер, имитирующий ru.wikipedia.org на localhost"""
+
+    def __init__(self, pages_dir=None, synthetic=True, graph=None, host="127.0.0.1", port=0,
+                 latency=0.0, jitter=0.0, seed=0):
+        """pages_dir — каталог с сохранёнными страницами вида <Заголовок>.html,
+        graph — синтетический граф статей (SyntheticGraph) вместо произвольных статей,
+        latency и jitter — задержка каждого ответа: latency + случайная добавка до jitter, секунд"""
+        self.pages_dir = pages_dir
+        self.synthetic = synthetic
+        self.graph = graph
+        self.latency = latency
+        self.jitter = jitter
+        # Случайные задержки воспроизводимы при одинаковом seed
+        self._random = random.Random(seed)
+        self.requests_served = 0
+        # Число запросов по путям (без параметров)
+        self.paths_served = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Адрес стенда, подставляемый вместо https://ru.wikipedia.org"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def article_url(self, title):
+        """Адрес статьи на стенде"""
+        return f"{self.base_url}/wiki/{quote(title.replace(' ', '_'))}"
+
+    def start(self):
+        """Запуск сервера в фоновом потоке"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановка сервера"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def delay(self):
+        """Задержка очередного ответа, секунд"""
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self.latency + self._random.uniform(0, self.jitter)
+
+    def _load_saved(self, *parts):
+        """Сохранённая страница из каталога или None"""
+        if not self.pages_dir:
+            return None
+        path = os.path.join(self.pages_dir, *parts)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        # Абсолютные ссылки на живую Википедию ведём на стенд
+        return html.replace(LIVE_BASE_URL, self.base_url)
+
+    def load_page(self, title):
+        """HTML статьи: сохранённая страница или синтетическая, None если нет"""
+        html = self._load_saved(page_filename(title))
+        if html is not None:
+            return html
+        if self.graph is not None:
+            return self.graph.render(title)
+        if self.synthetic:
+            return make_synthetic_article(title)
+        return None
+
+    def page_exists(self, title):
+        """Есть ли статья с таким заголовком на стенде"""
+        if self.graph is not None and self.graph.number(title) is not None:
+            return True
+        if self.synthetic and self.graph is None:
+            return True
+        return bool(self.pages_dir) and os.path.exists(
+            os.path.join(self.pages_dir, page_filename(title)))
+
+    def search_titles(self, query, limit=20):
+        """Заголовки статей стенда для страницы результатов поиска"""
+        titles = []
+        if self.pages_dir and os.path.isdir(self.pages_dir):
+            needle = query.casefold()
+            titles = sorted(
+                name[:-len(".html")] for name in os.listdir(self.pages_dir)
+                if name.endswith(".html") and needle in name.casefold()
+            )
+        if not titles and self.synthetic and self.graph is None and query:
+            titles = [f"{query} (значение {i})" for i in range(1, 4)]
+        return titles[:limit]
+
+    def _make_handler(self):
+        """Класс обработчика запросов, привязанный к этому серверу"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # HTTP/1.1 — соединения keep-alive, как у настоящей Википедии
+            protocol_version = "HTTP/1.1"
+            # Заголовки и тело уходят отдельными записями: без TCP_NODELAY второй пакет
+            # ждёт отложенного ACK клиента (~40 мс на каждый ответ)
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                path = parts.path
+                with server._lock:
+                    server.requests_served += 1
+                    server.paths_served[unquote(path)] += 1
+                delay = server.delay()
+                if delay > 0:
+                    time.sleep(delay)
+                if path == "/w/index.php":
+                    self._search(parse_qs(parts.query))
+                    return
+                if not path.startswith("/wiki/"):
+                    self.send_error(404)
+                    return
+                title = unquote(path[len("/wiki/"):]).replace("_", " ")
+                html = server.load_page(title or "Заглавная страница")
+                if html is None:
+                    self.send_error(404)
+                    return
+                self._send_html(html)
+
+            def _search(self, query):
+                """Поиск: точное совпадение — перенаправление на статью, иначе результаты"""
+                text = (query.get("search") or [""])[0].strip()
+                fulltext = "fulltext" in query
+                if text and not fulltext and server.page_exists(text):
+                    self.send_response(302)
+                    self.send_header("Location", server.article_url(text))
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                # Записанная с Википедии страница результатов поиска
+                saved = server._load_saved(SEARCH_DIR, page_filename(text))
+                if saved is not None:
+                    self._send_html(saved)
+                    return
+                self._send_html(make_search_results(text, server.search_titles(text)))
+
+            def _send_html(self, html):
+                body = html.encode("utf-8")
+                # ETag по содержимому: неизменившаяся страница отдаётся ответом 304
+                etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def record_pages(pages_dir, titles=(), queries=(), follow_hatnotes=False,
+                 base_url=LIVE_BASE_URL, rate=1.0):
+    """Запись статей, их основных статей и страниц результатов поиска для стенда
+
+    Статьи сохраняются как <Заголовок>.html, результаты поиска — как search/<Запрос>.html;
+    поисковый запрос с точным совпадением сохраняется как статья. Возвращает число файлов.
+    """
+    session = HttpSession()
+    limiter = RateLimiter(rate)
+    host = urlsplit(base_url).netloc
+    os.makedirs(os.path.join(pages_dir, SEARCH_DIR), exist_ok=True)
+    saved = set()
+
+    def fetch(url):
+        limiter.acquire(host)
+        status, response, body, final_url = session.get(url)
+        charset = response.headers.get_content_charset() or "utf-8"
+        html = body.decode(charset, errors="replace")
+        return status, html, parse_wiki_page(html, final_url)
+
+    def save(parts, html):
+        path = os.path.join(pages_dir, *parts)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        saved.add(path)
+        print(f"💾 {path}")
+
+    def save_article(status, html, page):
+        if status != 200 or page['title'] is None or page['is_search_page']:
+            return False
+        save([page_filename(page['title'])], html)
+        if follow_hatnotes:
+            for _, href in page['hatnotes']:
+                if href and href.startswith(f"{base_url}/wiki/"):
+                    linked = fetch(href)
+                    if linked[0] == 200 and linked[2]['title'] is not None:
+                        save([page_filename(linked[2]['title'])], linked[1])
+        return True
+
+    try:
+        for title in titles:
+            if not save_article(*fetch(article_url(base_url, title))):
+                print(f"⚠️ Статья не найдена: {title}")
+        for query in queries:
+            params = urlencode({'search': query, 'title': 'Служебная:Поиск'})
+            status, html, page = fetch(f"{base_url}/w/index.php?{params}")
+            if page['is_search_page']:
+                save([SEARCH_DIR, page_filename(query)], html)
+            else:
+                save_article(status, html, page)
+    finally:
+        session.close()
+    return len(saved)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Локальный стенд Википедии")
+    parser.add_argument("--pages", help="каталог с сохранёнными страницами")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка каждого ответа, секунд")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, секунд")
+    parser.add_argument("--record", nargs="+", metavar="ЗАГОЛОВОК",
+                        help="записать статьи с ru.wikipedia.org в каталог --pages и выйти")
+    parser.add_argument("--record-search", nargs="+", default=[], metavar="ЗАПРОС",
+                        help="записать также страницы результатов поиска")
+    parser.add_argument("--follow-hatnotes", action="store_true",
+                        help="записать также основные статьи записываемых статей")
+    args = parser.parse_args()
+
+    if args.record or args.record_search:
+        if not args.pages:
+            parser.error("для записи нужен каталог --pages")
+        count = record_pages(args.pages, args.record or (), args.record_search,
+                             follow_hatnotes=args.follow_hatnotes)
+        print(f"✅ Записано страниц: {count}")
+        raise SystemExit
+
+    standin = StandinServer(pages_dir=args.pages, port=args.port,
+                            latency=args.latency, jitter=args.jitter)
+    print(f"🌐 Стенд запущен: {standin.base_url}/wiki/")
+    try:
+        standin._server.serve_forever()
+    except KeyboardInterrupt:
+        standin.stop()